@@ -15,6 +15,46 @@
 /*!40101 SET @OLD_SQL_MODE=@@SQL_MODE, SQL_MODE='NO_AUTO_VALUE_ON_ZERO' */;
 /*!40111 SET @OLD_SQL_NOTES=@@SQL_NOTES, SQL_NOTES=0 */;
 
+--
+-- Table structure for table `key_rotation_checkpoints`
+--
+
+DROP TABLE IF EXISTS `key_rotation_checkpoints`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `key_rotation_checkpoints` (
+  `job` varchar(64) NOT NULL,
+  `last_id` int NOT NULL DEFAULT '0',
+  `rows_rekeyed` int NOT NULL DEFAULT '0',
+  `updated_at` datetime NOT NULL,
+  PRIMARY KEY (`job`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `mail_outbox`
+--
+
+DROP TABLE IF EXISTS `mail_outbox`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `mail_outbox` (
+  `message_id` int NOT NULL AUTO_INCREMENT,
+  `subject` varchar(255) NOT NULL,
+  `sender` varchar(255) NOT NULL,
+  `recipients` text NOT NULL,
+  `body` text NOT NULL,
+  `status` varchar(10) NOT NULL DEFAULT 'pending',
+  `attempts` int NOT NULL DEFAULT '0',
+  `next_attempt_at` datetime NOT NULL,
+  `last_error` text,
+  `created_at` datetime NOT NULL,
+  `sent_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`message_id`),
+  KEY `ix_mail_outbox_status_next_attempt` (`status`,`next_attempt_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `password_entries`
 --
@@ -27,14 +67,43 @@ CREATE TABLE `password_entries` (
   `website` blob NOT NULL,
   `username` blob NOT NULL,
   `password` blob NOT NULL,
+  `record` blob DEFAULT NULL,
   `user_id` int NOT NULL,
+  `strength` varchar(10) DEFAULT NULL,
+  `password_fingerprint` varchar(64) DEFAULT NULL,
+  `revision` int NOT NULL DEFAULT '0',
+  `updated_at` datetime DEFAULT NULL,
+  `deleted_at` datetime DEFAULT NULL,
   PRIMARY KEY (`entry_id`),
   KEY `fk_passwords_user` (`user_id`),
+  KEY `ix_password_entries_user_strength` (`user_id`,`strength`),
+  KEY `ix_password_entries_user_fingerprint` (`user_id`,`password_fingerprint`),
+  KEY `ix_password_entries_user_revision` (`user_id`,`revision`),
   CONSTRAINT `fk_passwords_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`user_id`) ON DELETE CASCADE,
   CONSTRAINT `password_entries_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`user_id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=24 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `password_entry_search_tokens`
+--
+
+DROP TABLE IF EXISTS `password_entry_search_tokens`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `password_entry_search_tokens` (
+  `token_id` int NOT NULL AUTO_INCREMENT,
+  `entry_id` int NOT NULL,
+  `user_id` int NOT NULL,
+  `token` varchar(32) NOT NULL,
+  PRIMARY KEY (`token_id`),
+  KEY `ix_password_entry_search_tokens_entry_id` (`entry_id`),
+  KEY `ix_search_tokens_user_token` (`user_id`,`token`),
+  CONSTRAINT `fk_search_tokens_entry` FOREIGN KEY (`entry_id`) REFERENCES `password_entries` (`entry_id`) ON DELETE CASCADE,
+  CONSTRAINT `fk_search_tokens_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`user_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `users`
 --
@@ -53,6 +122,7 @@ CREATE TABLE `users` (
   `prefers_dark_mode` tinyint(1) DEFAULT '0',
   `encrypted_master_password` text,
   `avatar_path` varchar(255) DEFAULT NULL,
+  `vault_revision` int NOT NULL DEFAULT '0',
   PRIMARY KEY (`user_id`),
   UNIQUE KEY `username` (`username`),
   UNIQUE KEY `email` (`email`)
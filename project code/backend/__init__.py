@@ -1,26 +1,53 @@
 import os
+import threading
 from dotenv import load_dotenv
 load_dotenv()
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_mail import Mail
-from flask_wtf import CSRFProtect
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from flask_migrate import Migrate
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
 
 
 # --- Shared extension instances ---
 db = SQLAlchemy()
 login_manager = LoginManager()
-mail = Mail()
-csrf = CSRFProtect()
-limiter = Limiter(key_func=get_remote_address)
-migrate = Migrate()
-jwt = JWTManager()
+
+
+# The remaining extensions are created on first access (``from backend import
+# limiter`` works as before), so scripts that never touch them do not pay for
+# importing Flask-Mail, Flask-Limiter, Flask-Migrate (Alembic), CORS or JWT.
+def _mail():
+    from flask_mail import Mail
+    return Mail()
+
+def _csrf():
+    from flask_wtf import CSRFProtect
+    return CSRFProtect()
+
+def _limiter():
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
+    return Limiter(key_func=get_remote_address)
+
+def _migrate():
+    from flask_migrate import Migrate
+    return Migrate()
+
+def _jwt():
+    from flask_jwt_extended import JWTManager
+    return JWTManager()
+
+_LAZY_EXTENSIONS = {'mail': _mail, 'csrf': _csrf, 'limiter': _limiter, 'migrate': _migrate, 'jwt': _jwt}
+_lazy_lock = threading.Lock()
+
+
+def __getattr__(name):
+    factory = _LAZY_EXTENSIONS.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lazy_lock:
+        if name not in globals():
+            globals()[name] = factory()
+        return globals()[name]
 
 def get_database_uri():
     db_user = os.environ.get('DB_USER', 'root')
@@ -30,8 +57,14 @@ def get_database_uri():
     
     return f"mysql+pymysql://{db_user}:{db_pass}@{db_host}/{db_name}"
 
-def create_app():
-    """Application factory: create and configure the Flask app."""
+def create_app(config_overrides=None, web=True):
+    """
+    Application factory: create and configure the Flask app.
+    ``config_overrides`` is applied on top of the environment-based configuration
+    (used by scripts and benchmarks, e.g. to point at a SQLite database).
+    ``web=False`` builds a script app: configuration, database and the model-level
+    services only, without blueprints, request hooks or the web-only extensions.
+    """
     app = Flask(
         __name__,
         static_folder='frontend',
@@ -39,38 +72,119 @@ def create_app():
         static_url_path='/static' 
     )
 
+    # Engine profile (see backend/db_profiles.py)
+    from . import db_profiles
+    db_profile = db_profiles.profile_name()
+
     # Use a fixed secret key for session consistency
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', os.urandom(32))
 
     # Core configuration
     app.config.update(
-        SQLALCHEMY_DATABASE_URI=get_database_uri(),
+        DB_PROFILE=db_profile,
+        SQLALCHEMY_DATABASE_URI=db_profiles.database_uri(db_profile, app.instance_path) or get_database_uri(),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
-        SQLALCHEMY_ENGINE_OPTION={"pool_pre_ping": True},
         MAIL_SERVER=os.environ.get('MAIL_SERVER'),
         MAIL_PORT=int(os.environ.get('MAIL_PORT', '587')),
         MAIL_USE_TLS=os.environ.get('MAIL_USE_TLS', 'true').lower() in ('true','1'),
         MAIL_USERNAME=os.environ.get('MAIL_USERNAME'),
         MAIL_PASSWORD=os.environ.get('MAIL_PASSWORD'),
+        # Mail outbox delivery (see backend/outbox.py)
+        MAIL_OUTBOX_WORKER=os.environ.get('MAIL_OUTBOX_WORKER', 'true').lower() in ('true','1'),
+        MAIL_OUTBOX_BATCH_SIZE=int(os.environ.get('MAIL_OUTBOX_BATCH_SIZE', 20)),
+        MAIL_OUTBOX_POLL_INTERVAL=float(os.environ.get('MAIL_OUTBOX_POLL_INTERVAL', 5)),
+        MAIL_OUTBOX_MAX_ATTEMPTS=int(os.environ.get('MAIL_OUTBOX_MAX_ATTEMPTS', 6)),
+        MAIL_OUTBOX_BACKOFF_BASE=float(os.environ.get('MAIL_OUTBOX_BACKOFF_BASE', 30)),
+        MAIL_OUTBOX_BACKOFF_MAX=float(os.environ.get('MAIL_OUTBOX_BACKOFF_MAX', 3600)),
+        MAIL_OUTBOX_LEASE=float(os.environ.get('MAIL_OUTBOX_LEASE', 120)),
         JWT_SECRET_KEY=os.environ.get('JWT_SECRET_KEY', 'change-this-too'),
         JWT_ACCESS_TOKEN_EXPIRES=int(os.environ.get('JWT_EXPIRES_S', 3600)),
         SESSION_COOKIE_SECURE=False,
         SESSION_COOKIE_HTTPONLY=True,
         SESSION_COOKIE_SAMESITE='Lax',
         MAX_CONTENT_LENGTH=2 * 1024 * 1024,  # 2MB
-        RATELIMIT_ENABLED=False
+        VAULT_IMPORT_MAX_BYTES=int(os.environ.get('VAULT_IMPORT_MAX_BYTES', 32 * 1024 * 1024)),  # 32MB
+        # Route rate limits, shared by all worker processes through a local SQLite file
+        RATELIMIT_ENABLED=os.environ.get('RATELIMIT_ENABLED', 'true').lower() in ('true','1'),
+        RATELIMIT_STORAGE_URI=os.environ.get('RATELIMIT_STORAGE_URI')
+            or f"dunkey+sqlite:///{os.path.join(app.instance_path, 'ratelimit.db')}",
+        RATELIMIT_STRATEGY=os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter'),
+        # Failed-login throttle (see backend/login_throttle.py)
+        LOGIN_THROTTLE_ENABLED=os.environ.get('LOGIN_THROTTLE_ENABLED', 'true').lower() in ('true','1'),
+        LOGIN_THROTTLE_FREE_USER=int(os.environ.get('LOGIN_THROTTLE_FREE_USER', 5)),
+        LOGIN_THROTTLE_FREE_IP=int(os.environ.get('LOGIN_THROTTLE_FREE_IP', 20)),
+        LOGIN_THROTTLE_MAX_DELAY=float(os.environ.get('LOGIN_THROTTLE_MAX_DELAY', 900)),
+        # Opt-in cache of decrypted vault records (0 disables it)
+        VAULT_PLAINTEXT_CACHE_SIZE=int(os.environ.get('VAULT_PLAINTEXT_CACHE_SIZE', 0)),
+        VAULT_PLAINTEXT_CACHE_TTL=int(os.environ.get('VAULT_PLAINTEXT_CACHE_TTL', 300)),
+        # Seconds a loaded user row is reused by the user_loader (0 disables caching)
+        USER_CACHE_TTL=int(os.environ.get('USER_CACHE_TTL', 30)),
+        # Login password hashing (see backend/hashing.py); 0 workers hashes inline
+        BCRYPT_LOG_ROUNDS=int(os.environ.get('BCRYPT_LOG_ROUNDS', 12)),
+        HASH_POOL_WORKERS=int(os.environ.get('HASH_POOL_WORKERS', os.cpu_count() or 2)),
+        HASH_POOL_MAX_PENDING=int(os.environ.get('HASH_POOL_MAX_PENDING', 0)),
+        HASH_POOL_TIMEOUT=float(os.environ.get('HASH_POOL_TIMEOUT', 30)),
+        # Background threads rendering avatar variants (see backend/avatars.py)
+        AVATAR_WORKERS=int(os.environ.get('AVATAR_WORKERS', 2)),
+        # Serve frontend/dist (built by tools/build_assets.py) when it exists
+        ASSETS_USE_DIST=os.environ.get('ASSETS_USE_DIST', 'true').lower() in ('true','1'),
+        # Queued JSON-lines logging (see backend/logging_utils.py)
+        LOG_QUEUE_SIZE=int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+        LOG_SAMPLE_RATES=os.environ.get('LOG_SAMPLE_RATES', ''),  # e.g. "login_success=0.1"
+        # Request/SQL/crypto metrics on GET /metrics (see backend/metrics.py)
+        METRICS_ENABLED=os.environ.get('METRICS_ENABLED', 'true').lower() in ('true','1'),
+        # Remote addresses allowed to reach /internal/* endpoints
+        INTERNAL_ALLOWED_ADDRS=os.environ.get('INTERNAL_ALLOWED_ADDRS', '127.0.0.1,::1').split(',')
+    )
+    if config_overrides:
+        app.config.update(config_overrides)
+    # Pool settings depend on the final URI, so they are resolved after overrides
+    app.config.setdefault(
+        'SQLALCHEMY_ENGINE_OPTIONS',
+        db_profiles.engine_options(app.config['DB_PROFILE'], app.config['SQLALCHEMY_DATABASE_URI'])
     )
 
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
+    from . import pool_stats
+    pool_stats.init_app(app, db)
+
+    from .vault_cache import plaintext_cache
+    from .user_cache import user_cache
+    from .hashing import hashing
+    from .avatars import avatar_store
+    plaintext_cache.init_app(app)
+    user_cache.init_app(app)
+    hashing.init_app(app)
+    avatar_store.init_app(app)
+
+    if not web:
+        return app
+
+    # `flask db ...` is the only user of Flask-Migrate; skip Alembic everywhere else
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        from . import migrate
+        migrate.init_app(app, db)
+    from . import mail, limiter, jwt
+    from flask_cors import CORS
     login_manager.init_app(app)
     mail.init_app(app)
     #csrf.init_app(app)
+    from . import ratelimit_storage  # registers the dunkey+sqlite:// storage scheme
     limiter.init_app(app)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
     jwt.init_app(app)
 
+    from .assets import assets
+    from .login_throttle import login_throttle
+    assets.init_app(app)
+    login_throttle.init_app(app)
+
+    from . import metrics
+    from .logging_utils import init_logging
+    metrics.init_app(app, db)
+    init_logging(app)
+
     # Configure Flask-Login
     login_manager.login_view = 'auth_blueprint.login'  # Blueprint-aware endpoint name
     login_manager.login_message_category = 'error'
@@ -81,11 +195,13 @@ def create_app():
     from .profile import profile_bp
     from .passwords import bp as passwords_bp
     from .contact import contact_bp
+    from .internal import internal_bp
 
     app.register_blueprint(auth_bp, url_prefix='/auth')  # Add url_prefix
     app.register_blueprint(profile_bp, url_prefix='/profile')
     app.register_blueprint(passwords_bp)
     app.register_blueprint(contact_bp)
+    app.register_blueprint(internal_bp)
 
 
     return app
\ No newline at end of file
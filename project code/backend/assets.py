@@ -0,0 +1,78 @@
+"""
+Serves the frontend from the build produced by tools/build_assets.py.
+
+The manifest is read once at startup. Content-hashed files are sent with a
+one-year ``immutable`` Cache-Control; HTML pages (whose names cannot change) are
+revalidated with their ETag on every load. The precompressed variant matching
+the request's Accept-Encoding is sent as-is, so nothing is compressed per
+request. Without a build, files are served straight from frontend/ as before.
+"""
+import json
+import mimetypes
+import os
+from flask import current_app, request, send_file, send_from_directory
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+# Preferred order when the client accepts several encodings
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+
+class AssetManifest:
+    def __init__(self):
+        self.frontend_dir = None
+        self.dist_dir = None
+        self.entries = {}    # logical path -> manifest entry
+        self.by_built = {}   # hashed path -> logical path
+
+    def init_app(self, app):
+        self.frontend_dir = os.path.join(os.path.dirname(app.root_path), 'frontend')
+        self.dist_dir = app.config.get('ASSETS_DIST_DIR') or os.path.join(self.frontend_dir, 'dist')
+        self.entries = {}
+        self.by_built = {}
+
+        manifest_path = os.path.join(self.dist_dir, 'manifest.json')
+        if not app.config.get('ASSETS_USE_DIST', True) or not os.path.exists(manifest_path):
+            return
+        with open(manifest_path) as f:
+            self.entries = json.load(f)
+        self.by_built = {entry['path']: logical for logical, entry in self.entries.items()}
+
+    def _choose_encoding(self, encodings: dict) -> str:
+        accepted = request.accept_encodings
+        for encoding in ENCODING_PREFERENCE:
+            if encoding in encodings and accepted[encoding] > 0:
+                return encoding
+        return 'identity'
+
+    def send(self, filename: str):
+        """Response for a frontend file, by logical ('css/styles.css') or hashed name."""
+        logical = self.by_built.get(filename, filename)
+        entry = self.entries.get(logical)
+        if entry is None:
+            return send_from_directory(self.frontend_dir, filename)
+
+        # A hashed URL never changes content; a logical one must be revalidated
+        cache_control = IMMUTABLE_CACHE if entry['immutable'] and filename != logical else REVALIDATE_CACHE
+        encoding = self._choose_encoding(entry['encodings'])
+        # Each encoding is a different representation, so it needs its own strong ETag
+        etag = entry['etag'] if encoding == 'identity' else f"{entry['etag']}-{encoding}"
+
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            path = os.path.join(self.dist_dir, entry['encodings'][encoding])
+            mimetype = mimetypes.guess_type(logical)[0] or 'application/octet-stream'
+            response = send_file(path, mimetype=mimetype, etag=False, conditional=False,
+                                 max_age=None)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+assets = AssetManifest()
@@ -5,8 +5,11 @@ from flask_jwt_extended import create_access_token
 from . import db
 from .model import User
 from .validation import sanitize_username, is_valid_email, is_strong_password
-from werkzeug.security import generate_password_hash, check_password_hash
+from .hashing import hashing
+from .user_cache import user_cache
 from .logging_utils import log_login_failed, log_login_success, log_register
+from .vault_cache import plaintext_cache
+from .login_throttle import login_throttle
 
 # Frontend path
 FE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend')
@@ -62,7 +65,7 @@ def register():
         user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password)
+            password_hash=hashing.hash(password)
         )
         db.session.add(user)
         db.session.commit()
@@ -88,16 +91,36 @@ def login():
     username = request.form.get('username', '').strip()
     password = request.form.get('password', '')
 
+    # Throttled usernames/IPs are turned away before any hash work
+    retry_after = login_throttle.retry_after(username, request.remote_addr)
+    if retry_after:
+        message = 'Too many failed login attempts. Try again later.'
+        if request.headers.get('Accept') == 'application/json':
+            return jsonify(success=False, message=message), 429, {'Retry-After': str(retry_after)}
+        flash(message, 'error')
+        return redirect('/login.html')
+
     user = User.query.filter_by(username=username).first()
-    
-    if not user or not check_password_hash(user.password_hash, password):
+
+    ok, new_hash = hashing.verify_and_update(user.password_hash, password) if user else (False, None)
+    if not ok:
+        login_throttle.record_failure(username, request.remote_addr)
+        log_login_failed(username)
         message = 'Invalid username or password'
         if request.headers.get('Accept') == 'application/json':
             return jsonify(success=False, message=message), 401
         flash(message, 'error')
         return redirect('/login.html')
     
+    if new_hash:
+        # Old hash format or cost: upgrade to the current policy
+        user.password_hash = new_hash
+        db.session.commit()
+        user_cache.bump(user.user_id)
+
+    login_throttle.record_success(username)
     login_user(user)
+    log_login_success(user.username)
 
     if request.headers.get('Accept') == 'application/json':
         return jsonify(success=True, redirect_url='/dashboard.html', access_token='example-token'), 200
@@ -108,5 +131,7 @@ def login():
 # --- Logout Route ---
 @auth_bp.route('/logout')
 def logout():
+    if current_user.is_authenticated:
+        plaintext_cache.evict_user(current_user.user_id)
     logout_user()
     return send_from_directory(FE, 'login.html')
\ No newline at end of file
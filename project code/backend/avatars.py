@@ -0,0 +1,205 @@
+"""
+Avatar processing.
+
+An upload is stored once under the SHA-256 of its bytes (so identical images
+share one directory) and ``users.avatar_path`` holds that digest. The original
+is written during the request; the resized WebP/PNG variants are rendered on a
+small background thread pool (Pillow releases the GIL while resampling) and
+written atomically, so until they exist ``variant_path`` falls back to the
+original.
+
+    avatars/<digest>/source           original upload
+    avatars/<digest>/<size>.webp|png  square variants for each of SIZES
+
+Because a digest can be shared, replacing an avatar never deletes files: another
+user's upload of the same image may be about to commit a reference to them.
+``sweep`` (``python maintenance.py sweep-avatars``) deletes digests that no user
+references and that nothing has stored for a grace period.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+logger = logging.getLogger('vault_app')
+
+AVATAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'avatars')
+SIZES = (32, 64, 256)
+DEFAULT_SIZE = 64
+FORMATS = {'webp': 'image/webp', 'png': 'image/png'}
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+SOURCE_NAME = 'source'
+SWEEP_MIN_AGE = 24 * 3600  # seconds since a digest was last stored before it can be swept
+
+
+def is_digest(avatar_path) -> bool:
+    return bool(avatar_path) and bool(DIGEST_RE.match(avatar_path))
+
+
+def snap_size(requested) -> int:
+    """Smallest variant at least as large as ``requested`` (the largest if none is)."""
+    try:
+        requested = int(requested)
+    except (TypeError, ValueError):
+        return DEFAULT_SIZE
+    for size in SIZES:
+        if size >= requested:
+            return size
+    return SIZES[-1]
+
+
+def _square(image):
+    from PIL import ImageOps
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('RGBA')
+    side = min(image.size)
+    left = (image.width - side) // 2
+    top = (image.height - side) // 2
+    return image.crop((left, top, left + side, top + side))
+
+
+def render_variants(data: bytes) -> dict:
+    """Decode ``data`` once and encode every size/format; returns {filename: bytes}."""
+    from PIL import Image  # imported on first render, not at app start
+    with Image.open(BytesIO(data)) as source:
+        source.seek(0)  # first frame of animated GIFs
+        image = _square(source)
+
+    variants = {}
+    # Largest first, each smaller size resampled from the previous one
+    for size in sorted(SIZES, reverse=True):
+        if image.width != size:
+            image = image.resize((size, size), Image.LANCZOS, reducing_gap=2.0)
+        for fmt in FORMATS:
+            out = BytesIO()
+            if fmt == 'webp':
+                image.save(out, 'WEBP', quality=85, method=4)
+            else:
+                image.save(out, 'PNG', optimize=True)
+            variants[f"{size}.{fmt}"] = out.getvalue()
+    return variants
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.tmp{threading.get_ident()}"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class AvatarStore:
+    def __init__(self, root: str = AVATAR_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = {}   # digest -> Future
+        self.workers = 2
+
+    def init_app(self, app):
+        self.workers = max(int(app.config.get('AVATAR_WORKERS', 2)), 1)
+        self.root = app.config.get('AVATAR_DIR') or self.root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='avatar')
+            return self._executor
+
+    def directory(self, digest: str) -> str:
+        return os.path.join(self.root, digest)
+
+    def store(self, data: bytes) -> str:
+        """Save an upload and queue its variants; returns the digest to store on the user."""
+        digest = hashlib.sha256(data).hexdigest()
+        directory = self.directory(digest)
+        os.makedirs(directory, exist_ok=True)
+        # Every store, even of known bytes, restarts the sweep grace period
+        os.utime(directory)
+        source = os.path.join(directory, SOURCE_NAME)
+        if not os.path.exists(source):
+            _write_atomic(source, data)
+
+        if not os.path.exists(os.path.join(directory, f"{SIZES[0]}.png")):
+            pool = self._pool()
+            with self._lock:
+                if digest not in self._pending:
+                    self._pending[digest] = pool.submit(self._render, digest, data)
+        return digest
+
+    def _render(self, digest: str, data: bytes):
+        try:
+            directory = self.directory(digest)
+            for name, encoded in render_variants(data).items():
+                _write_atomic(os.path.join(directory, name), encoded)
+        except Exception:
+            logger.exception("Avatar variant rendering failed for %s", digest)
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+
+    def wait(self, digest: str, timeout: float = None):
+        """Block until the variants of ``digest`` are rendered (used by scripts and benchmarks)."""
+        with self._lock:
+            future = self._pending.get(digest)
+        if future is not None:
+            future.result(timeout)
+
+    def variant_path(self, digest: str, size: int, fmt: str):
+        """(path, mimetype, is_final) for a variant, or the original while it is being rendered."""
+        directory = self.directory(digest)
+        path = os.path.join(directory, f"{size}.{fmt}")
+        if os.path.exists(path):
+            return path, FORMATS[fmt], True
+        source = os.path.join(directory, SOURCE_NAME)
+        if os.path.exists(source):
+            from PIL import Image
+            with open(source, 'rb') as f:
+                kind = Image.MIME.get(Image.open(f).format, 'application/octet-stream')
+            return source, kind, False
+        return None, None, False
+
+    def sweep(self, referenced: set, min_age: float = SWEEP_MIN_AGE, dry_run: bool = False) -> list:
+        """
+        Delete digests that are not in ``referenced`` and were last stored more
+        than ``min_age`` seconds ago. An upload commits its reference well within
+        the grace period, so a digest stored by an upload in flight is kept.
+        Returns the swept digests.
+        """
+        cutoff = time.time() - min_age
+        swept = []
+        for digest in os.listdir(self.root):
+            if not is_digest(digest) or digest in referenced:
+                continue
+            try:
+                if os.path.getmtime(self.directory(digest)) > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            if not dry_run:
+                self.remove(digest)
+            swept.append(digest)
+        return swept
+
+    def remove(self, digest: str):
+        """Delete a digest's files (see sweep: only once no user references it)."""
+        directory = self.directory(digest)
+        if not os.path.isdir(directory):
+            return
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+avatar_store = AvatarStore()
@@ -0,0 +1,40 @@
+"""
+Conditional GETs for per-user reads (vault listing, search, health, profile).
+
+Every vault or profile write advances ``users.vault_revision`` in its own
+transaction (User.bump_revision). ``revalidated`` views answer with a weak ETag
+built from the user id and that revision; a client that sends it back in
+If-None-Match gets a 304 after a single primary-key lookup, before the view
+loads or decrypts anything.
+
+The revision is read from the database rather than from the cached user row, so
+a write handled by another worker is seen immediately. It is read before the view
+runs: a write landing in between only makes the ETag older than the body, which
+costs the client one extra full response, never a stale 304.
+"""
+from functools import wraps
+from flask import current_app, make_response, request
+from flask_login import current_user
+from .model import User
+
+
+def revision_etag(user_id: int, revision: int) -> str:
+    return f"u{user_id}-r{revision}"
+
+
+def revalidated(view):
+    """Add a revision ETag to a per-user GET view and short-circuit matching requests with 304."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = revision_etag(current_user.user_id, User.revision_of(current_user.user_id))
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag, weak=True)
+        # Per-user data: never shared, always revalidated
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
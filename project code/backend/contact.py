@@ -2,9 +2,9 @@ import re
 import os
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from flask_login import current_user
-from flask_mail import Message
-from . import mail, csrf, limiter
+from . import db, csrf, limiter
 from .validation import validate_contact
+from . import outbox
 
 
 contact_bp = Blueprint('contact', __name__, url_prefix='/contact')
@@ -26,7 +26,7 @@ def contact_send():
     - Sanitizes & validates via validate_contact().
     - If logged in, uses current_user.username/email.
     - Otherwise uses supplied name/email.
-    - Sends support email + auto-reply.
+    - Queues support email + auto-reply in the outbox; delivery happens in the background.
     """
     data = request.get_json() or {}
     form_name    = data.get('name', '').strip()
@@ -61,17 +61,16 @@ def contact_send():
     full_body = "\n".join(body_lines)
 
     try:
-        # Send to support team
-        support_msg = Message(
+        # Support team copy
+        outbox.enqueue(
             subject=f"Support request from {user_name}",
             sender=current_app.config['MAIL_USERNAME'],
             recipients=[current_app.config['MAIL_USERNAME']],
             body=full_body
         )
-        mail.send(support_msg)
 
         # Auto-reply to user
-        auto_reply = Message(
+        outbox.enqueue(
             subject="We've received your message",
             sender=current_app.config['MAIL_USERNAME'],
             recipients=[user_email],
@@ -81,11 +80,13 @@ def contact_send():
                 "— The Support Team"
             )
         )
-        mail.send(auto_reply)
+        db.session.commit()
+        outbox.notify()
         return jsonify({
             'message': f"✅ {user_name}, your message has been sent! We'll be in touch shortly."
         }), 200
 
     except Exception as e:
+        db.session.rollback()
         current_app.logger.error("Contact form error: %s", e)
         return jsonify({'error': 'Failed to send message.'}), 500
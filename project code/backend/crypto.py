@@ -1,46 +1,247 @@
 import os
+import json
+import threading
 import base64
+import functools
+import hashlib
+import hmac
 from dotenv import load_dotenv
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from .metrics import count_crypto
 
 # Load environment variables from .env (if present)
 load_dotenv()
 
-# Load and validate encryption key
-_key_b64 = os.getenv('DUNKEY_AES_KEY')
-if not _key_b64:
-    raise RuntimeError(
-        "Environment variable DUNKEY_AES_KEY is not set. "
-        "Please define it in your .env or environment."
-    )
+# --- Keyring ---
+# DUNKEY_AES_KEY is the primary key, with id DUNKEY_AES_KEY_ID (default 1).
+# DUNKEY_AES_KEYS adds more keys as "id:base64,id:base64" (e.g. retired keys
+# that existing ciphertexts still use, or a new key not yet active).
+# New ciphertexts use DUNKEY_AES_ACTIVE_KEY_ID (default: the primary key's id)
+# and carry that id, so data from every key in the ring stays readable while
+# rotate_keys.py re-encrypts it. Rotation runs in two deploys: add the new key
+# to the ring everywhere, then make it active and run the job.
+# Ciphertexts written before key ids existed belong to LEGACY_KEY_ID.
+LEGACY_KEY_ID = 1
 
-try:
-    ENCRYPTION_KEY = base64.b64decode(_key_b64)
-except Exception as e:
-    raise RuntimeError(f"Failed to base64-decode DUNKEY_AES_KEY: {e}")
+
+def _decode_key(key_b64: str, name: str) -> bytes:
+    try:
+        key = base64.b64decode(key_b64)
+    except Exception as e:
+        raise RuntimeError(f"Failed to base64-decode {name}: {e}")
+    if len(key) not in (16, 24, 32):
+        raise RuntimeError(f"{name} must decode to a 16, 24 or 32-byte AES key.")
+    return key
+
+
+def _load_keyring():
+    key_b64 = os.getenv('DUNKEY_AES_KEY')
+    if not key_b64:
+        raise RuntimeError(
+            "Environment variable DUNKEY_AES_KEY is not set. "
+            "Please define it in your .env or environment."
+        )
+    primary_id = int(os.getenv('DUNKEY_AES_KEY_ID', LEGACY_KEY_ID))
+    keys = {primary_id: _decode_key(key_b64, 'DUNKEY_AES_KEY')}
+
+    for item in os.getenv('DUNKEY_AES_KEYS', '').split(','):
+        if not item.strip():
+            continue
+        key_id, _, extra_b64 = item.strip().partition(':')
+        keys[int(key_id)] = _decode_key(extra_b64, f'DUNKEY_AES_KEYS entry {key_id}')
+
+    active_id = int(os.getenv('DUNKEY_AES_ACTIVE_KEY_ID', primary_id))
+    # Search tokens and fingerprints are keyed with the index key; never switch it implicitly
+    index_id = int(os.getenv('DUNKEY_INDEX_KEY_ID', LEGACY_KEY_ID))
+    for key_id in keys:
+        if not 0 < key_id < 256:
+            raise RuntimeError(f"Key id {key_id} is out of range (1-255).")
+    for name, key_id in (('DUNKEY_AES_ACTIVE_KEY_ID', active_id), ('DUNKEY_INDEX_KEY_ID', index_id)):
+        if key_id not in keys:
+            raise RuntimeError(f"{name}={key_id} does not name a key in the keyring.")
+    return keys, active_id, index_id
+
+
+_keyring = None
+_keyring_lock = threading.Lock()
+
+
+def keyring():
+    """(keys by id, active key id, index key id), read from the environment on first use."""
+    global _keyring
+    if _keyring is None:
+        with _keyring_lock:
+            if _keyring is None:
+                _keyring = _load_keyring()
+    return _keyring
+
+
+def __getattr__(name):
+    # KEYRING, ACTIVE_KEY_ID, INDEX_KEY_ID and ENCRYPTION_KEY resolve lazily, so
+    # importing the models does not require (or read) the keys
+    keys, active_id, index_id = keyring()
+    values = {'KEYRING': keys, 'ACTIVE_KEY_ID': active_id, 'INDEX_KEY_ID': index_id,
+              'ENCRYPTION_KEY': keys[active_id]}
+    if name not in values:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return values[name]
 
 # AES block size (16 bytes)
 BLOCK_SIZE = AES.block_size
 
+# encrypt_master output: "K" | key id (1 byte) | IV | ciphertext. The two header
+# bytes make the length 2 mod BLOCK_SIZE, which a headerless legacy blob
+# (IV + ciphertext, always a whole number of blocks) can never be.
+_MASTER_MARKER = b'K'
+
+
+def master_key_id(ciphertext: bytes) -> int:
+    """Id of the key an encrypt_master ciphertext was written with."""
+    if len(ciphertext) % BLOCK_SIZE == 2 and ciphertext[:1] == _MASTER_MARKER:
+        return ciphertext[1]
+    return LEGACY_KEY_ID
+
+
+def _keyring_key(key_id: int) -> bytes:
+    try:
+        return keyring()[0][key_id]
+    except KeyError:
+        raise ValueError(f"Key {key_id} is not in the keyring.") from None
+
+
 def encrypt_master(plaintext: str) -> bytes:
     """
-    Encrypts plaintext with AES-CBC using the ENV key.
-    Returns IV + ciphertext bytes.
+    Encrypts plaintext with AES-CBC using the active key.
+    Returns a key-id header + IV + ciphertext bytes.
     """
+    data = plaintext.encode('utf-8')
+    count_crypto('encrypt_master', len(data))
     iv = os.urandom(BLOCK_SIZE)
-    cipher = AES.new(ENCRYPTION_KEY, AES.MODE_CBC, iv)
-    ct = cipher.encrypt(pad(plaintext.encode('utf-8'), BLOCK_SIZE))
-    return iv + ct
+    keys, active_id, _ = keyring()
+    cipher = AES.new(keys[active_id], AES.MODE_CBC, iv)
+    ct = cipher.encrypt(pad(data, BLOCK_SIZE))
+    return _MASTER_MARKER + bytes([active_id]) + iv + ct
 
 def decrypt_master(ciphertext: bytes) -> str:
     """
-    Decrypts data produced by encrypt_master.
-    Expects IV (first BLOCK_SIZE bytes) + ciphertext.
+    Decrypts data produced by encrypt_master, with or without the key-id header.
     Returns the original plaintext string.
     """
+    key_id = master_key_id(ciphertext)
+    if len(ciphertext) % BLOCK_SIZE == 2:
+        ciphertext = ciphertext[2:]
     iv = ciphertext[:BLOCK_SIZE]
     ct = ciphertext[BLOCK_SIZE:]
-    cipher = AES.new(ENCRYPTION_KEY, AES.MODE_CBC, iv)
+    cipher = AES.new(_keyring_key(key_id), AES.MODE_CBC, iv)
     pt = unpad(cipher.decrypt(ct), BLOCK_SIZE)
+    count_crypto('decrypt_master', len(pt))
     return pt.decode('utf-8')
+
+def _derive(key: bytes, label: str) -> bytes:
+    return hmac.new(key, label.encode('utf-8'), hashlib.sha256).digest()
+
+@functools.lru_cache(maxsize=None)
+def derive_key(label: str) -> bytes:
+    """
+    Derives a purpose-specific 32-byte subkey from the index key (DUNKEY_INDEX_KEY_ID)
+    using HMAC-SHA256, so keyed indexes never reuse an encryption key directly.
+    The index key stays fixed across record-key rotations; changing it means
+    rebuilding the search index and fingerprints (backfill_vault.py).
+    """
+    keys, _, index_id = keyring()
+    return _derive(keys[index_id], label)
+
+
+# --- Versioned record envelopes ---
+# A record packs several string fields into one authenticated envelope:
+#   version (1 byte) | key id (1 byte) | nonce (12 bytes) | tag (16 bytes) | ciphertext
+# The ciphertext and tag are AES-GCM under a subkey derived from the record's
+# keyring key, with version and key id as associated data. Sealing uses
+# cryptography's AESGCM (OpenSSL): one key object per key id is reused for every
+# record, where PyCryptodome's MODE_GCM rebuilds its GHASH tables per record.
+# Version 1 is the legacy layout (one AES-CBC blob per column, see encrypt_master),
+# which is stored in separate columns and has no envelope.
+RECORD_VERSION_CBC = 1
+RECORD_VERSION_GCM = 3
+NONCE_SIZE = 12
+TAG_SIZE = 16
+_HEADER_SIZE = 2 + NONCE_SIZE
+
+_record_keys = {}
+
+
+def _record_key(key_id: int) -> bytes:
+    """GCM key for records sealed under keyring key ``key_id``."""
+    return _record_aead(key_id)[0]
+
+
+def _record_aead(key_id: int):
+    """(GCM key, reusable AESGCM object) for keyring key ``key_id``."""
+    entry = _record_keys.get(key_id)
+    if entry is None:
+        key = _derive(_keyring_key(key_id), 'dunkey-record-encryption')
+        entry = _record_keys[key_id] = (key, AESGCM(key))
+    return entry
+
+
+def record_key_id(envelope: bytes) -> int:
+    """Id of the key a sealed record was written with."""
+    if envelope[0] != RECORD_VERSION_GCM:
+        raise ValueError(f"Unsupported record version: {envelope[0]}")
+    return envelope[1]
+
+
+def encrypt_many(records: list) -> list:
+    """
+    Seals each record (a sequence of strings) into a versioned envelope under the
+    active key. Nonces for the whole batch come from a single os.urandom call.
+    """
+    random_bytes = os.urandom(NONCE_SIZE * len(records))
+    plaintexts = [json.dumps(list(fields), separators=(',', ':')).encode('utf-8') for fields in records]
+    count_crypto('encrypt_record', sum(map(len, plaintexts)), calls=len(records))
+
+    active_id = keyring()[1]
+    aead = _record_aead(active_id)[1]
+    prefix = bytes([RECORD_VERSION_GCM, active_id])
+    sealed = []
+    for i, plaintext in enumerate(plaintexts):
+        nonce = random_bytes[i * NONCE_SIZE:(i + 1) * NONCE_SIZE]
+        # AESGCM returns ciphertext || tag; the envelope stores the tag first
+        out = aead.encrypt(nonce, plaintext, prefix)
+        sealed.append(prefix + nonce + out[-TAG_SIZE:] + out[:-TAG_SIZE])
+    return sealed
+
+
+def decrypt_many(envelopes: list) -> list:
+    """
+    Opens envelopes produced by encrypt_many (under any key in the keyring) and
+    returns their fields as tuples. Raises ValueError for unknown versions or keys,
+    or failed authentication.
+    """
+    results = []
+    total = 0
+    for envelope in envelopes:
+        aead = _record_aead(record_key_id(envelope))[1]
+        try:
+            plaintext = aead.decrypt(envelope[2:_HEADER_SIZE],
+                                     envelope[_HEADER_SIZE + TAG_SIZE:] + envelope[_HEADER_SIZE:_HEADER_SIZE + TAG_SIZE],
+                                     envelope[:2])
+        except InvalidTag:
+            raise ValueError("Record authentication failed.") from None
+        total += len(plaintext)
+        results.append(tuple(json.loads(plaintext.decode('utf-8'))))
+    count_crypto('decrypt_record', total, calls=len(envelopes))
+    return results
+
+
+def seal_record(fields) -> bytes:
+    """Seals a single record. See encrypt_many."""
+    return encrypt_many([fields])[0]
+
+
+def open_record(envelope: bytes) -> tuple:
+    """Opens a single record. See decrypt_many."""
+    return decrypt_many([envelope])[0]
@@ -0,0 +1,96 @@
+"""
+Named database engine profiles.
+
+DUNKEY_DB_PROFILE picks one of PROFILES; individual pool settings can then be
+overridden with DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_TIMEOUT
+and DB_POOL_PRE_PING. Size the pool so that
+  web processes * (pool_size + max_overflow) <= MySQL max_connections,
+using the numbers from /internal/pool to see how much of it is actually used.
+"""
+import os
+from .pool_stats import InstrumentedQueuePool
+
+DEFAULT_PROFILE = 'mysql'
+
+PROFILES = {
+    # Local development without a MySQL server: a SQLite file in the instance folder
+    'dev-sqlite': {
+        'sqlite_file': 'dunkey_dev.db',
+        'engine': {
+            'pool_size': 5,
+            'max_overflow': 5,
+            'pool_timeout': 30,
+        },
+    },
+    # A single web node talking to one MySQL server
+    'mysql': {
+        'engine': {
+            'pool_size': 5,
+            'max_overflow': 10,
+            'pool_timeout': 30,
+            'pool_recycle': 1800,   # below MySQL's default wait_timeout (8h) and typical proxy idle limits
+            'pool_pre_ping': True,
+        },
+    },
+    # Many threads per process: bigger pool, fail fast instead of queueing for long,
+    # LIFO so idle connections beyond the working set age out and get recycled
+    'high-concurrency': {
+        'engine': {
+            'pool_size': 20,
+            'max_overflow': 30,
+            'pool_timeout': 10,
+            'pool_recycle': 280,
+            'pool_pre_ping': True,
+            'pool_use_lifo': True,
+        },
+    },
+}
+
+# Environment variable -> (engine option, parser)
+_ENV_OVERRIDES = {
+    'DB_POOL_SIZE': ('pool_size', int),
+    'DB_MAX_OVERFLOW': ('max_overflow', int),
+    'DB_POOL_RECYCLE': ('pool_recycle', int),
+    'DB_POOL_TIMEOUT': ('pool_timeout', float),
+    'DB_POOL_PRE_PING': ('pool_pre_ping', lambda v: v.lower() in ('true', '1')),
+}
+
+# Options only meaningful for QueuePool
+_QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_use_lifo', 'poolclass')
+
+
+def profile_name() -> str:
+    name = os.environ.get('DUNKEY_DB_PROFILE', DEFAULT_PROFILE)
+    if name not in PROFILES:
+        raise ValueError(f"Unknown DUNKEY_DB_PROFILE {name!r}; expected one of {', '.join(PROFILES)}")
+    return name
+
+
+def database_uri(name: str, instance_path: str):
+    """URI the profile pins, or None to use the DB_* MySQL settings."""
+    sqlite_file = PROFILES[name].get('sqlite_file')
+    if sqlite_file is None:
+        return None
+    os.makedirs(instance_path, exist_ok=True)
+    return f"sqlite:///{os.path.join(instance_path, sqlite_file)}"
+
+
+def _is_memory_sqlite(uri: str) -> bool:
+    return uri.startswith('sqlite') and (uri.rstrip('/') in ('sqlite:', 'sqlite') or ':memory:' in uri)
+
+
+def engine_options(name: str, uri: str) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for a profile, with env overrides applied."""
+    options = dict(PROFILES[name]['engine'])
+    for var, (option, parse) in _ENV_OVERRIDES.items():
+        value = os.environ.get(var)
+        if value not in (None, ''):
+            options[option] = parse(value)
+
+    if _is_memory_sqlite(uri):
+        # In-memory SQLite gets a single static connection from Flask-SQLAlchemy
+        for option in _QUEUE_POOL_OPTIONS:
+            options.pop(option, None)
+    else:
+        options['poolclass'] = InstrumentedQueuePool
+    return options
@@ -0,0 +1,136 @@
+"""
+Login password hashing service.
+
+One hash policy for the whole app: bcrypt with BCRYPT_LOG_ROUNDS rounds. Hashes
+in any other format (werkzeug's scrypt/pbkdf2 from older registrations) or with
+fewer rounds still verify, and are replaced on the next successful login.
+
+The slow hash work runs on a bounded process pool, so a burst of logins cannot
+starve the request workers. When more than HASH_POOL_MAX_PENDING jobs are
+queued, calls fail fast with HashingBusy, which the app turns into a 503; so do
+calls still waiting after HASH_POOL_TIMEOUT seconds.
+Set HASH_POOL_WORKERS=0 to hash inline on the request thread.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt
+from flask import jsonify
+
+
+class HashingBusy(Exception):
+    """The hashing queue is full; the caller should retry later."""
+
+
+# --- Work functions (module level so the process pool can pickle them) ---
+
+def _is_policy_hash(stored: str) -> bool:
+    return stored.startswith(('$2b$', '$2a$', '$2y$'))
+
+
+def _bcrypt_rounds(stored: str) -> int:
+    return int(stored.split('$')[2])
+
+
+def _hash(raw: str, rounds: int) -> str:
+    return bcrypt.hashpw(raw.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _verify(stored: str, raw: str) -> bool:
+    if not stored:
+        return False
+    if _is_policy_hash(stored):
+        return bcrypt.checkpw(raw.encode('utf-8'), stored.encode('utf-8'))
+    # Legacy werkzeug formats ("scrypt:...", "pbkdf2:sha256:...")
+    from werkzeug.security import check_password_hash
+    return check_password_hash(stored, raw)
+
+
+def _verify_and_rehash(stored: str, raw: str, rounds: int):
+    """Verify, and if the hash is outdated return a new policy hash as well."""
+    if not _verify(stored, raw):
+        return False, None
+    if _is_policy_hash(stored) and _bcrypt_rounds(stored) >= rounds:
+        return True, None
+    return True, _hash(raw, rounds)
+
+
+class HashingService:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self.workers = 0
+        self.max_pending = 0
+        self.rounds = 12
+        self.timeout = 30.0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def init_app(self, app):
+        self.shutdown()
+        self.workers = int(app.config.get('HASH_POOL_WORKERS', 0))
+        self.max_pending = int(app.config.get('HASH_POOL_MAX_PENDING', 0)) or self.workers * 8
+        self.rounds = int(app.config.get('BCRYPT_LOG_ROUNDS', 12))
+        self.timeout = float(app.config.get('HASH_POOL_TIMEOUT', 30))
+        self._slots = threading.BoundedSemaphore(self.max_pending) if self.workers else None
+
+        app.register_error_handler(HashingBusy, _busy_response)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a threaded web worker is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingBusy()
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Still queued behind a saturated pool: drop it (if not started) and shed the load
+            future.cancel()
+            self.timed_out += 1
+            raise HashingBusy() from None
+
+    def hash(self, raw: str) -> str:
+        return self._run(_hash, raw, self.rounds)
+
+    def verify(self, stored: str, raw: str) -> bool:
+        return self._run(_verify, stored, raw)
+
+    def verify_and_update(self, stored: str, raw: str):
+        """
+        Returns ``(ok, new_hash)``; ``new_hash`` is set when the password was correct
+        but stored under an outdated format or cost, and should be saved.
+        """
+        return self._run(_verify_and_rehash, stored, raw, self.rounds)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _busy_response(e):
+    response = jsonify(success=False, message='Server is busy, please try again.')
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+hashing = HashingService()
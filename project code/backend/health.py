@@ -0,0 +1,63 @@
+"""
+Vault health engine.
+
+Findings are collected in one streaming pass: every entry is reduced to its id,
+a stored strength class and two hashable keys (username and password), and
+grouped in hash maps. Work and memory are linear in the number of entries, and
+the engine never needs plaintext passwords when keyed fingerprints are
+supplied as the keys.
+"""
+from collections import defaultdict
+
+
+class VaultHealth:
+    """Accumulates health findings for one vault."""
+
+    def __init__(self):
+        self.total = 0
+        self.weak = []
+        self.username_equals_password = []
+        self._by_password = defaultdict(list)
+        self._by_username = defaultdict(list)
+
+    def add(self, entry_id, username_key, password_key, strength: str):
+        """
+        Record one entry. ``username_key``/``password_key`` must be produced by the
+        same function, so that equal keys mean equal values.
+        """
+        self.total += 1
+        if strength == 'weak':
+            self.weak.append(entry_id)
+        if username_key == password_key:
+            self.username_equals_password.append(entry_id)
+        self._by_password[password_key].append(entry_id)
+        self._by_username[username_key].append(entry_id)
+
+    @staticmethod
+    def _duplicates(groups) -> list:
+        return [ids for ids in groups.values() if len(ids) > 1]
+
+    def flagged_ids(self) -> set:
+        """Ids of every entry with at least one finding."""
+        flagged = set(self.weak) | set(self.username_equals_password)
+        for ids in self._duplicates(self._by_password) + self._duplicates(self._by_username):
+            flagged.update(ids)
+        return flagged
+
+    def report(self) -> dict:
+        reused = self._duplicates(self._by_password)
+        duplicate_usernames = self._duplicates(self._by_username)
+        return {
+            'total': self.total,
+            'summary': {
+                'weak': len(self.weak),
+                'reused': sum(len(ids) for ids in reused),
+                'username_equals_password': len(self.username_equals_password),
+                'duplicate_username': sum(len(ids) for ids in duplicate_usernames),
+                'flagged': len(self.flagged_ids()),
+            },
+            'weak': self.weak,
+            'reused': reused,
+            'username_equals_password': self.username_equals_password,
+            'duplicate_username': duplicate_usernames,
+        }
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify, current_app, request, abort
+from . import pool_stats
+
+
+internal_bp = Blueprint('internal', __name__, url_prefix='/internal')
+
+
+@internal_bp.before_request
+def local_only():
+    """Operational endpoints are only served to INTERNAL_ALLOWED_ADDRS (loopback by default)."""
+    if request.remote_addr not in current_app.config['INTERNAL_ALLOWED_ADDRS']:
+        abort(404)
+
+
+@internal_bp.route('/pool', methods=['GET'])
+def pool_status():
+    """Connection pool counters for every engine, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW."""
+    return jsonify(
+        profile=current_app.config['DB_PROFILE'],
+        engine_options={
+            key: (value.__name__ if isinstance(value, type) else value)
+            for key, value in current_app.config['SQLALCHEMY_ENGINE_OPTIONS'].items()
+        },
+        engines=pool_stats.report(current_app)
+    ), 200
@@ -1,13 +1,23 @@
+import atexit
+import json
 import logging
+import math
 import os
-from logging.handlers import TimedRotatingFileHandler
-from flask import request, jsonify
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from flask import request, jsonify, g, has_request_context
 from flask_limiter.errors import RateLimitExceeded
 
 # Create logs directory if it doesn't exist
 log_dir = "logs"
 os.makedirs(log_dir, exist_ok=True)
 
+DEFAULT_QUEUE_SIZE = 10000
+
 # Configure logger
 logger = logging.getLogger('vault_app')
 logger.setLevel(logging.INFO)
@@ -20,48 +30,191 @@ file_handler = TimedRotatingFileHandler(
     encoding="utf-8"
 )
 
-formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per line with fixed fields:
+    ts, level, event, user, ip, endpoint, duration_ms, message (+ details, sample_rate, exc).
+    Records that did not come from a log_* helper get event="log".
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'event': getattr(record, 'event', 'log'),
+            'user': getattr(record, 'user', None),
+            'ip': getattr(record, 'ip', None),
+            'endpoint': getattr(record, 'endpoint', None),
+            'duration_ms': getattr(record, 'duration_ms', None),
+            'message': record.getMessage(),
+        }
+        details = getattr(record, 'details', None)
+        if details:
+            data['details'] = details
+        sample_rate = getattr(record, 'sample_rate', None)
+        if sample_rate is not None:
+            data['sample_rate'] = sample_rate
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without blocking. When the queue is
+    full the record is dropped and counted instead of stalling the request.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.enqueued = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread; records never leave the process
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+        else:
+            with self._lock:
+                self.enqueued += 1
+
+
+file_handler.setFormatter(JsonLinesFormatter())
+queue_handler = DroppingQueueHandler(queue.Queue(DEFAULT_QUEUE_SIZE))
+logger.addHandler(queue_handler)
+
+_listener = None
+_listener_lock = threading.Lock()
+_sample_rates = {}
+
+
+def parse_sample_rates(raw: str) -> dict:
+    """'login_success=0.1,vault_entry_edit=0.5' -> {'login_success': 0.1, 'vault_entry_edit': 0.5}"""
+    rates = {}
+    for item in (raw or '').split(','):
+        if '=' in item:
+            event, rate = item.split('=', 1)
+            rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def start_listener(queue_size: int = DEFAULT_QUEUE_SIZE):
+    """Start the background writer (idempotent)."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        if queue_handler.queue.maxsize != queue_size and queue_handler.queue.empty():
+            queue_handler.queue = queue.Queue(queue_size)
+        _listener = QueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_listener)
+
+
+def stop_listener():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def logging_stats() -> dict:
+    return {
+        'enqueued': queue_handler.enqueued,
+        'dropped': queue_handler.dropped,
+        'queued': queue_handler.queue.qsize(),
+        'capacity': queue_handler.queue.maxsize,
+    }
+
+
+def _mark_request_start():
+    g._log_request_start = time.perf_counter()
+
 
 def init_logging(app):
-    """Attach rate limit logging to Flask app."""
-    app.logger.handlers.extend(logger.handlers)
+    """Start the queued JSON log writer and attach rate limit logging to the Flask app."""
+    global _sample_rates
+    _sample_rates = parse_sample_rates(app.config.get('LOG_SAMPLE_RATES', ''))
+    start_listener(int(app.config.get('LOG_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)))
+
+    if queue_handler not in app.logger.handlers:
+        app.logger.handlers.append(queue_handler)
+    app.before_request(_mark_request_start)
 
     @app.errorhandler(RateLimitExceeded)
     def rate_limit_handler(e):
-        app.logger.warning(
-            "RATE LIMIT EXCEEDED at endpoint=%s from IP=%s",
-            request.path,
-            request.remote_addr
-        )
-        return jsonify(error="Too many requests"), 429
-
-# Manual Logging Methods 
+        from . import limiter
+        _event(logging.WARNING, 'rate_limited', None, "Rate limit exceeded")
+        # Tell clients when the window frees up, so they can retry instead of failing
+        current = limiter.current_limit
+        retry_after = max(1, math.ceil(current.reset_at - time.time())) if current else 60
+        return jsonify(error="Too many requests"), 429, {'Retry-After': str(retry_after)}
+
+
+def _event(level: int, event: str, user, message: str, **details):
+    """Emit one structured record; request fields are captured here, on the request thread."""
+    if not logger.isEnabledFor(level):
+        return
+    rate = _sample_rates.get(event)
+    if rate is not None and random.random() >= rate:
+        return
+
+    extra = {'event': event, 'user': user, 'details': details or None, 'sample_rate': rate}
+    if has_request_context():
+        extra['ip'] = request.remote_addr
+        extra['endpoint'] = request.endpoint
+        start = g.get('_log_request_start')
+        if start is not None:
+            extra['duration_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    logger.log(level, message, extra=extra)
+
+# Manual Logging Methods
 
 def log_login_failed(identifier: str):
-    logger.warning(f"LOGIN FAILED for identifier='{identifier}' from IP={request.remote_addr}")
+    _event(logging.WARNING, 'login_failed', identifier, "Login failed")
 
 def log_login_success(username: str):
-    logger.info(f"User '{username}' successfully logged in.")
+    _event(logging.INFO, 'login_success', username, "User logged in")
 
 def log_register(username: str, email: str):
-    logger.info(f"New user registered. Username: '{username}', Email: '{email}'.")
+    _event(logging.INFO, 'register', username, "New user registered", email=email)
 
 def log_update_credentials(username: str):
-    logger.info(f"User '{username}' updated their credentials.")
+    _event(logging.INFO, 'update_credentials', username, "User updated their credentials")
 
 def log_update_password(username: str):
-    logger.info(f"User '{username}' changed their password.")
+    _event(logging.INFO, 'update_password', username, "User changed their password")
 
 def log_update_email(username: str, old_email: str, new_email: str):
-    logger.info(f"User '{username}' changed email from '{old_email}' to '{new_email}'.")
+    _event(logging.INFO, 'update_email', username, "User changed their email",
+           old_email=old_email, new_email=new_email)
 
 def log_vault_entry_create(username: str, entry_website: str):
-    logger.info(f"User '{username}' created a vault entry websiteed '{entry_website}'.")
+    _event(logging.INFO, 'vault_entry_create', username, "Vault entry created", website=entry_website)
 
 def log_vault_entry_edit(username: str, entry_website: str):
-    logger.info(f"User '{username}' edited a vault entry websiteed '{entry_website}'.")
+    _event(logging.INFO, 'vault_entry_edit', username, "Vault entry edited", website=entry_website)
 
 def log_vault_entry_delete(username: str, entry_website: str):
-    logger.info(f"User '{username}' deleted a vault entry websiteed '{entry_website}'.")
+    _event(logging.INFO, 'vault_entry_delete', username, "Vault entry deleted", website=entry_website)
+
+def log_vault_import(username: str, imported: int, skipped: int):
+    _event(logging.INFO, 'vault_import', username, "Vault entries imported",
+           imported=imported, skipped=skipped)
+
+def log_vault_batch(username: str, created: int, updated: int, deleted: int):
+    _event(logging.INFO, 'vault_batch', username, "Vault batch applied",
+           created=created, updated=updated, deleted=deleted)
+
+def log_vault_export(username: str, export_format: str):
+    _event(logging.INFO, 'vault_export', username, "Vault exported", format=export_format)
@@ -0,0 +1,77 @@
+"""
+Adaptive throttle for failed logins, checked before any password hash is computed.
+
+Failures are counted per username and per client IP in the rate-limit storage
+(RATELIMIT_STORAGE_URI, shared between worker processes), even when the route
+limits themselves are disabled. Past a free allowance, each further failure
+blocks that username/IP for an exponentially growing delay, capped at
+LOGIN_THROTTLE_MAX_DELAY. A block is a single storage key whose expiry is the
+end of the block, so checking it costs two key lookups. A successful login
+clears the username's counters.
+"""
+import time
+from limits.storage import storage_from_string
+
+
+class LoginThrottle:
+    def __init__(self):
+        self.enabled = True
+        self.window = 900            # seconds a failure is remembered
+        self.free_user = 5           # failures per username before blocking
+        self.free_ip = 20            # per IP (higher: many users can share one NAT address)
+        self.base_delay = 1.0
+        self.max_delay = 900.0
+        self.blocked = 0
+        self.storage = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get('LOGIN_THROTTLE_ENABLED', True)
+        self.window = int(app.config.get('LOGIN_THROTTLE_WINDOW', 900))
+        self.free_user = int(app.config.get('LOGIN_THROTTLE_FREE_USER', 5))
+        self.free_ip = int(app.config.get('LOGIN_THROTTLE_FREE_IP', 20))
+        self.base_delay = float(app.config.get('LOGIN_THROTTLE_BASE_DELAY', 1.0))
+        self.max_delay = float(app.config.get('LOGIN_THROTTLE_MAX_DELAY', 900.0))
+        self.storage = storage_from_string(app.config.get('RATELIMIT_STORAGE_URI') or 'memory://')
+
+    @staticmethod
+    def _subjects(username: str, ip: str):
+        return (('user', (username or '').lower()), ('ip', ip or '-'))
+
+    def retry_after(self, username: str, ip: str) -> int:
+        """Seconds the caller must wait before another attempt (0 when allowed)."""
+        if not self.enabled:
+            return 0
+        storage = self.storage
+        now = time.time()
+        wait = 0.0
+        for kind, subject in self._subjects(username, ip):
+            key = f"login-block/{kind}/{subject}"
+            if storage.get(key):
+                wait = max(wait, storage.get_expiry(key) - now)
+        if wait > 0:
+            self.blocked += 1
+        return int(wait + 0.999) if wait > 0 else 0
+
+    def record_failure(self, username: str, ip: str):
+        if not self.enabled:
+            return
+        storage = self.storage
+        for kind, subject in self._subjects(username, ip):
+            failures = storage.incr(f"login-fail/{kind}/{subject}", self.window)
+            free = self.free_user if kind == 'user' else self.free_ip
+            if failures > free:
+                delay = min(self.base_delay * 2 ** (failures - free - 1), self.max_delay)
+                block_key = f"login-block/{kind}/{subject}"
+                storage.clear(block_key)
+                storage.incr(block_key, delay)
+
+    def record_success(self, username: str):
+        if not self.enabled:
+            return
+        storage = self.storage
+        subject = (username or '').lower()
+        storage.clear(f"login-fail/user/{subject}")
+        storage.clear(f"login-block/user/{subject}")
+
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,278 @@
+"""
+In-process metrics in the Prometheus text format, served on GET /metrics.
+
+Request latency is recorded per blueprint and endpoint from before/after
+request hooks; SQL statements are counted and timed with engine cursor events
+and summed per request; crypto.py counts its own calls and bytes; 429 responses
+count rate-limit rejections. Cache, hash pool and connection pool figures are
+read from their owners at scrape time.
+
+Recording is a dict lookup, a bisect and a couple of additions under a lock, so
+it stays on in production. Counts are per process: scrape each worker, or run a
+single process per metrics target.
+"""
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, g, has_request_context, request, abort
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        names = self.labels + ('le',)
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, label_values + (bound,))} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Collected:
+    """Values read from a callback at scrape time; the callback returns {label values: value}."""
+
+    def __init__(self, name: str, help_text: str, kind: str, labels, collect):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+# --- Metrics ---
+
+http_request_duration = Histogram(
+    'dunkey_http_request_duration_seconds', 'Request latency by blueprint and endpoint.',
+    labels=('blueprint', 'endpoint'))
+http_requests = Counter(
+    'dunkey_http_requests_total', 'Requests by blueprint, endpoint and status code.',
+    labels=('blueprint', 'endpoint', 'status'))
+rate_limited = Counter(
+    'dunkey_rate_limited_total', 'Requests rejected by the rate limiter (HTTP 429).',
+    labels=('blueprint', 'endpoint'))
+sql_queries_per_request = Histogram(
+    'dunkey_sql_queries_per_request', 'SQL statements executed per request.',
+    labels=('blueprint',), buckets=QUERY_COUNT_BUCKETS)
+sql_time_per_request = Histogram(
+    'dunkey_sql_seconds_per_request', 'Time spent in SQL statements per request.',
+    labels=('blueprint',))
+sql_queries = Counter('dunkey_sql_queries_total', 'SQL statements executed.')
+sql_seconds = Counter('dunkey_sql_seconds_total', 'Time spent executing SQL statements.')
+crypto_calls = Counter(
+    'dunkey_crypto_calls_total', 'Encryption and decryption calls by operation.', labels=('operation',))
+crypto_bytes = Counter(
+    'dunkey_crypto_bytes_total', 'Plaintext bytes encrypted or decrypted by operation.', labels=('operation',))
+
+REGISTRY = [
+    http_request_duration, http_requests, rate_limited,
+    sql_queries_per_request, sql_time_per_request, sql_queries, sql_seconds,
+    crypto_calls, crypto_bytes,
+]
+
+
+def count_crypto(operation: str, n_bytes: int, calls: int = 1):
+    crypto_calls.inc(operation, amount=calls)
+    crypto_bytes.inc(operation, amount=n_bytes)
+
+
+# --- Hooks ---
+
+def _start_timer():
+    g._metrics_start = time.perf_counter()
+    g._metrics_sql = [0, 0.0]
+
+
+def _record_request(response):
+    blueprint = request.blueprint or 'app'
+    endpoint = request.endpoint or 'unmatched'
+    # The limiter rejects in its own before_request hook, possibly before ours ran
+    if response.status_code == 429:
+        rate_limited.inc(blueprint, endpoint)
+
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return response
+    http_request_duration.observe(time.perf_counter() - start, blueprint, endpoint)
+    http_requests.inc(blueprint, endpoint, response.status_code)
+
+    queries, seconds = g.pop('_metrics_sql', (0, 0.0))
+    sql_queries_per_request.observe(queries, blueprint)
+    sql_time_per_request.observe(seconds, blueprint)
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    sql_queries.inc()
+    sql_seconds.inc(amount=elapsed)
+    if has_request_context():
+        per_request = g.get('_metrics_sql')
+        if per_request is not None:
+            per_request[0] += 1
+            per_request[1] += elapsed
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    starts = connection.info.get('_metrics_query_start') if connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_endpoint():
+    if request.remote_addr not in current_app.config['INTERNAL_ALLOWED_ADDRS']:
+        abort(404)
+    return render(), 200, {'Content-Type': CONTENT_TYPE}
+
+
+def register(name: str, help_text: str, kind: str, labels, collect):
+    """Add a scrape-time metric whose values are owned by another module."""
+    if any(metric.name == name for metric in REGISTRY):
+        return
+    REGISTRY.append(Collected(name, help_text, kind, labels, collect))
+
+
+def _register_collected():
+    from .vault_cache import plaintext_cache
+    from .user_cache import user_cache
+    from .hashing import hashing
+    from . import pool_stats
+    from .logging_utils import logging_stats
+
+    def cache_stat(key):
+        return lambda: {
+            ('plaintext',): plaintext_cache.stats()[key],
+            ('user',): user_cache.stats()[key],
+        }
+
+    register('dunkey_cache_hits_total', 'Cache hits.', 'counter', ('cache',), cache_stat('hits'))
+    register('dunkey_cache_misses_total', 'Cache misses.', 'counter', ('cache',), cache_stat('misses'))
+    register('dunkey_cache_entries', 'Entries currently cached.', 'gauge', ('cache',), cache_stat('size'))
+    register('dunkey_hash_pool_rejected_total', 'Login hashes rejected because the hash pool was full.',
+             'counter', (), lambda: {(): hashing.rejected})
+    register('dunkey_hash_pool_timeouts_total', 'Login hashes abandoned after HASH_POOL_TIMEOUT.',
+             'counter', (), lambda: {(): hashing.timed_out})
+
+    register('dunkey_log_records_dropped_total', 'Log records dropped because the log queue was full.',
+             'counter', (), lambda: {(): logging_stats()['dropped']})
+    register('dunkey_log_queue_depth', 'Log records waiting to be written.',
+             'gauge', (), lambda: {(): logging_stats()['queued']})
+
+    def pool_stat(*path):
+        def collect():
+            values = {}
+            for engine_name, snapshot in pool_stats.report(current_app).items():
+                for key in path:
+                    snapshot = snapshot[key]
+                values[(engine_name,)] = snapshot
+            return values
+        return collect
+
+    register('dunkey_db_pool_checked_out', 'Connections currently checked out.',
+             'gauge', ('engine',), pool_stat('checked_out'))
+    register('dunkey_db_pool_connects_total', 'DBAPI connections opened.',
+             'counter', ('engine',), pool_stat('connects'))
+    register('dunkey_db_pool_wait_seconds_total', 'Time spent waiting for a pooled connection.',
+             'counter', ('engine',), lambda: {k: v / 1000 for k, v in pool_stat('wait', 'total_ms')().items()})
+    register('dunkey_db_pool_timeouts_total', 'Checkouts that timed out waiting for a connection.',
+             'counter', ('engine',), pool_stat('wait', 'timeouts'))
+
+
+def init_app(app, db):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    from sqlalchemy import event
+
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+                event.listen(engine, 'handle_error', _handle_error)
+    _register_collected()
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint, methods=['GET'])
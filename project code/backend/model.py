@@ -1,7 +1,17 @@
 from flask_login import UserMixin
 from backend import db
-from .crypto import encrypt_master, decrypt_master
-from .validation import sanitize_username
+import hmac
+import hashlib
+from datetime import datetime
+from .crypto import encrypt_master, decrypt_master, derive_key, seal_record, open_record, encrypt_many, decrypt_many
+from .validation import sanitize_username, password_strength
+from .vault_cache import plaintext_cache
+
+
+def password_fingerprint(user_id: int, password: str) -> str:
+    """Keyed, per-user fingerprint of a vault password, used to find reuse without decrypting."""
+    message = f"{user_id}:{password}".encode('utf-8')
+    return hmac.new(derive_key('dunkey-password-fingerprint'), message, hashlib.sha256).hexdigest()
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
@@ -17,17 +27,19 @@ class User(db.Model, UserMixin):
     prefers_dark_mode = db.Column(db.Boolean, default=False)
     encrypted_master_password = db.Column(db.Text)  # Changed to Text to match DB schema
     avatar_path = db.Column(db.String(255), nullable=True)
+    # Advanced by every vault or profile write; the ETag of per-user reads (see conditional.py)
+    vault_revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
-    # Bcrypt-based login password hashing 
+    # Login password hashing (bcrypt policy, see hashing.py)
     def set_login_password(self, raw: str):
-        """Hash the login password with bcrypt."""
-        from flask_bcrypt import generate_password_hash
-        self.password_hash = generate_password_hash(raw).decode('utf-8')
+        """Hash the login password with the current hash policy."""
+        from .hashing import hashing
+        self.password_hash = hashing.hash(raw)
 
     def check_login_password(self, raw: str) -> bool:
-        """Verify a raw password against the stored bcrypt hash."""
-        from flask_bcrypt import check_password_hash
-        return check_password_hash(self.password_hash, raw)
+        """Verify a raw password against the stored hash (any supported format)."""
+        from .hashing import hashing
+        return hashing.verify(self.password_hash, raw)
 
     def set_master_password(self, raw: str):
         self.encrypted_master_password = encrypt_master(raw)
@@ -35,6 +47,28 @@ class User(db.Model, UserMixin):
     def get_master_password(self) -> str:
         return decrypt_master(self.encrypted_master_password or b'')
 
+    @classmethod
+    def bump_revision(cls, *user_ids: int):
+        """Advance the vault revision of ``user_ids`` as part of the current transaction."""
+        db.session.execute(
+            db.update(cls).where(cls.user_id.in_(user_ids))
+            .values(vault_revision=cls.vault_revision + 1)
+        )
+
+    @classmethod
+    def next_revision(cls, user_id: int) -> int:
+        """
+        Advance and return one user's vault revision. The UPDATE locks the user row
+        until commit, so concurrent vault writes get distinct revisions and commit
+        in revision order.
+        """
+        cls.bump_revision(user_id)
+        return cls.revision_of(user_id)
+
+    @classmethod
+    def revision_of(cls, user_id: int) -> int:
+        return db.session.scalar(db.select(cls.vault_revision).where(cls.user_id == user_id)) or 0
+
     def to_dict(self):
         return {
             'user_id': self.user_id,
@@ -46,41 +80,286 @@ class User(db.Model, UserMixin):
 class PasswordEntry(db.Model):
     __tablename__ = 'password_entries'
 
+    # Fields a client may request through the ``fields=`` projection.
+    # ``entry_id`` is always included; ``password`` must be asked for explicitly.
+    LIST_FIELDS = ('website', 'username', 'password', 'user_id', 'password_strength', 'revision')
+    DEFAULT_LIST_FIELDS = ('website', 'username', 'user_id')
+
+    # Order of the fields inside a sealed record
+    RECORD_FIELDS = ('website', 'username', 'password')
+
     entry_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Legacy per-column AES-CBC ciphertexts; empty once the row has a sealed record
     website = db.Column(db.LargeBinary, nullable=False)  # Directly named as in DB
     username = db.Column(db.LargeBinary, nullable=False)  # Directly named as in DB
     password = db.Column(db.LargeBinary, nullable=False)  # Directly named as in DB
+    # Single authenticated envelope holding website, username and password (crypto.seal_record)
+    record = db.Column(db.LargeBinary, nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    # Derived from the password at write time so filtering never needs decryption
+    strength = db.Column(db.String(10), nullable=True)
+    password_fingerprint = db.Column(db.String(64), nullable=True)
+    # Owner's vault revision at the last write (User.next_revision); drives /api/changes
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
+    # Deleted entries are kept as tombstones (no ciphertext) so sync clients learn of the delete
+    deleted_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_password_entries_user_strength', 'user_id', 'strength'),
+        db.Index('ix_password_entries_user_fingerprint', 'user_id', 'password_fingerprint'),
+        db.Index('ix_password_entries_user_revision', 'user_id', 'revision'),
+    )
 
     # Relationship
     user = db.relationship('User', backref='password_entries')
 
     # Encryption/decryption methods
+    def _plaintext(self) -> dict:
+        # Decrypted fields are kept on the instance, so each row is opened at most once.
+        plain = self.__dict__.get('_plain')
+        if plain is None:
+            if not self.record:
+                plain = {}
+            else:
+                plain = plaintext_cache.get(self.user_id, self.entry_id, self.record)
+                if plain is None:
+                    plain = dict(zip(self.RECORD_FIELDS, open_record(self.record)))
+                    plaintext_cache.put(self.user_id, self.entry_id, self.record, plain)
+            self._plain = plain
+        return plain
+
+    def _get_field(self, name: str) -> str:
+        plain = self._plaintext()
+        if name not in plain:
+            # Legacy row: decrypt just this column
+            plain[name] = decrypt_master(getattr(self, name))
+        return plain[name]
+
+    def set_fields(self, **values):
+        """
+        Update one or more fields and reseal the whole record once.
+        Legacy rows are migrated to the record format on their first write.
+        """
+        current = self._merged_fields(values)
+        self._store_fields(current, values, seal_record([current[name] for name in self.RECORD_FIELDS]))
+
+    @classmethod
+    def set_fields_many(cls, entries: list, changes: list):
+        """set_fields for many entries (new or existing), sealing every record in one encrypt_many call."""
+        merged = [entry._merged_fields(values) for entry, values in zip(entries, changes)]
+        records = encrypt_many([[current[name] for name in cls.RECORD_FIELDS] for current in merged])
+        for entry, values, current, record in zip(entries, changes, merged, records):
+            entry._store_fields(current, values, record)
+
+    def _merged_fields(self, values: dict) -> dict:
+        # Only fields that are not being replaced need the old plaintext
+        if self.entry_id is None and not self.record:
+            current = dict.fromkeys(self.RECORD_FIELDS, '')
+        else:
+            current = {name: self._get_field(name) for name in self.RECORD_FIELDS if name not in values}
+        current.update(values)
+        return current
+
+    def _store_fields(self, current: dict, values: dict, record: bytes):
+        self.record = record
+        self.website = self.username = self.password = b''
+        self._plain = current
+        plaintext_cache.evict_user(self.user_id)
+
+        if 'password' in values:
+            self.strength = password_strength(values['password'])
+            self.password_fingerprint = password_fingerprint(self.user_id, values['password'])
+
+    @classmethod
+    def patch_columns(cls, user_id: int, fields: dict, changed) -> dict:
+        """
+        Column values for a targeted UPDATE that reseals ``fields`` (all three
+        record fields); derived columns are only recomputed for ``changed`` ones.
+        """
+        columns = {
+            'record': seal_record([fields[name] for name in cls.RECORD_FIELDS]),
+            'website': b'', 'username': b'', 'password': b'',
+        }
+        if 'password' in changed:
+            columns['strength'] = password_strength(fields['password'])
+            columns['password_fingerprint'] = password_fingerprint(user_id, fields['password'])
+        plaintext_cache.evict_user(user_id)
+        return columns
+
+    def stamp(self, revision: int):
+        """Record a write at ``revision`` (see User.next_revision)."""
+        self.revision = revision
+        self.updated_at = datetime.utcnow()
+
+    def mark_deleted(self, revision: int):
+        """Turn the entry into a tombstone: drop the ciphertext and derived columns, keep the id."""
+        self.stamp(revision)
+        self.deleted_at = self.updated_at
+        self.record = None
+        self.website = self.username = self.password = b''
+        self.strength = self.password_fingerprint = None
+        self.__dict__.pop('_plain', None)
+        plaintext_cache.evict_user(self.user_id)
+
+    @classmethod
+    def live(cls, user_id: int):
+        """Query for a user's entries, excluding tombstones."""
+        return cls.query.filter(cls.user_id == user_id, cls.deleted_at.is_(None))
+
+    @classmethod
+    def column_values(cls, user_id: int, rows: list, revision: int = 0) -> list:
+        """
+        Column dicts for new entries from dicts with website/username/password,
+        sealing all records in one encrypt_many call. Suitable for bulk INSERTs.
+        """
+        records = encrypt_many([[row[name] for name in cls.RECORD_FIELDS] for row in rows])
+        now = datetime.utcnow()
+        return [
+            {
+                'user_id': user_id, 'record': record, 'website': b'', 'username': b'', 'password': b'',
+                'strength': password_strength(row['password']),
+                'password_fingerprint': password_fingerprint(user_id, row['password']),
+                'revision': revision, 'updated_at': now,
+            }
+            for row, record in zip(rows, records)
+        ]
+
+    @classmethod
+    def build_many(cls, user_id: int, rows: list, revision: int = 0) -> list:
+        """Create (unsaved) entries from dicts with website/username/password (see column_values)."""
+        entries = []
+        for row, values in zip(rows, cls.column_values(user_id, rows, revision)):
+            entry = cls(**values)
+            entry._plain = {name: row[name] for name in cls.RECORD_FIELDS}
+            entries.append(entry)
+        plaintext_cache.evict_user(user_id)
+        return entries
+
+    @classmethod
+    def decrypt_all(cls, entries):
+        """Open the records of many entries in one batch call."""
+        pending = []
+        for entry in entries:
+            if not entry.record or entry.__dict__.get('_plain') is not None:
+                continue
+            cached = plaintext_cache.get(entry.user_id, entry.entry_id, entry.record)
+            if cached is not None:
+                entry._plain = cached
+            else:
+                pending.append(entry)
+
+        for entry, fields in zip(pending, decrypt_many([e.record for e in pending])):
+            entry._plain = dict(zip(cls.RECORD_FIELDS, fields))
+            plaintext_cache.put(entry.user_id, entry.entry_id, entry.record, entry._plain)
+        return entries
+
     def set_website(self, raw: str):
-        self.website = encrypt_master(raw)
+        self.set_fields(website=raw)
 
     def get_website(self) -> str:
-        return decrypt_master(self.website)
+        return self._get_field('website')
 
     def set_username(self, raw: str):
-        self.username = encrypt_master(raw)
+        self.set_fields(username=raw)
 
     def get_username(self) -> str:
-        return decrypt_master(self.username)
+        return self._get_field('username')
 
     def set_password(self, raw: str):
-        self.password = encrypt_master(raw)
+        self.set_fields(password=raw)
 
     def get_password(self) -> str:
-        return decrypt_master(self.password)
-    
-    def to_dict(self):
-        return {
-            'entry_id': self.entry_id,
-            'website': self.get_website(),
-            'username': self.get_username(),
-            'password': self.get_password(),
-            'user_id': self.user_id
+        return self._get_field('password')
+
+    def get_strength(self) -> str:
+        # Rows written before strength was stored fall back to decrypting the password
+        return self.strength or password_strength(self.get_password())
+
+    @classmethod
+    def reused_fingerprints(cls, user_id: int):
+        """
+        Subquery of this user's password fingerprints that occur more than once.
+        Tombstones have no fingerprint, so they never count.
+        """
+        return (
+            db.select(cls.password_fingerprint)
+            .where(cls.user_id == user_id, cls.password_fingerprint.is_not(None))
+            .group_by(cls.password_fingerprint)
+            .having(db.func.count() > 1)
+        )
+
+    def to_dict(self, fields=None):
+        """
+        Serialize the entry. ``fields`` limits the output (and therefore the
+        decryption work) to the given columns; by default every field is returned.
+        """
+        getters = {
+            'website': self.get_website,
+            'username': self.get_username,
+            'password': self.get_password,
+            'user_id': lambda: self.user_id,
+            'password_strength': self.get_strength,
+            'revision': lambda: self.revision,
         }
+        data = {'entry_id': self.entry_id}
+        for field in (fields or self.LIST_FIELDS):
+            data[field] = getters[field]()
+        return data
+
+    def to_change(self, fields=None):
+        """Serialize the entry for the change feed: a tombstone, or to_dict() plus its revision."""
+        if self.deleted_at is not None:
+            return {'entry_id': self.entry_id, 'revision': self.revision, 'deleted': True}
+        data = self.to_dict(fields)
+        data['revision'] = self.revision
+        data['updated_at'] = self.updated_at.isoformat() if self.updated_at else None
+        return data
+
+
+
+
+class EntrySearchToken(db.Model):
+    """Keyed (HMAC) n-gram tokens of an entry's website and username, used for blind-index search."""
+    __tablename__ = 'password_entry_search_tokens'
+
+    token_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    entry_id = db.Column(db.Integer, db.ForeignKey('password_entries.entry_id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    token = db.Column(db.String(32), nullable=False)  # hex HMAC-SHA256, truncated to 128 bits
+
+    __table_args__ = (
+        db.Index('ix_search_tokens_user_token', 'user_id', 'token'),
+    )
+
+
+class OutboxMessage(db.Model):
+    """Outgoing e-mail, persisted by request handlers and delivered by the outbox worker."""
+    __tablename__ = 'mail_outbox'
+
+    message_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255), nullable=False)
+    recipients = db.Column(db.Text, nullable=False)  # comma-separated addresses
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending / sent / failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Earliest time of the next delivery attempt; also used as the worker's claim lease
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_mail_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
 
+class KeyRotationCheckpoint(db.Model):
+    """Progress of rotate_keys.py, committed in the same transaction as each re-encrypted batch."""
+    __tablename__ = 'key_rotation_checkpoints'
 
+    job = db.Column(db.String(64), primary_key=True)  # "<table>:<target key id>"
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    rows_rekeyed = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,149 @@
+"""
+Persistent mail outbox.
+
+Request handlers call ``enqueue`` and commit; a background worker delivers due
+messages in batches over a single SMTP connection. Failed deliveries are retried
+with exponential backoff until MAIL_OUTBOX_MAX_ATTEMPTS, then marked 'failed'.
+
+Several workers (one per web process) can run at once: a message is claimed by
+a conditional UPDATE that moves its ``next_attempt_at`` forward by a lease, so
+only one worker sends it, and a crashed worker's claim simply expires.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask_mail import Message
+from sqlalchemy import update
+from . import db, mail
+from .model import OutboxMessage
+
+logger = logging.getLogger('vault_app')
+
+_wakeup = threading.Event()
+
+
+def enqueue(subject: str, sender: str, recipients: list, body: str) -> OutboxMessage:
+    """Add a message to the outbox. The caller commits the session."""
+    message = OutboxMessage(
+        subject=subject,
+        sender=sender,
+        recipients=','.join(recipients),
+        body=body
+    )
+    db.session.add(message)
+    return message
+
+
+def notify():
+    """Wake an in-process worker so fresh messages go out without waiting for the next poll."""
+    _wakeup.set()
+
+
+def _claim_due(app, now: datetime) -> list:
+    lease = now + timedelta(seconds=app.config['MAIL_OUTBOX_LEASE'])
+    candidates = db.session.execute(
+        db.select(OutboxMessage.message_id, OutboxMessage.next_attempt_at)
+        .where(OutboxMessage.status == 'pending', OutboxMessage.next_attempt_at <= now)
+        .order_by(OutboxMessage.next_attempt_at)
+        .limit(app.config['MAIL_OUTBOX_BATCH_SIZE'])
+    ).all()
+
+    claimed = []
+    for message_id, next_attempt_at in candidates:
+        result = db.session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.message_id == message_id,
+                   OutboxMessage.status == 'pending',
+                   OutboxMessage.next_attempt_at == next_attempt_at)
+            .values(next_attempt_at=lease)
+        )
+        if result.rowcount == 1:
+            claimed.append(message_id)
+    db.session.commit()
+
+    if not claimed:
+        return []
+    return OutboxMessage.query.filter(OutboxMessage.message_id.in_(claimed)).all()
+
+
+def _record_failure(app, message: OutboxMessage, error: Exception, now: datetime):
+    message.attempts += 1
+    message.last_error = str(error)[:1000]
+    if message.attempts >= app.config['MAIL_OUTBOX_MAX_ATTEMPTS']:
+        message.status = 'failed'
+        logger.error("Outbox message %s failed permanently: %s", message.message_id, error)
+    else:
+        backoff = app.config['MAIL_OUTBOX_BACKOFF_BASE'] * 2 ** (message.attempts - 1)
+        backoff = min(backoff, app.config['MAIL_OUTBOX_BACKOFF_MAX'])
+        message.next_attempt_at = now + timedelta(seconds=backoff)
+
+
+def send_due(app) -> int:
+    """
+    Deliver one batch of due messages over a single SMTP connection.
+    Must run inside an app context. Returns the number of messages attempted.
+    """
+    now = datetime.utcnow()
+    batch = _claim_due(app, now)
+    if not batch:
+        return 0
+
+    attempted = set()  # ids whose attempt is already recorded
+    try:
+        with mail.connect() as connection:
+            for message in batch:
+                attempted.add(message.message_id)
+                try:
+                    connection.send(Message(
+                        subject=message.subject,
+                        sender=message.sender,
+                        recipients=message.recipients.split(','),
+                        body=message.body
+                    ))
+                    message.status = 'sent'
+                    message.sent_at = datetime.utcnow()
+                    message.attempts += 1
+                except Exception as e:
+                    _record_failure(app, message, e, now)
+    except Exception as e:
+        # Could not connect (or the connection dropped): retry everything not yet
+        # attempted; a message whose own send already failed is counted once
+        for message in batch:
+            if message.message_id not in attempted:
+                _record_failure(app, message, e, now)
+
+    db.session.commit()
+    return len(batch)
+
+
+class OutboxWorker(threading.Thread):
+    """Daemon thread that drains the outbox until stopped."""
+
+    def __init__(self, app):
+        super().__init__(name='mail-outbox', daemon=True)
+        self.app = app
+        self._stop_event = threading.Event()
+
+    def run(self):
+        interval = self.app.config['MAIL_OUTBOX_POLL_INTERVAL']
+        while not self._stop_event.is_set():
+            sent = 0
+            try:
+                with self.app.app_context():
+                    sent = send_due(self.app)
+            except Exception:
+                logger.exception("Outbox worker iteration failed")
+            if not sent:
+                _wakeup.wait(interval)
+                _wakeup.clear()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        _wakeup.set()
+        self.join(timeout)
+
+
+def start_worker(app) -> OutboxWorker:
+    worker = OutboxWorker(app)
+    worker.start()
+    return worker
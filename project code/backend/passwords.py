@@ -1,12 +1,56 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, Response, current_app, render_template, request, redirect, url_for, flash, jsonify, stream_with_context
 from flask_login import login_required, current_user
+from datetime import datetime
+from sqlalchemy.orm import load_only
 from . import db, csrf, limiter
-from .model import PasswordEntry
-from .validation import validate_vault_entry, validate_vault_password_confirm
-from .logging_utils import log_vault_entry_create, log_vault_entry_edit, log_vault_entry_delete
+from .model import User, PasswordEntry, password_fingerprint
+from .conditional import revalidated
+from .health import VaultHealth
+from .validation import validate_vault_entry, validate_vault_patch, validate_vault_password_confirm
+from .logging_utils import (
+    log_vault_entry_create, log_vault_entry_edit, log_vault_entry_delete, log_vault_import, log_vault_export,
+    log_vault_batch
+)
+from . import search_index
+from . import vault_io
 
 bp = Blueprint('passwords', __name__, url_prefix='/passwords')
 
+# Listing configuration
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+HEALTH_BATCH_SIZE = 500
+IMPORT_CHUNK_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+MAX_REPORTED_IMPORT_ERRORS = 100
+BATCH_MAX_OPERATIONS = 500
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+FIELD_COLUMNS = {
+    'website': PasswordEntry.website,
+    'username': PasswordEntry.username,
+    'password': PasswordEntry.password,
+    'password_strength': PasswordEntry.strength,
+    'revision': PasswordEntry.revision,
+}
+RECORD_FIELDS = PasswordEntry.RECORD_FIELDS
+
+
+def parse_fields(raw):
+    """Parse a ``fields=`` projection into a tuple of field names."""
+    if not raw:
+        return PasswordEntry.DEFAULT_LIST_FIELDS, {}
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in PasswordEntry.LIST_FIELDS and f != 'entry_id']
+    if unknown:
+        return None, {'fields': f"Unknown field(s): {', '.join(unknown)}."}
+    return tuple(f for f in fields if f != 'entry_id'), {}
+
+
+def json_object():
+    """The request's JSON body if it is an object, else None (missing, malformed, or a list/scalar)."""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
+
 # Server-rendered page
 @bp.route('', methods=['GET'])
 @login_required
@@ -19,9 +63,125 @@ def list_entries():
 @bp.route('/api', methods=['GET'])
 @login_required
 @limiter.limit("60 per minute")
+@revalidated
 def api_list():
-    entries = PasswordEntry.query.filter_by(user_id=current_user.user_id).all()
-    return jsonify([e.to_dict() for e in entries]), 200
+    """
+    Keyset-paginated vault listing.
+    - ``cursor``: last entry_id seen; only entries with a larger id are returned.
+    - ``limit``: page size, capped at MAX_PAGE_SIZE.
+    - ``fields``: comma-separated projection (see PasswordEntry.LIST_FIELDS).
+      Passwords are only decrypted when explicitly requested.
+    """
+    try:
+        cursor = int(request.args.get('cursor', 0))
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify(errors={'cursor': 'cursor and limit must be integers.'}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    fields, errs = parse_fields(request.args.get('fields'))
+    if errs:
+        return jsonify(errors=errs), 400
+
+    # Only load the columns the projection needs. Sealed records hold all three
+    # fields; the legacy per-field columns are only read for unmigrated rows.
+    columns = [PasswordEntry.entry_id, PasswordEntry.user_id, PasswordEntry.record]
+    columns += [FIELD_COLUMNS[f] for f in fields if f in FIELD_COLUMNS]
+
+    # Fetch one extra row to know whether another page exists.
+    entries = (
+        PasswordEntry.live(current_user.user_id)
+        .options(load_only(*columns))
+        .filter(PasswordEntry.entry_id > cursor)
+        .order_by(PasswordEntry.entry_id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if any(f in RECORD_FIELDS for f in fields):
+        PasswordEntry.decrypt_all(entries)
+
+    return jsonify({
+        'entries': [e.to_dict(fields) for e in entries],
+        'next_cursor': entries[-1].entry_id if has_more else None,
+    }), 200
+
+@bp.route('/api/changes', methods=['GET'])
+@login_required
+@limiter.limit("60 per minute")
+@revalidated
+def api_changes():
+    """
+    Delta sync: entries written after revision ``since``, in revision order.
+    - ``since``: the ``revision`` returned by the client's last completed sync;
+      0 (the default) returns every live entry.
+    - ``after``: entry_id continuation within revision ``since``, taken from ``next``.
+    - ``limit`` and ``fields``: as for the list endpoint.
+    Deleted entries come back as ``{'entry_id', 'revision', 'deleted': true}``.
+    While ``next`` is set, request it to get the rest; once it is null, store
+    ``revision`` for the next sync.
+    """
+    try:
+        since = max(0, int(request.args.get('since', 0)))
+        after = request.args.get('after')
+        after = int(after) if after is not None else None
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify(errors={'since': 'since, after and limit must be integers.'}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    fields, errs = parse_fields(request.args.get('fields'))
+    if errs:
+        return jsonify(errors=errs), 400
+
+    columns = [PasswordEntry.entry_id, PasswordEntry.user_id, PasswordEntry.record, PasswordEntry.revision,
+               PasswordEntry.updated_at, PasswordEntry.deleted_at]
+    columns += [FIELD_COLUMNS[f] for f in fields if f in FIELD_COLUMNS]
+
+    query = (
+        PasswordEntry.query
+        .options(load_only(*columns))
+        .filter(PasswordEntry.user_id == current_user.user_id)
+    )
+    if after is not None:
+        query = query.filter(db.or_(
+            PasswordEntry.revision > since,
+            db.and_(PasswordEntry.revision == since, PasswordEntry.entry_id > after)
+        ))
+    elif since:
+        query = query.filter(PasswordEntry.revision > since)
+    if not since:
+        # A full sync has nothing to delete; rows never written since the
+        # revision column was added are still at revision 0
+        query = query.filter(PasswordEntry.deleted_at.is_(None))
+
+    # Served by ix_password_entries_user_revision (InnoDB appends the primary key)
+    entries = query.order_by(PasswordEntry.revision, PasswordEntry.entry_id).limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if any(f in RECORD_FIELDS for f in fields):
+        PasswordEntry.decrypt_all(e for e in entries if e.deleted_at is None)
+
+    last = entries[-1] if entries else None
+    return jsonify({
+        'changes': [e.to_change(fields) for e in entries],
+        'revision': last.revision if last else since,
+        'next': {'since': last.revision, 'after': last.entry_id} if has_more else None,
+    }), 200
+
+@bp.route('/api/<int:entry_id>/password', methods=['GET'])
+@login_required
+@limiter.limit("60 per minute")
+def api_reveal_password(entry_id):
+    """Decrypt and return the password of a single entry."""
+    entry = (
+        PasswordEntry.live(current_user.user_id)
+        .options(load_only(PasswordEntry.entry_id, PasswordEntry.record, PasswordEntry.password))
+        .filter_by(entry_id=entry_id)
+        .first_or_404()
+    )
+    return jsonify({'entry_id': entry.entry_id, 'password': entry.get_password()}), 200
 
 @bp.route('/api', methods=['POST'])
 @login_required
@@ -35,12 +195,16 @@ def api_create():
     if errs:
         return jsonify(errors=errs), 400
 
+    website = data.get('website', '').strip()
+    username = data.get('username', '').strip()
+
     entry = PasswordEntry(user_id=current_user.user_id)
-    entry.set_website(data.get('website', '').strip())
-    entry.set_username(data.get('username', '').strip())
-    entry.set_password(data.get('password', '').strip())
+    entry.set_fields(website=website, username=username, password=data.get('password', '').strip())
+    entry.stamp(User.next_revision(current_user.user_id))
 
     db.session.add(entry)
+    db.session.flush()  # assigns entry_id for the search index
+    search_index.index_entry(entry, website, username)
     db.session.commit()
     log_vault_entry_create(current_user.username, data.get('website', '').strip())
     return jsonify(entry.to_dict()), 201
@@ -57,58 +221,410 @@ def api_update(entry_id):
     if errs:
         return jsonify(errors=errs), 400
 
-    entry = PasswordEntry.query.filter_by(
-        user_id=current_user.user_id, entry_id=entry_id
-    ).first_or_404()
-    entry.set_website(data.get('website', entry.get_website()).strip())
-    entry.set_username(data.get('username', entry.get_username()).strip())
-    entry.set_password(data.get('password', entry.get_password()).strip())
+    entry = PasswordEntry.live(current_user.user_id).filter_by(entry_id=entry_id).first_or_404()
+    # Stored values are only decrypted for fields the client left out
+    website = (data['website'] if 'website' in data else entry.get_website()).strip()
+    username = (data['username'] if 'username' in data else entry.get_username()).strip()
+    password = (data['password'] if 'password' in data else entry.get_password()).strip()
+    entry.set_fields(website=website, username=username, password=password)
+
+    entry.stamp(User.next_revision(current_user.user_id))
 
+    search_index.index_entry(entry, website, username)
     db.session.commit()
-    log_vault_entry_edit(current_user.username, entry.get_website())
+    log_vault_entry_edit(current_user.username, website)
     return jsonify(entry.to_dict()), 200
 
+@bp.route('/api/<int:entry_id>', methods=['PATCH'])
+@login_required
+@csrf.exempt
+@limiter.limit("30 per minute")
+def api_patch(entry_id):
+    """
+    Partial update with optimistic concurrency.
+    - Body: any of website, username and password.
+    - ``If-Match``: the revision the client last saw (``revision`` from the list,
+      the change feed, or this endpoint's ETag); ``*`` skips the check. Weak tags
+      (``W/"3"``) are rejected with 400.
+    The stored record is only decrypted for fields that are not supplied (a record
+    seals all three together). The write is one UPDATE conditioned on the
+    revision, so an edit made in the meantime fails with 412 instead of being
+    overwritten.
+    """
+    if not request.if_match:
+        return jsonify(errors={'If-Match': 'If-Match with the entry revision is required.'}), 428
+    expected = None
+    if not request.if_match.star_tag:
+        # If-Match uses strong comparison (RFC 9110 13.1.1): a weak tag can never
+        # match, so say so instead of answering 412
+        if request.if_match.as_set(include_weak=True) - request.if_match.as_set():
+            return jsonify(errors={'If-Match': 'If-Match needs strong entry revisions ("3"); weak tags (W/"3") never match.'}), 400
+        try:
+            expected = [int(tag) for tag in request.if_match.as_set()]
+        except ValueError:
+            return jsonify(errors={'If-Match': 'If-Match must hold entry revisions.'}), 400
+
+    data = json_object()
+    if data is None:
+        return jsonify(errors={'body': 'Request body must be a JSON object.'}), 400
+    values = {name: data[name] for name in RECORD_FIELDS if name in data}
+    if any(not isinstance(value, str) for value in values.values()):
+        return jsonify(errors={'fields': 'Fields must be strings.'}), 400
+    errs = validate_vault_patch(values)
+    if errs:
+        return jsonify(errors=errs), 400
+    values = {name: value.strip() for name, value in values.items()}
+
+    user_id = current_user.user_id
+    fields = dict(values)
+    missing = [name for name in RECORD_FIELDS if name not in values]
+    if missing:
+        entry = (
+            PasswordEntry.live(user_id)
+            .options(load_only(PasswordEntry.entry_id, PasswordEntry.user_id, PasswordEntry.record,
+                               PasswordEntry.revision, *(FIELD_COLUMNS[name] for name in missing)))
+            .filter_by(entry_id=entry_id)
+            .first()
+        )
+        if entry is None:
+            return jsonify(errors={'entry_id': 'Entry not found.'}), 404
+        if expected is not None and entry.revision not in expected:
+            return jsonify(errors={'If-Match': 'Entry was changed since that revision.'},
+                           revision=entry.revision), 412
+        stored = entry.to_dict(missing)
+        fields.update((name, stored[name]) for name in missing)
+
+    revision = User.next_revision(user_id)
+    conditions = [PasswordEntry.entry_id == entry_id, PasswordEntry.user_id == user_id,
+                  PasswordEntry.deleted_at.is_(None)]
+    if expected is not None:
+        conditions.append(PasswordEntry.revision.in_(expected))
+    result = db.session.execute(
+        db.update(PasswordEntry).where(*conditions)
+        .values(revision=revision, updated_at=datetime.utcnow(),
+                **PasswordEntry.patch_columns(user_id, fields, values))
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.session.rollback()  # also undoes the revision bump
+        current = db.session.scalar(
+            db.select(PasswordEntry.revision).where(*conditions[:3])
+        )
+        if current is None:
+            return jsonify(errors={'entry_id': 'Entry not found.'}), 404
+        return jsonify(errors={'If-Match': 'Entry was changed since that revision.'}, revision=current), 412
+
+    if 'website' in values or 'username' in values:
+        search_index.reindex(user_id, entry_id, fields['website'], fields['username'])
+    db.session.commit()
+    log_vault_entry_edit(current_user.username, fields['website'])
+
+    response = jsonify({'entry_id': entry_id, 'revision': revision, 'updated': sorted(values)})
+    response.set_etag(str(revision))
+    return response, 200
+
 @bp.route('/api/<int:entry_id>', methods=['DELETE'])
 @login_required
 @csrf.exempt
 @limiter.limit("30 per minute")
 def api_delete(entry_id):
-    entry = PasswordEntry.query.filter_by(
-        user_id=current_user.user_id, entry_id=entry_id
-    ).first_or_404()
-    db.session.delete(entry)
+    entry = PasswordEntry.live(current_user.user_id).filter_by(entry_id=entry_id).first_or_404()
+    search_index.remove_entry(entry.entry_id)
+    # Keep a tombstone so /api/changes can report the delete
+    entry.mark_deleted(User.next_revision(current_user.user_id))
     db.session.commit()
     return ('', 204)
 
+@bp.route('/api/batch', methods=['POST'])
+@login_required
+@csrf.exempt
+@limiter.limit("30 per minute")
+def api_batch():
+    """
+    Apply many create/update/delete operations in one transaction:
+    ``{"operations": [{"op": "create", "website", "username", "password"},
+    {"op": "update", "entry_id", "website", "username", "password"},
+    {"op": "delete", "entry_id"}, ...]}``.
+    Every operation is validated before anything is written; if one fails the
+    batch is rejected with 400 and per-operation errors. Otherwise all records
+    are sealed in one encrypt_many call, the batch shares one vault revision and
+    one commit, and ``results`` holds, in order, the status and body each
+    operation would have had on the single-entry endpoints.
+    """
+    data = json_object()
+    if data is None:
+        return jsonify(errors={'body': 'Request body must be a JSON object.'}), 400
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify(errors={'operations': 'operations must be a non-empty list.'}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify(errors={'operations': f'At most {BATCH_MAX_OPERATIONS} operations per batch.'}), 400
+
+    user_id = current_user.user_id
+    target_ids = {
+        op.get('entry_id') for op in operations
+        if isinstance(op, dict) and op.get('op') in ('update', 'delete') and isinstance(op.get('entry_id'), int)
+    }
+    existing = {
+        entry.entry_id: entry
+        for entry in PasswordEntry.live(user_id).filter(PasswordEntry.entry_id.in_(target_ids))
+    } if target_ids else {}
+
+    # Validate everything first: (kind, entry, fields) per operation
+    planned, failures, seen = [], [], set()
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict):
+            failures.append({'index': index, 'status': 400, 'errors': {'op': 'Each operation must be an object.'}})
+            continue
+        kind = op.get('op')
+        if kind not in BATCH_OPERATIONS:
+            failures.append({'index': index, 'status': 400,
+                             'errors': {'op': "op must be 'create', 'update' or 'delete'."}})
+            continue
+
+        if kind == 'create':
+            entry = PasswordEntry(user_id=user_id)  # transient until the batch is applied
+        else:
+            entry_id = op.get('entry_id')
+            entry = existing.get(entry_id) if isinstance(entry_id, int) else None
+            if entry is None:
+                failures.append({'index': index, 'status': 404, 'errors': {'entry_id': 'Entry not found.'}})
+                continue
+            if entry.entry_id in seen:
+                failures.append({'index': index, 'status': 400,
+                                 'errors': {'entry_id': 'Entry is already changed by an earlier operation.'}})
+                continue
+            seen.add(entry.entry_id)
+
+        fields = None
+        if kind != 'delete':
+            raw = {name: op.get(name) if isinstance(op.get(name), str) else '' for name in RECORD_FIELDS}
+            errs = validate_vault_entry(raw['website'], raw['username'], raw['password'])
+            if errs:
+                failures.append({'index': index, 'status': 400, 'errors': errs})
+                continue
+            fields = {name: value.strip() for name, value in raw.items()}
+        planned.append((kind, entry, fields))
+
+    if failures:
+        return jsonify(errors=failures), 400
+
+    revision = User.next_revision(user_id)
+    written = [(entry, fields) for kind, entry, fields in planned if kind != 'delete']
+    PasswordEntry.set_fields_many([entry for entry, _ in written], [fields for _, fields in written])
+
+    for kind, entry, _ in planned:
+        if kind == 'create':
+            db.session.add(entry)
+        if kind == 'delete':
+            entry.mark_deleted(revision)
+        else:
+            entry.stamp(revision)
+    db.session.flush()  # assigns the new entry ids
+
+    search_index.remove_entries([entry.entry_id for kind, entry, _ in planned if kind != 'create'])
+    search_index.index_new_entries([entry for entry, _ in written])
+    db.session.commit()
+
+    counts = {kind: sum(1 for k, _, _ in planned if k == kind) for kind in BATCH_OPERATIONS}
+    log_vault_batch(current_user.username, counts['create'], counts['update'], counts['delete'])
+    statuses = {'create': 201, 'update': 200, 'delete': 204}
+    return jsonify({
+        'revision': revision,
+        'results': [
+            {'index': index, 'op': kind, 'status': statuses[kind],
+             'entry': {'entry_id': entry.entry_id} if kind == 'delete' else entry.to_dict()}
+            for index, (kind, entry, _) in enumerate(planned)
+        ],
+    }), 200
+
 
 @bp.route('/api/search', methods=['GET'])
 @login_required
 @limiter.limit("60 per minute")
+@revalidated
 def api_search():
-    search_query = request.args.get('search', '').lower()
+    """
+    Search the vault.
+    - ``search``: substring of website or username (blind-index lookup).
+    - ``strength``: 'all', 'weak' or 'strong' (stored strength column).
+    - ``reused``: 'true' to return only entries whose password is used more than once.
+    - ``fields``: optional projection, as for the list endpoint.
+    """
+    search_query = request.args.get('search', '').strip().lower()
     strength_filter = request.args.get('strength', 'all').lower()
+    reused_only = request.args.get('reused', '').lower() in ('true', '1')
 
-    entries = PasswordEntry.query.filter_by(user_id=current_user.user_id).all()
+    if request.args.get('fields'):
+        fields, errs = parse_fields(request.args.get('fields'))
+        if errs:
+            return jsonify(errors=errs), 400
+    else:
+        fields = PasswordEntry.LIST_FIELDS
+
+    query = PasswordEntry.live(current_user.user_id)
+    if len(search_query) >= search_index.MIN_QUERY_LENGTH:
+        # Blind-index lookup: only entries containing every n-gram of the query are decrypted.
+        query = query.filter(
+            PasswordEntry.entry_id.in_(search_index.candidate_ids(current_user.user_id, search_query))
+        )
+    if strength_filter != 'all':
+        # NULL strength means a row not yet backfilled; it is classified below.
+        query = query.filter(db.or_(
+            PasswordEntry.strength == strength_filter, PasswordEntry.strength.is_(None)
+        ))
+    if reused_only:
+        query = query.filter(
+            PasswordEntry.password_fingerprint.in_(PasswordEntry.reused_fingerprints(current_user.user_id))
+        )
 
     filtered_entries = []
-    for entry in entries:
-        website = entry.get_website().lower()
-        username = entry.get_username().lower()
-        password = entry.get_password()
+    for entry in PasswordEntry.decrypt_all(query.order_by(PasswordEntry.entry_id).all()):
+        # The index can over-match (n-grams spread across fields), so confirm on plaintext.
+        if search_query and (
+            search_query not in entry.get_website().lower()
+            and search_query not in entry.get_username().lower()
+        ):
+            continue
 
-        matches_search = search_query in website or search_query in username
+        strength = entry.get_strength()
+        if strength_filter != 'all' and strength != strength_filter:
+            continue
 
-        # Calculate strength using backend logic (assuming is_strong_password exists)
-        from .validation import is_strong_password
-        strength = 'strong' if is_strong_password(password) else 'weak'
+        entry_dict = entry.to_dict(fields)
+        entry_dict['password_strength'] = strength
+        filtered_entries.append(entry_dict)
 
-        matches_strength = (
-            strength_filter == 'all' or strength == strength_filter
-        )
+    return jsonify(filtered_entries), 200
 
-        if matches_search and matches_strength:
-            entry_dict = entry.to_dict()
-            entry_dict['password_strength'] = strength
-            filtered_entries.append(entry_dict)
 
-    return jsonify(filtered_entries), 200
+@bp.route('/api/health', methods=['GET'])
+@login_required
+@limiter.limit("10 per minute")
+@revalidated
+def api_health():
+    """
+    Vault health report: weak, reused, username-equals-password and duplicate-username
+    findings, as entry ids. Rows are streamed in batches, and usernames are compared
+    through the same keyed fingerprint as the stored password fingerprints.
+    """
+    user_id = current_user.user_id
+    batches = db.session.scalars(
+        db.select(PasswordEntry)
+        .options(load_only(
+            PasswordEntry.entry_id, PasswordEntry.user_id, PasswordEntry.record, PasswordEntry.username,
+            PasswordEntry.password, PasswordEntry.strength, PasswordEntry.password_fingerprint
+        ))
+        .filter_by(user_id=user_id, deleted_at=None)
+        .order_by(PasswordEntry.entry_id)
+        .execution_options(yield_per=HEALTH_BATCH_SIZE)
+    ).partitions()
+
+    health = VaultHealth()
+    for batch in batches:
+        for entry in PasswordEntry.decrypt_all(batch):
+            fingerprint = entry.password_fingerprint or password_fingerprint(user_id, entry.get_password())
+            health.add(
+                entry.entry_id,
+                password_fingerprint(user_id, entry.get_username()),
+                fingerprint,
+                entry.get_strength()
+            )
+
+    return jsonify(health.report()), 200
+
+
+@bp.route('/api/import', methods=['POST'])
+@login_required
+@csrf.exempt
+@limiter.limit("5 per minute")
+def api_import():
+    """
+    Bulk import from CSV, JSON or NDJSON (see vault_io), sent either as a
+    multipart ``file`` upload or as the raw request body. Rows are validated
+    with validate_vault_entry, sealed in batches and committed per chunk;
+    invalid rows are skipped and reported.
+    """
+    request.max_content_length = current_app.config['VAULT_IMPORT_MAX_BYTES']
+
+    upload = request.files.get('file')
+    if upload:
+        stream, filename, content_type = upload.stream, upload.filename, upload.content_type
+    else:
+        stream, filename, content_type = request.stream, None, request.content_type
+
+    imported = 0
+    errors = []
+    try:
+        fmt = vault_io.detect_format(request.args.get('format'), filename, content_type)
+        rows = vault_io.parse(stream, fmt)
+
+        for chunk in vault_io.chunked(rows, IMPORT_CHUNK_SIZE):
+            valid = []
+            for number, row in chunk:
+                row = {name: value.strip() for name, value in row.items()}
+                errs = validate_vault_entry(row['website'], row['username'], row['password'])
+                if errs:
+                    errors.append({'row': number, 'errors': errs})
+                else:
+                    valid.append(row)
+            if not valid:
+                continue
+
+            revision = User.next_revision(current_user.user_id)
+            entries = PasswordEntry.build_many(current_user.user_id, valid, revision)
+            db.session.add_all(entries)
+            db.session.flush()
+            search_index.index_new_entries(entries)
+            db.session.commit()
+            imported += len(entries)
+    except vault_io.ImportFormatError as e:
+        db.session.rollback()
+        # Chunks committed before the parse error stay imported
+        return jsonify(errors={'file': str(e)}, imported=imported), 400
+
+    log_vault_import(current_user.username, imported, len(errors))
+    return jsonify({
+        'imported': imported,
+        'skipped': len(errors),
+        'errors': errors[:MAX_REPORTED_IMPORT_ERRORS],
+    }), 200
+
+
+@bp.route('/api/export', methods=['GET'])
+@login_required
+@limiter.limit("5 per minute")
+def api_export():
+    """
+    Stream the vault as NDJSON (default) or Chrome-style CSV. Rows are read with
+    yield_per and decrypted batch by batch, so memory use does not grow with
+    vault size.
+    """
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify(errors={'format': "Format must be 'ndjson' or 'csv'."}), 400
+
+    user_id = current_user.user_id
+    log_vault_export(current_user.username, fmt)
+
+    def generate():
+        if fmt == 'csv':
+            yield vault_io.csv_line(vault_io.EXPORT_CSV_HEADER)
+        serialize = vault_io.csv_entry_line if fmt == 'csv' else vault_io.ndjson_line
+
+        batches = db.session.scalars(
+            db.select(PasswordEntry)
+            .filter_by(user_id=user_id, deleted_at=None)
+            .order_by(PasswordEntry.entry_id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ).partitions()
+        for batch in batches:
+            yield ''.join(serialize(entry) for entry in PasswordEntry.decrypt_all(batch))
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    filename = f"dunkey-vault.{'csv' if fmt == 'csv' else 'ndjson'}"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,145 @@
+"""
+Connection pool instrumentation.
+
+PoolStats listens to SQLAlchemy pool events (connect, close, checkout, checkin,
+invalidate) to count connection churn and checked-out connections. Checkout wait
+time is not covered by any pool event, so engines built with
+InstrumentedQueuePool (see db_profiles.py) also time each wait for a connection.
+"""
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0          # new DBAPI connections opened
+        self.closes = 0            # DBAPI connections closed (recycled, invalidated, overflow returned)
+        self.invalidations = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def attach(self, pool):
+        """Listen to ``pool`` (listeners carry over when the engine recreates its pool)."""
+        event.listen(pool, 'connect', self._on_connect)
+        event.listen(pool, 'close', self._on_close)
+        event.listen(pool, 'close_detached', self._on_close)
+        event.listen(pool, 'invalidate', self._on_invalidate)
+        event.listen(pool, 'checkout', self._on_checkout)
+        event.listen(pool, 'checkin', self._on_checkin)
+        if isinstance(pool, InstrumentedQueuePool):
+            pool.stats = self
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_close(self, dbapi_connection, *args):
+        with self._lock:
+            self.closes += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        """Counters plus the pool's own view of its size and overflow."""
+        with self._lock:
+            data = {
+                'connects': self.connects,
+                'closes': self.closes,
+                'invalidations': self.invalidations,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'wait': {
+                    'count': self.waits,
+                    'total_ms': round(self.wait_total * 1000, 3),
+                    'avg_ms': round(self.wait_total * 1000 / self.waits, 3) if self.waits else 0.0,
+                    'max_ms': round(self.wait_max * 1000, 3),
+                    'timeouts': self.timeouts,
+                },
+            }
+        data['pool'] = {'class': type(pool).__name__, 'status': pool.status()}
+        if isinstance(pool, QueuePool):
+            data['pool'].update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+                max_overflow=pool._max_overflow,
+                timeout=pool.timeout(),
+            )
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that reports how long each checkout waited for a connection
+    (queueing for a free one, plus opening it when the pool grows).
+    """
+
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def init_app(app, db):
+    """Attach a PoolStats to every engine of ``db`` for this app."""
+    stats = {}
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            pool_stats = PoolStats()
+            pool_stats.attach(engine.pool)
+            stats[bind_key or 'default'] = (engine, pool_stats)
+    app.extensions['pool_stats'] = stats
+
+
+def report(app) -> dict:
+    return {
+        name: pool_stats.snapshot(engine.pool)
+        for name, (engine, pool_stats) in app.extensions.get('pool_stats', {}).items()
+    }
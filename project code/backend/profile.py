@@ -1,9 +1,12 @@
-from flask import Blueprint, current_app, request, redirect, flash, jsonify, send_from_directory, abort
+from flask import Blueprint, current_app, request, redirect, flash, jsonify, send_from_directory, send_file, abort
 from flask_login import login_required, current_user
 from . import db, csrf, limiter
 from werkzeug.utils import secure_filename
 from .logging_utils import log_update_credentials, log_update_password, log_update_email
 from .model import User
+from .user_cache import user_cache
+from .conditional import revalidated
+from .avatars import avatar_store, is_digest, snap_size, DEFAULT_SIZE
 import os
 
 from .validation import (
@@ -27,7 +30,41 @@ os.makedirs(AVATAR_DIR, exist_ok=True)
 def serve_avatar(filename):
     if filename != current_user.avatar_path:
         abort(403)  # Forbidden
-    return send_from_directory(AVATAR_DIR, filename)
+    if not is_digest(filename):
+        # Legacy upload stored as a single file
+        return send_from_directory(AVATAR_DIR, filename)
+
+    size = snap_size(request.args.get('size', DEFAULT_SIZE))
+    fmt = 'webp' if request.accept_mimetypes['image/webp'] else 'png'
+    path, mimetype, final = avatar_store.variant_path(filename, size, fmt)
+    if path is None:
+        abort(404)
+
+    # Variants are content-addressed, so the digest identifies the bytes
+    etag = f"{filename}-{size}.{fmt}" if final else f"{filename}-source"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = send_file(path, mimetype=mimetype, etag=False, conditional=False, max_age=None)
+    response.set_etag(etag)
+    # The original is only a stand-in until the variants are rendered
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable' if final else 'private, no-cache'
+    response.vary.add('Accept')
+    return response
+
+
+def discard_avatar(avatar_path: str):
+    """
+    Remove a replaced avatar's files. Content-addressed avatars may be shared, or
+    about to be referenced by an upload that has not committed yet, so they are
+    left to the maintenance sweep (AvatarStore.sweep).
+    """
+    if is_digest(avatar_path):
+        return
+    old_avatar_path = os.path.join(AVATAR_DIR, avatar_path)
+    if os.path.exists(old_avatar_path):
+        os.remove(old_avatar_path)
+
 
 @profile_bp.route('/upload-avatar', methods=['POST'])
 @login_required
@@ -42,27 +79,26 @@ def upload_avatar():
         flash('No file selected.', 'error')
         return redirect('/profile.html')
 
-    #  Validate avatar and generate safe filename
+    #  Validate avatar (type, size, decodable image)
     try:
-        filename = validate_avatar(file, current_user.user_id)
+        validate_avatar(file, current_user.user_id)
     except ValueError as e:
         flash(str(e), 'error')
         return redirect('/profile.html')
 
-    #  Delete old avatar if it exists
-    if current_user.avatar_path:
-        old_avatar_path = os.path.join(AVATAR_DIR, current_user.avatar_path)
-        if os.path.exists(old_avatar_path):
-            os.remove(old_avatar_path)
-
-    #  Save the new avatar
-    os.makedirs(AVATAR_DIR, exist_ok=True)
-    file_path = os.path.join(AVATAR_DIR, filename)
-    file.save(file_path)
+    #  Store the original; resized variants are rendered in the background
+    digest = avatar_store.store(file.read())
 
     #  Update database
-    current_user.avatar_path = filename
+    old_avatar = current_user.avatar_path
+    current_user.avatar_path = digest
+    User.bump_revision(current_user.user_id)
     db.session.commit()
+    user_cache.bump(current_user.user_id)
+
+    #  Delete the old avatar (legacy files only; digests are swept)
+    if old_avatar and old_avatar != digest:
+        discard_avatar(old_avatar)
 
     flash('Avatar uploaded successfully.', 'success')
     return redirect('/profile.html')
@@ -75,11 +111,14 @@ def profile_page():
 
 @profile_bp.route('/api', methods=['GET'])
 @login_required
+@revalidated
 def api_profile():
     return jsonify({
         'username': current_user.username,
         'email': current_user.email,
-        'avatar_path': current_user.avatar_path or 'avatars/default.png'
+        'avatar_path': current_user.avatar_path or 'avatars/default.png',
+        'avatar_url': (f"/profile/avatars/{current_user.avatar_path}?size={DEFAULT_SIZE}"
+                       if is_digest(current_user.avatar_path) else None)
     }), 200
 
 @profile_bp.route('/update-credentials', methods=['POST'])
@@ -96,6 +135,7 @@ def update_credentials():
         flash('You must confirm changes.', 'error')
         return redirect('/profile.html')
 
+    old_email = current_user.email
     if new_username and new_username != current_user.username:
         exists = db.session.query(
             db.exists().where(db.func.lower(User.username) == new_username.lower())
@@ -111,11 +151,12 @@ def update_credentials():
             return redirect('/profile.html')
         current_user.email = new_email
 
+    # One transaction: the revision bump commits with the change it invalidates
+    User.bump_revision(current_user.user_id)
     db.session.commit()
-    old_email = current_user.email
-    current_user.email = new_email
-    db.session.commit()
-    log_update_email(current_user.username, old_email, new_email)
+    user_cache.bump(current_user.user_id)
+    if current_user.email != old_email:
+        log_update_email(current_user.username, old_email, current_user.email)
     log_update_credentials(current_user.username)
     flash('Profile updated successfully.', 'success')
     return redirect('/profile.html')
@@ -144,7 +185,9 @@ def change_password():
         return redirect('/profile.html')
 
     current_user.set_login_password(new_pw)
+    User.bump_revision(current_user.user_id)
     db.session.commit()
+    user_cache.bump(current_user.user_id)
     log_update_password(current_user.username)
     flash('Password changed successfully.', 'success')
     return redirect('/profile.html')
@@ -206,6 +249,7 @@ def upload_avatar():
 
 @profile_bp.route('/dark-mode', methods=['GET'])
 @login_required
+@revalidated
 def get_dark_mode():
     return jsonify({'dark_mode': current_user.prefers_dark_mode})
 
@@ -216,5 +260,7 @@ def get_dark_mode():
 def set_dark_mode():
     preference = request.json.get('dark_mode', False)
     current_user.prefers_dark_mode = bool(preference)
+    User.bump_revision(current_user.user_id)
     db.session.commit()
+    user_cache.bump(current_user.user_id)
     return jsonify({'status': 'success', 'dark_mode': current_user.prefers_dark_mode})
@@ -0,0 +1,150 @@
+"""
+Rate-limit storage shared by every worker process on a host, without Redis.
+
+Counters live in a local SQLite file (WAL mode) and every update is a single
+UPSERT ... RETURNING statement, so concurrent processes never lose increments.
+It implements the fixed-window and sliding-window-counter interfaces of the
+``limits`` package and registers itself for ``dunkey+sqlite:///path/to.db``
+storage URIs, so Flask-Limiter can use it through RATELIMIT_STORAGE_URI.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from limits.storage import Storage, SlidingWindowCounterSupport
+from limits.storage.base import TimestampedSlidingWindow
+
+# Expired rows are deleted every PURGE_EVERY increments
+PURGE_EVERY = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit_counters (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    STORAGE_SCHEME = ['dunkey+sqlite']
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        self.path = uri.split('://', 1)[1] or ':memory:'
+        if self.path.startswith('/') and self.path != '/':
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._increments = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit: each statement below is atomic on its own
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        (value,) = self._conn().execute(
+            """
+            INSERT INTO rate_limit_counters (key, value, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END,
+                expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+            RETURNING value
+            """,
+            (key, amount, now + expiry, now, now),
+        ).fetchone()
+
+        self._increments += 1
+        if self._increments % PURGE_EVERY == 0:
+            self._conn().execute('DELETE FROM rate_limit_counters WHERE expires_at <= ?', (now,))
+        return value
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        row = self._conn().execute(
+            """
+            UPDATE rate_limit_counters SET value = MAX(value - ?, 0)
+            WHERE key = ? AND expires_at > ?
+            RETURNING value
+            """,
+            (amount, key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key: str) -> int:
+        row = self._conn().execute(
+            'SELECT value FROM rate_limit_counters WHERE key = ? AND expires_at > ?',
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._conn().execute(
+            'SELECT expires_at FROM rate_limit_counters WHERE key = ? AND expires_at > ?',
+            (key, now),
+        ).fetchone()
+        return row[0] if row else now
+
+    def clear(self, key: str) -> None:
+        self._conn().execute('DELETE FROM rate_limit_counters WHERE key = ?', (key,))
+
+    def reset(self) -> int:
+        return self._conn().execute('DELETE FROM rate_limit_counters').rowcount
+
+    def check(self) -> bool:
+        try:
+            self._conn().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    # Sliding window counter: weighted previous window + current window,
+    # the same algorithm as limits' own storages.
+
+    def _window_info(self, previous_key: str, current_key: str, expiry: int, now: float):
+        previous_count = self.get(previous_key)
+        current_count = self.get(current_key)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key: str, expiry: int):
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._window_info(previous_key, current_key, expiry, now)
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count, previous_ttl, current_count, _ = self._window_info(
+            previous_key, current_key, expiry, now)
+        weighted = previous_count * previous_ttl / expiry + current_count
+        if math.floor(weighted) + amount > limit:
+            return False
+
+        current_count = self.incr(current_key, 2 * expiry, amount=amount)
+        weighted = previous_count * previous_ttl / expiry + current_count
+        if math.floor(weighted) > limit:
+            # Another process took the last slot between our read and increment
+            self.decr(current_key, amount)
+            return False
+        return True
@@ -0,0 +1,65 @@
+"""
+In-place schema upgrades for existing databases.
+
+``db.create_all()`` creates missing tables but never alters a table that already
+exists, so columns and indexes added to existing tables are listed here and added
+with ALTER TABLE / CREATE INDEX. The DDL is compiled from the models for the
+connected dialect (MySQL in production, SQLite in tests), and every step checks
+the live schema first, so an upgrade can be re-run at any time.
+
+Run it before deploying code that reads the new columns and before the backfill:
+``python maintenance.py upgrade`` (``--dry-run`` prints the statements instead,
+e.g. for a DBA to apply by hand). backfill_vault.py, rotate_keys.py and
+``maintenance.py seed`` upgrade the schema themselves.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from . import db
+from .model import User, PasswordEntry
+
+# (feature, model, columns added to its table, indexes added to its table), oldest first
+SCHEMA_UPGRADES = [
+    ('sealed records', PasswordEntry, ['record'], []),
+    ('strength and reuse fingerprints', PasswordEntry, ['strength', 'password_fingerprint'],
+     ['ix_password_entries_user_strength', 'ix_password_entries_user_fingerprint']),
+    ('vault revisions', User, ['vault_revision'], []),
+    ('change feed and tombstones', PasswordEntry, ['revision', 'updated_at', 'deleted_at'],
+     ['ix_password_entries_user_revision']),
+]
+
+
+def pending_statements(engine) -> list:
+    """DDL statements still missing from the database behind ``engine``, in order."""
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    statements = []
+    for _, model, columns, indexes in SCHEMA_UPGRADES:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue  # create_all builds it complete
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for name in columns:
+            if name not in existing_columns:
+                column_ddl = CreateColumn(table.c[name]).compile(dialect=engine.dialect)
+                statements.append(f"ALTER TABLE {quote(table.name)} ADD COLUMN {column_ddl}")
+        for index in table.indexes:
+            if index.name in indexes and index.name not in existing_indexes:
+                statements.append(str(CreateIndex(index).compile(dialect=engine.dialect)))
+    return statements
+
+
+def upgrade_schema(dry_run: bool = False) -> list:
+    """
+    Create missing tables, then add missing columns and indexes to existing ones.
+    Returns the ALTER / CREATE INDEX statements that were (or, with dry_run,
+    would be) executed.
+    """
+    statements = pending_statements(db.engine)
+    if dry_run:
+        return statements
+    with db.engine.begin() as connection:
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+    db.create_all()
+    return statements
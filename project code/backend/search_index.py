@@ -0,0 +1,107 @@
+"""
+Blind index for vault search.
+
+Website and username are split into lowercase 2- and 3-grams, and every gram
+is stored as an HMAC token keyed per user, so the database can answer substring
+searches without ever seeing plaintext. Candidates found through the index are
+decrypted and re-checked, which removes the false positives of n-gram matching.
+Single-character queries match most of a vault anyway and are not indexed.
+"""
+import hmac
+import hashlib
+from sqlalchemy import func, select
+from . import db
+from .crypto import derive_key
+from .model import EntrySearchToken
+
+NGRAM_SIZES = (2, 3)
+MIN_QUERY_LENGTH = min(NGRAM_SIZES)
+MAX_INDEXED_LENGTH = 128  # characters per field; longer values are truncated for indexing
+TOKEN_HEX_LENGTH = 32
+
+
+def _tokens(user_id: int, grams) -> set:
+    # HMAC(key, "<user_id>:<gram>"), reusing the keyed state of the user prefix
+    base = hmac.new(derive_key('dunkey-search-index'), f"{user_id}:".encode('utf-8'), hashlib.sha256)
+    tokens = set()
+    for gram in grams:
+        digest = base.copy()
+        digest.update(gram.encode('utf-8'))
+        tokens.add(digest.hexdigest()[:TOKEN_HEX_LENGTH])
+    return tokens
+
+
+def _ngrams(text: str, n: int) -> set:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def entry_tokens(user_id: int, *values: str) -> set:
+    """All index tokens for the given plaintext field values."""
+    grams = set()
+    for value in values:
+        text = value.lower()[:MAX_INDEXED_LENGTH]
+        for n in NGRAM_SIZES:
+            grams.update(_ngrams(text, n))
+    return _tokens(user_id, grams)
+
+
+def query_tokens(user_id: int, query: str) -> set:
+    """Tokens an entry must contain to possibly match ``query`` (at least MIN_QUERY_LENGTH chars)."""
+    text = query.lower()
+    n = min(len(text), max(NGRAM_SIZES))
+    return _tokens(user_id, _ngrams(text, n))
+
+
+def index_entry(entry, website: str, username: str):
+    """(Re)build the tokens of one entry. The entry must already have an id (flush first)."""
+    reindex(entry.user_id, entry.entry_id, website, username)
+
+
+def reindex(user_id: int, entry_id: int, website: str, username: str):
+    """index_entry by id, for writes that do not load the entry."""
+    remove_entry(entry_id)
+    tokens = entry_tokens(user_id, website, username)
+    if tokens:
+        db.session.execute(
+            EntrySearchToken.__table__.insert(),
+            [{'entry_id': entry_id, 'user_id': user_id, 'token': t} for t in tokens]
+        )
+
+
+def index_new_entries(entries):
+    """Insert tokens for freshly flushed entries (no previous tokens) in one statement."""
+    rows = [
+        {'entry_id': entry.entry_id, 'user_id': entry.user_id, 'token': token}
+        for entry in entries
+        for token in entry_tokens(entry.user_id, entry.get_website(), entry.get_username())
+    ]
+    if rows:
+        db.session.execute(EntrySearchToken.__table__.insert(), rows)
+
+
+def remove_entry(entry_id: int):
+    db.session.execute(
+        EntrySearchToken.__table__.delete().where(EntrySearchToken.entry_id == entry_id)
+    )
+
+
+def remove_entries(entry_ids: list):
+    """Drop the tokens of many entries in one statement."""
+    if entry_ids:
+        db.session.execute(
+            EntrySearchToken.__table__.delete().where(EntrySearchToken.entry_id.in_(entry_ids))
+        )
+
+
+def candidate_ids(user_id: int, query: str):
+    """
+    Subquery of entry ids whose index contains every token of ``query``.
+    Matches still have to be confirmed against the decrypted values.
+    """
+    tokens = query_tokens(user_id, query)
+    return (
+        select(EntrySearchToken.entry_id)
+        .where(EntrySearchToken.user_id == user_id, EntrySearchToken.token.in_(tokens))
+        .group_by(EntrySearchToken.entry_id)
+        .having(func.count(func.distinct(EntrySearchToken.token)) == len(tokens))
+    )
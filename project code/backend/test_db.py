@@ -1,5 +1,5 @@
 from backend import create_app, db
-app = create_app()
+app = create_app(web=False)
 
 with app.app_context():
     try:
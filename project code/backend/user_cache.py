@@ -0,0 +1,76 @@
+"""
+Per-process cache for the Flask-Login user loader.
+
+Column values of recently loaded users are kept with a TTL and a per-user
+version stamp; writes to a user row call ``bump`` to invalidate it. On a hit the
+row is rebuilt as a detached instance and merged into the session without a
+database round trip. Other processes only see a bump once their TTL expires, so
+the TTL bounds cross-process staleness.
+"""
+import threading
+import time
+from sqlalchemy.orm import make_transient_to_detached
+from . import db
+
+
+class UserCache:
+    def __init__(self, ttl: float = 30.0):
+        self._lock = threading.Lock()
+        self._rows = {}       # user_id -> (expires_at, version, column values)
+        self._versions = {}   # user_id -> version stamp
+        self.ttl = ttl
+        self.hits = 0         # database lookups avoided
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.ttl = float(app.config.get('USER_CACHE_TTL', 30))
+        with self._lock:
+            self._rows.clear()
+
+    def load(self, user_id: int):
+        from .model import User
+
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+            cached = self._rows.get(user_id)
+            if cached and cached[0] > time.monotonic() and cached[1] == version:
+                self.hits += 1
+                values = cached[2]
+            else:
+                self.misses += 1
+                values = None
+
+        if values is not None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        user = db.session.get(User, user_id)
+        if user is not None and self.ttl > 0:
+            values = {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+            with self._lock:
+                # Only store if no bump happened while we were reading
+                if self._versions.get(user_id, 0) == version:
+                    self._rows[user_id] = (time.monotonic() + self.ttl, version, values)
+        return user
+
+    def bump(self, user_id: int):
+        """Invalidate a user's cached row after it was written."""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._rows.pop(user_id, None)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._rows),
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+            }
+
+
+user_cache = UserCache()
@@ -1,13 +1,12 @@
 import re
 from werkzeug.utils import secure_filename
-from PIL import Image
 from io import BytesIO
 import os
 from mimetypes import guess_type
-import filetype
 
 # General Validation Configs
 MAX_AVATAR_SIZE = 512 * 1024  # 512 KB
+MAX_AVATAR_PIXELS = 4096 * 4096  # guards the decoder against decompression bombs
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
 
@@ -26,6 +25,10 @@ def is_strong_password(password: str) -> bool:
         r'(?=.*[A-Z])(?=.*[a-z])(?=.*\d)(?=.*[\W_]).{8,}', password
     ))
 
+def password_strength(password: str) -> str:
+    """Strength class stored with vault entries: 'strong' or 'weak'."""
+    return 'strong' if is_strong_password(password) else 'weak'
+
 
 # Password Change Validation
 def validate_password_change(
@@ -35,11 +38,11 @@ def validate_password_change(
     stored_hash: str
 ) -> dict:
     """Validate password change process."""
-    from werkzeug.security import check_password_hash
+    from .hashing import hashing
 
     errors = {}
 
-    if not old_password or not check_password_hash(stored_hash, old_password):
+    if not old_password or not hashing.verify(stored_hash, old_password):
         errors['old_password'] = 'Current password is incorrect.'
 
     if new_password != confirm_password:
@@ -79,6 +82,13 @@ def validate_vault_entry(entry_website: str, entry_username: str, entry_password
         errors['entry_password'] = 'Entry password is required.'
     return errors
 
+def validate_vault_patch(values: dict) -> dict:
+    """validate_vault_entry for a partial update: fields that are not supplied are kept as stored."""
+    if not values:
+        return {'fields': 'Supply at least one of website, username and password.'}
+    kept = 'unchanged'
+    return validate_vault_entry(values.get('website', kept), values.get('username', kept), values.get('password', kept))
+
 def validate_vault_password_confirm(password: str, confirm_password: str) -> dict:
     errors = {}
     if password != confirm_password:
@@ -116,6 +126,19 @@ def validate_avatar(file_storage, user_id: int) -> str:
     if not mime_type or not mime_type.startswith('image/'):
         raise ValueError('Invalid image content type.')
 
+    # Content Validation: must actually decode as an image of sane dimensions
+    from PIL import Image  # only avatar uploads need the image decoder
+    try:
+        with Image.open(file_storage.stream) as image:
+            width, height = image.size
+            image.verify()
+    except Exception:
+        raise ValueError('File is not a valid image.')
+    finally:
+        file_storage.seek(0)
+    if width * height > MAX_AVATAR_PIXELS:
+        raise ValueError('Avatar dimensions are too large.')
+
     # Generate unique, safe filename (e.g., 15_avatar.png)
     unique_filename = f"{user_id}_avatar.{ext}"
     return unique_filename
@@ -123,25 +146,19 @@ def validate_avatar(file_storage, user_id: int) -> str:
     #This is used to validate vault entries for their sgrength and find  entries with same username/ same password
 
 def flag_weak_entries(entries: list[dict]) -> list[dict]:
-    flagged_entries = []
-    passwords = [e['password'] for e in entries]
-    usernames = [e['username'] for e in entries]
-
-    for entry in entries:
-        username = entry['username']
-        password = entry['password']
-
-        is_weak = (
-            not is_strong_password(password) or
-            username == password or
-            passwords.count(password) > 1 or
-            usernames.count(username) > 1
-        )
-
-        flagged_entries.append({
-            'username': username,
-            'password': password,
-            'is_weak': is_weak
-        })
-
-    return flagged_entries
+    """Flag weak, reused and duplicate entries in a single linear pass (see health.VaultHealth)."""
+    from .health import VaultHealth
+
+    health = VaultHealth()
+    for index, entry in enumerate(entries):
+        health.add(index, entry['username'], entry['password'], password_strength(entry['password']))
+    flagged = health.flagged_ids()
+
+    return [
+        {
+            'username': entry['username'],
+            'password': entry['password'],
+            'is_weak': index in flagged
+        }
+        for index, entry in enumerate(entries)
+    ]
@@ -0,0 +1,109 @@
+"""
+Bounded in-process cache of decrypted vault records.
+
+Opt-in (VAULT_PLAINTEXT_CACHE_SIZE > 0). Entries are keyed by user, entry id and
+a digest of the ciphertext, so a rewritten record can never be served stale,
+and are evicted by LRU order, TTL, and explicitly per user on logout and on
+every vault write.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class PlaintextCache:
+    def __init__(self, max_entries: int = 0, ttl: float = 300.0):
+        self._lock = threading.Lock()
+        self._items = OrderedDict()   # key -> (expires_at, fields)
+        self._by_user = {}            # user_id -> set of keys
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        self.configure(
+            app.config.get('VAULT_PLAINTEXT_CACHE_SIZE', 0),
+            app.config.get('VAULT_PLAINTEXT_CACHE_TTL', 300)
+        )
+
+    def configure(self, max_entries: int, ttl: float):
+        with self._lock:
+            self.max_entries = int(max_entries)
+            self.ttl = float(ttl)
+            self._clear_locked()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def _key(user_id: int, entry_id: int, ciphertext: bytes):
+        return (user_id, entry_id, hashlib.sha256(ciphertext).digest()[:16])
+
+    def get(self, user_id: int, entry_id: int, ciphertext: bytes):
+        """Return a copy of the cached fields, or None."""
+        if not self.enabled:
+            return None
+        key = self._key(user_id, entry_id, ciphertext)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    self._remove_locked(key)
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return dict(item[1])
+
+    def put(self, user_id: int, entry_id: int, ciphertext: bytes, fields: dict):
+        if not self.enabled or entry_id is None:
+            return
+        key = self._key(user_id, entry_id, ciphertext)
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, dict(fields))
+            self._items.move_to_end(key)
+            self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._items) > self.max_entries:
+                oldest = next(iter(self._items))
+                self._remove_locked(oldest)
+                self.evictions += 1
+
+    def evict_user(self, user_id: int):
+        """Drop every cached record of one user (logout, vault writes)."""
+        with self._lock:
+            for key in self._by_user.pop(user_id, ()):
+                self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'size': len(self._items),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _remove_locked(self, key):
+        self._items.pop(key, None)
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+    def _clear_locked(self):
+        self._items.clear()
+        self._by_user.clear()
+
+
+plaintext_cache = PlaintextCache()
@@ -0,0 +1,182 @@
+"""
+Vault import/export formats.
+
+Parsers are generators yielding ``(row_number, {'website', 'username', 'password'})``
+so imports can be validated and committed in chunks. Supported inputs:
+- CSV with Chrome (name,url,username,password), Bitwarden (login_uri,
+  login_username,login_password) or DunKey (website,username,password) headers
+- Bitwarden JSON exports ({"items": [...]}) and plain JSON lists
+- NDJSON, one entry per line (the export format)
+"""
+import csv
+import codecs
+import io
+import json
+from itertools import islice
+
+FORMATS = ('csv', 'json', 'ndjson')
+
+# Header aliases, most specific first
+WEBSITE_COLUMNS = ('website', 'url', 'login_uri', 'uri', 'name')
+USERNAME_COLUMNS = ('username', 'login_username', 'user', 'login')
+PASSWORD_COLUMNS = ('password', 'login_password')
+
+EXPORT_CSV_HEADER = ('name', 'url', 'username', 'password')  # Chrome-compatible
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file could not be parsed in the requested format."""
+
+
+def detect_format(requested, filename, content_type) -> str:
+    if requested:
+        fmt = requested.lower()
+    elif filename and '.' in filename:
+        fmt = filename.rsplit('.', 1)[1].lower()
+    elif content_type and 'csv' in content_type:
+        fmt = 'csv'
+    elif content_type and 'ndjson' in content_type:
+        fmt = 'ndjson'
+    else:
+        fmt = 'json'
+    if fmt == 'jsonl':
+        fmt = 'ndjson'
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unsupported import format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+    return fmt
+
+
+def _pick(row: dict, columns) -> str:
+    for column in columns:
+        value = row.get(column)
+        if value:
+            return str(value)
+    return ''
+
+
+def _normalize(row: dict) -> dict:
+    row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    return {
+        'website': _pick(row, WEBSITE_COLUMNS),
+        'username': _pick(row, USERNAME_COLUMNS),
+        'password': _pick(row, PASSWORD_COLUMNS),
+    }
+
+
+def _bitwarden_item(number: int, item: dict) -> dict:
+    login = item.get('login') or {}
+    if not isinstance(login, dict):
+        raise ImportFormatError(f"Item {number}: login is not an object.")
+    uris = login.get('uris') or []
+    if not isinstance(uris, list) or not all(isinstance(uri, dict) for uri in uris):
+        raise ImportFormatError(f"Item {number}: login.uris must be a list of objects.")
+    row = {
+        'website': (uris[0].get('uri') if uris else '') or item.get('name') or '',
+        'username': login.get('username') or '',
+        'password': login.get('password') or '',
+    }
+    for name, value in row.items():
+        if not isinstance(value, str):
+            raise ImportFormatError(f"Item {number}: {name} must be a string.")
+    return row
+
+
+def _text_lines(stream):
+    """Decode a binary stream line by line without reading it all into memory."""
+    if isinstance(stream, io.RawIOBase):
+        # e.g. the raw request body: buffer it so readline does not read in tiny pieces
+        stream = io.BufferedReader(stream)
+    return codecs.iterdecode(stream, 'utf-8-sig')
+
+
+def parse_csv(stream):
+    # strict: an unterminated quote is an error, not one field swallowing the rest of the file
+    reader = csv.DictReader(_text_lines(stream), strict=True)
+    number = 1  # row 1 is the header
+    try:
+        for number, row in enumerate(reader, start=2):
+            yield number, _normalize(row)
+    except UnicodeDecodeError as e:
+        raise ImportFormatError(f"File is not valid UTF-8 (after row {number}): {e}")
+    except csv.Error as e:
+        raise ImportFormatError(f"Invalid CSV at row {number + 1}: {e}")
+
+
+def parse_ndjson(stream):
+    number = 0
+    try:
+        for number, line in enumerate(_text_lines(stream), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ImportFormatError(f"Invalid JSON on line {number}: {e}")
+            if not isinstance(row, dict):
+                raise ImportFormatError(f"Line {number} is not an object.")
+            yield number, _normalize(row)
+    except UnicodeDecodeError as e:
+        raise ImportFormatError(f"File is not valid UTF-8 (after line {number}): {e}")
+
+
+def parse_json(stream):
+    try:
+        # A JSON document has to be read whole; its size is capped by the request limit.
+        data = json.loads(stream.read().decode('utf-8-sig'))
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ImportFormatError(f"Invalid JSON: {e}")
+
+    if isinstance(data, dict) and 'items' in data:
+        if not isinstance(data['items'], list):
+            raise ImportFormatError("Bitwarden export: items must be a list.")
+        for number, item in enumerate(data['items'], start=1):
+            if not isinstance(item, dict):
+                raise ImportFormatError(f"Item {number} is not an object.")
+            # Only login items (type 1) carry credentials
+            if item.get('type', 1) == 1:
+                yield number, _bitwarden_item(number, item)
+    elif isinstance(data, list):
+        for number, row in enumerate(data, start=1):
+            if not isinstance(row, dict):
+                raise ImportFormatError(f"Entry {number} is not an object.")
+            yield number, _normalize(row)
+    else:
+        raise ImportFormatError("Expected a list of entries or a Bitwarden export.")
+
+
+PARSERS = {'csv': parse_csv, 'json': parse_json, 'ndjson': parse_ndjson}
+
+
+def parse(stream, fmt: str):
+    return PARSERS[fmt](stream)
+
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# --- Export ---
+
+def ndjson_line(entry) -> str:
+    return json.dumps({
+        'entry_id': entry.entry_id,
+        'website': entry.get_website(),
+        'username': entry.get_username(),
+        'password': entry.get_password(),
+    }) + '\n'
+
+
+def csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def csv_entry_line(entry) -> str:
+    website = entry.get_website()
+    return csv_line((website, website, entry.get_username(), entry.get_password()))
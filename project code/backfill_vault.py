@@ -0,0 +1,63 @@
+# Rebuilds the blind search index and the stored strength/fingerprint columns
+# for existing vault entries.
+# Safe to re-run: each entry's derived data is replaced, and work is committed in batches.
+
+import argparse
+from dotenv import load_dotenv
+from backend import create_app, db
+from backend.model import PasswordEntry, password_fingerprint
+from backend.validation import password_strength
+from backend import search_index
+from backend.schema import upgrade_schema
+
+
+def backfill(batch_size: int, user_id=None, migrate_records=False):
+    last_id = 0
+    total = 0
+    while True:
+        query = PasswordEntry.query.filter(PasswordEntry.entry_id > last_id, PasswordEntry.deleted_at.is_(None))
+        if user_id is not None:
+            query = query.filter(PasswordEntry.user_id == user_id)
+        batch = query.order_by(PasswordEntry.entry_id).limit(batch_size).all()
+        if not batch:
+            break
+
+        for entry in PasswordEntry.decrypt_all(batch):
+            search_index.index_entry(entry, entry.get_website(), entry.get_username())
+            password = entry.get_password()
+            entry.strength = password_strength(password)
+            entry.password_fingerprint = password_fingerprint(entry.user_id, password)
+            if migrate_records and not entry.record:
+                # Reseal legacy per-column CBC data into a single sealed record
+                entry.set_fields(website=entry.get_website(), username=entry.get_username(), password=password)
+        db.session.commit()
+
+        last_id = batch[-1].entry_id
+        total += len(batch)
+        print(f"Indexed {total} entries (last entry_id={last_id}).")
+
+    return total
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Backfill the vault search index, strength and fingerprints.")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--user-id', type=int, help="Only backfill this user's entries.")
+    parser.add_argument('--migrate-records', action='store_true',
+                        help="Also convert legacy AES-CBC rows to the sealed record format now, "
+                             "instead of lazily on their next write.")
+    args = parser.parse_args()
+
+    app = create_app(web=False)
+    with app.app_context():
+        # Adds the columns the backfill writes (and the token table) to an older database
+        for statement in upgrade_schema():
+            print(f"Schema: {statement}")
+        total = backfill(args.batch_size, args.user_id, args.migrate_records)
+        print(f"Done. {total} vault entries indexed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Benchmark: cold start of the app factory, with a time budget.
+# Run from the project root:  python -m benchmarks.bench_cold_start [--runs 5] [--max-ms 1500]
+#
+# Starts fresh interpreters that import backend and call create_app() (the web
+# app) and create_app(web=False) (the script app the CLIs use), and reports the
+# median and best wall time of each phase. Exits with status 1 when the median
+# web-app start-up exceeds --max-ms, or the script app exceeds --max-script-ms,
+# so it can gate changes that add eager imports. Use tools/profile_startup.py to
+# see which modules are responsible.
+
+import argparse
+import statistics
+import sys
+from tools.profile_startup import run_target
+
+# Start-up budgets (interpreter included), also enforced by tests/test_cold_start.py
+APP_BUDGET_MS = 1500.0
+SCRIPT_APP_BUDGET_MS = 1000.0
+
+
+def measure(target: str, runs: int, database_uri: str) -> dict:
+    totals, phases = [], {}
+    for _ in range(runs):
+        total, run_phases, _ = run_target(target, database_uri)
+        totals.append(total)
+        for name, seconds in run_phases:
+            phases.setdefault(name, []).append(seconds)
+    return {
+        'median_ms': statistics.median(totals) * 1000,
+        'best_ms': min(totals) * 1000,
+        'phases_ms': {name: statistics.median(values) * 1000 for name, values in phases.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for create_app().")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=APP_BUDGET_MS,
+                        help="Budget for the median web-app start-up (interpreter included).")
+    parser.add_argument('--max-script-ms', type=float, default=SCRIPT_APP_BUDGET_MS,
+                        help="Budget for the median script-app start-up.")
+    parser.add_argument('--database-uri', default='sqlite://')
+    args = parser.parse_args()
+
+    failures = []
+    for target, budget in (('app', args.max_ms), ('script-app', args.max_script_ms)):
+        result = measure(target, args.runs, args.database_uri)
+        phases = ', '.join(f"{name} {ms:.0f} ms" for name, ms in result['phases_ms'].items())
+        print(f"{target:<11} median {result['median_ms']:>7.0f} ms  best {result['best_ms']:>7.0f} ms  "
+              f"budget {budget:.0f} ms  ({phases})")
+        if result['median_ms'] > budget:
+            failures.append(target)
+
+    if failures:
+        print(f"OVER BUDGET: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# Benchmark: throughput and latency of the main endpoints at several vault sizes.
+# Run from the project root:  python -m benchmarks.bench_endpoints [--sizes 10 1000 100000]
+#                                 [--threads 4] [--requests 200] [--save-baseline]
+#
+# Builds the app via create_app against a temporary SQLite file, seeds one user
+# per vault size, then drives each endpoint from N threads and records requests/s,
+# p50 and p99. Contact mail goes through the outbox to a local SMTP sink
+# (tools/smtp_sink.py), never to a real relay.
+#
+# Results are written as JSON (--output). When a baseline exists (--baseline),
+# every scenario is compared against it and the run exits with status 1 if
+# p50 latency grew, or throughput fell, by more than --tolerance.
+# --save-baseline stores the current run as the new baseline.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from backend import db, outbox
+from backend.hashing import hashing
+from backend.model import User
+from tools.smtp_sink import SMTPSink
+from .common import make_app, seed_user, login, percentile, BENCH_PASSWORD
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+WARMUP = 5
+
+SCENARIOS = ('login', 'list', 'create', 'update', 'delete', 'sync', 'search', 'profile', 'contact')
+SYNC_WINDOW = 20  # revisions a 'sync' client is behind
+
+
+def _entry(i: int) -> dict:
+    return {'website': f'bench{i}.example.org', 'username': f'user{i}', 'password': f'Bench{i}!pass'}
+
+
+def _requests_for(name: str, app, username: str, created: list):
+    """Return ``fire(client, i) -> status`` for one scenario."""
+    if name == 'login':
+        # A fresh client each time: an authenticated session would skip the password check
+        return lambda client, i: app.test_client().post(
+            '/auth/login', data={'username': username, 'password': BENCH_PASSWORD},
+            headers={'Accept': 'application/json'}).status_code
+    if name == 'list':
+        return lambda client, i: client.get('/passwords/api').status_code
+    if name == 'search':
+        return lambda client, i: client.get(f'/passwords/api/search?search=site{i % 100}').status_code
+    if name == 'sync':
+        # Delta sync a few writes behind: the cost should follow the changes, not the vault size
+        with app.app_context():
+            user_id = db.session.scalar(db.select(User.user_id).filter_by(username=username))
+            since = max(0, User.revision_of(user_id) - SYNC_WINDOW)
+        return lambda client, i: client.get(f'/passwords/api/changes?since={since}').status_code
+    if name == 'profile':
+        return lambda client, i: client.get('/profile/api').status_code
+    if name == 'create':
+        lock = threading.Lock()
+
+        def create(client, i):
+            response = client.post('/passwords/api', json=_entry(i))
+            if response.status_code == 201:
+                with lock:
+                    created.append(response.get_json()['entry_id'])
+            return response.status_code
+        return create
+    if name == 'update':
+        return lambda client, i: client.put(f'/passwords/api/{created[i % len(created)]}',
+                                            json=_entry(i + 1)).status_code
+    if name == 'delete':
+        # Deletes the entries made by the create scenario, so the vault keeps its size
+        return lambda client, i: client.delete(f'/passwords/api/{created.pop()}').status_code
+    if name == 'contact':
+        return lambda client, i: client.post('/contact/send-message', json={
+            'name': username, 'email': f'{username}@bench.local',
+            'message': f'Benchmark message number {i}, please ignore.'}).status_code
+    raise ValueError(name)
+
+
+def run_scenario(app, name: str, username: str, clients: list, requests: int, created: list) -> dict:
+    fire = _requests_for(name, app, username, created)
+    # Warm up caches and connections; deletes have nothing spare to warm up on
+    if name != 'delete':
+        for i in range(WARMUP):
+            fire(clients[0], -1 - i)
+    if name == 'delete':
+        requests = min(requests, len(created))
+
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def one(i):
+        start = time.perf_counter()
+        status = fire(clients[i % len(clients)], i)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    ok = sum(count for status, count in statuses.items() if status < 400)
+    return {
+        'requests': requests,
+        'rps': requests / wall if wall else 0.0,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'errors': requests - ok,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def run(args) -> dict:
+    sink = SMTPSink().start()
+    app = make_app(BCRYPT_LOG_ROUNDS=args.rounds, MAIL_SERVER=sink.host, MAIL_PORT=sink.port,
+                   MAIL_USE_TLS=False, MAIL_PASSWORD=None,
+                   # The contact form sends from and to MAIL_USERNAME (the support mailbox)
+                   MAIL_USERNAME='support@bench.local',
+                   MAIL_DEFAULT_SENDER='bench@bench.local',
+                   # TESTING would otherwise make Flask-Mail drop messages silently
+                   MAIL_SUPPRESS_SEND=False)
+    results = {}
+    try:
+        for size in args.sizes:
+            username = f'vault{size}'
+            seed_start = time.perf_counter()
+            seed_user(app, username, size)
+            print(f"seeded {username} with {size} entries in {time.perf_counter() - seed_start:.1f}s",
+                  file=sys.stderr)
+
+            clients = [login(app, username) for _ in range(args.threads)]
+            created = []
+            for name in args.scenarios:
+                result = run_scenario(app, name, username, clients, args.requests, created)
+                results[f'{name}@{size}'] = result
+                print(f"  {name + '@' + str(size):<16} {result['rps']:>8.1f} req/s  "
+                      f"p50 {result['p50_ms']:>7.2f}ms  p99 {result['p99_ms']:>7.2f}ms  "
+                      f"errors {result['errors']}", file=sys.stderr)
+
+        if 'contact' in args.scenarios:
+            start = time.perf_counter()
+            with app.app_context():
+                while outbox.send_due(app):
+                    pass
+            results['outbox_drain'] = {'messages': len(sink.messages),
+                                       'seconds': time.perf_counter() - start}
+    finally:
+        hashing.shutdown()
+        sink.stop()
+
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'sizes': args.sizes,
+            'threads': args.threads,
+            'requests': args.requests,
+            'bcrypt_rounds': args.rounds,
+        },
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Return (scenario, metric, baseline, current) for every regression beyond ``tolerance``."""
+    regressions = []
+    for key, result in current['results'].items():
+        base = baseline['results'].get(key)
+        if not base or 'p50_ms' not in base:
+            continue
+        if base['p50_ms'] and result['p50_ms'] > base['p50_ms'] * (1 + tolerance):
+            regressions.append((key, 'p50_ms', base['p50_ms'], result['p50_ms']))
+        if result['rps'] < base['rps'] / (1 + tolerance):
+            regressions.append((key, 'rps', base['rps'], result['rps']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Endpoint throughput/latency benchmark.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario and size.")
+    parser.add_argument('--rounds', type=int, default=10, help="bcrypt cost for the benchmark.")
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'latest.json'))
+    parser.add_argument('--baseline', default=os.path.join(RESULTS_DIR, 'baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed relative slowdown before a scenario counts as a regression.")
+    args = parser.parse_args()
+    if 'delete' in args.scenarios and 'create' not in args.scenarios:
+        parser.error("the delete scenario removes the entries made by create; select both")
+
+    report = run(args)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against (run with --save-baseline)")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(report, baseline, args.tolerance)
+    for key, metric, before, after in regressions:
+        print(f"REGRESSION {key:<16} {metric:<6} {before:>9.2f} -> {after:>9.2f}")
+    if regressions:
+        sys.exit(1)
+    print(f"no regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
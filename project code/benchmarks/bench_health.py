@@ -0,0 +1,81 @@
+# Benchmark: vault health engine scaling.
+# Run from the project root:  python -m benchmarks.bench_health [--sizes 1000 10000 100000]
+#
+# Times VaultHealth over synthetic vaults (with ~10% reused passwords and duplicate
+# usernames) and prints the cost per entry, which should stay flat as the vault grows.
+# The old list.count() implementation is timed on the small sizes for comparison.
+
+import argparse
+import json
+import random
+import string
+import time
+from backend.health import VaultHealth
+from backend.validation import is_strong_password, password_strength
+
+
+def synthetic_vault(size: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '!@#$%'
+    entries = []
+    for i in range(size):
+        if entries and rng.random() < 0.1:
+            password = rng.choice(entries)['password']
+        else:
+            password = ''.join(rng.choices(alphabet, k=rng.randint(6, 16)))
+        username = f"user{rng.randint(0, size)}" if rng.random() < 0.1 else f"user{i}"
+        entries.append({'username': username, 'password': password})
+    return entries
+
+
+def quadratic_reference(entries: list[dict]) -> list[bool]:
+    """The previous flag_weak_entries algorithm (list.count inside the loop)."""
+    passwords = [e['password'] for e in entries]
+    usernames = [e['username'] for e in entries]
+    return [
+        not is_strong_password(e['password']) or e['username'] == e['password']
+        or passwords.count(e['password']) > 1 or usernames.count(e['username']) > 1
+        for e in entries
+    ]
+
+
+def time_engine(entries: list[dict]) -> float:
+    start = time.perf_counter()
+    health = VaultHealth()
+    for i, entry in enumerate(entries):
+        health.add(i, entry['username'], entry['password'], password_strength(entry['password']))
+    health.report()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vault health engine scaling benchmark.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--reference-max', type=int, default=10_000,
+                        help="Largest size to also run the old O(n^2) algorithm on.")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        entries = synthetic_vault(size)
+        engine_s = time_engine(entries)
+        row = {'entries': size, 'engine_s': engine_s, 'engine_us_per_entry': engine_s / size * 1e6}
+        if size <= args.reference_max:
+            start = time.perf_counter()
+            quadratic_reference(entries)
+            row['reference_s'] = time.perf_counter() - start
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'entries':>10} {'engine s':>10} {'us/entry':>10} {'old O(n^2) s':>14}")
+    for row in results:
+        reference = f"{row['reference_s']:.3f}" if 'reference_s' in row else '-'
+        print(f"{row['entries']:>10} {row['engine_s']:>10.3f} {row['engine_us_per_entry']:>10.2f} {reference:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Benchmark: cost of a log_* call on the request thread, before and after the
+# queued JSON pipeline.
+# Run from the project root:  python -m benchmarks.bench_logging [--records 20000] [--disk-latency-ms 0.2]
+#
+# "before" writes f-string messages synchronously through a rotating file
+# handler, as logging_utils used to. "after" goes through the DroppingQueueHandler
+# and a QueueListener writing JSON lines. --disk-latency-ms adds a sleep to every
+# write to mimic a slow or busy disk; with it, the synchronous path slows down
+# with the disk while the queued path only drops records once the queue is full.
+
+import argparse
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from logging.handlers import QueueListener, TimedRotatingFileHandler
+from backend.logging_utils import DroppingQueueHandler, JsonLinesFormatter
+
+
+class SlowDiskHandler(TimedRotatingFileHandler):
+    def __init__(self, filename, latency: float):
+        super().__init__(filename, when='midnight', backupCount=1, encoding='utf-8')
+        self.latency = latency
+
+    def emit(self, record):
+        if self.latency:
+            time.sleep(self.latency)
+        super().emit(record)
+
+
+def _run_threads(threads: int, records: int, log_one) -> float:
+    per_thread = records // threads
+
+    def worker():
+        for i in range(per_thread):
+            log_one(i)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def bench_sync(path: str, records: int, threads: int, latency: float) -> dict:
+    logger = logging.getLogger('bench_sync')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = SlowDiskHandler(path, latency)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    logger.addHandler(handler)
+
+    def log_one(i):
+        logger.info(f"User 'bench{i % 50}' created a vault entry websiteed 'site{i}.example.com'.")
+
+    elapsed = _run_threads(threads, records, log_one)
+    logger.removeHandler(handler)
+    handler.close()
+    return {'elapsed': elapsed, 'dropped': 0}
+
+
+def bench_queued(path: str, records: int, threads: int, latency: float, queue_size: int) -> dict:
+    logger = logging.getLogger('bench_queued')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = SlowDiskHandler(path, latency)
+    handler.setFormatter(JsonLinesFormatter())
+    queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+    listener = QueueListener(queue_handler.queue, handler)
+    logger.addHandler(queue_handler)
+    listener.start()
+
+    def log_one(i):
+        logger.info("Vault entry created", extra={
+            'event': 'vault_entry_create', 'user': f'bench{i % 50}', 'ip': '127.0.0.1',
+            'endpoint': 'passwords.api_create', 'duration_ms': 1.0,
+            'details': {'website': f'site{i}.example.com'}, 'sample_rate': None,
+        })
+
+    elapsed = _run_threads(threads, records, log_one)
+    drain_start = time.perf_counter()
+    listener.stop()
+    drain = time.perf_counter() - drain_start
+    logger.removeHandler(queue_handler)
+    handler.close()
+    return {'elapsed': elapsed, 'dropped': queue_handler.dropped, 'drain': drain}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark synchronous vs queued logging.")
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--disk-latency-ms', type=float, default=0.0)
+    parser.add_argument('--queue-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    latency = args.disk_latency_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        before = bench_sync(os.path.join(tmp, 'sync.log'), args.records, args.threads, latency)
+        after = bench_queued(os.path.join(tmp, 'queued.log'), args.records, args.threads,
+                             latency, args.queue_size)
+
+    print(f"{args.records} records, {args.threads} threads, disk latency {args.disk_latency_ms} ms")
+    for name, result in (('sync text (before)', before), ('queued JSON (after)', after)):
+        rate = args.records / result['elapsed']
+        per_call = result['elapsed'] / args.records * args.threads * 1e6
+        line = f"  {name:<20} {rate:>10.0f} records/s on request threads, {per_call:>8.1f} us per call"
+        if 'drain' in result:
+            line += f", dropped {result['dropped']}, listener drained in {result['drain']:.2f}s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Benchmark: login throughput under concurrency, inline hashing vs the hashing pool.
+# Run from the project root:  python -m benchmarks.bench_login [--threads 8] [--logins 200]
+#
+# Each mode builds a fresh app, seeds users, then fires logins from N threads
+# while one extra thread keeps calling the vault list API. Reports login
+# throughput, login p50/p99 and vault API p50/p99 during the burst.
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from backend.hashing import hashing
+from .common import make_app, seed_user, login, percentile, BENCH_PASSWORD
+
+
+def run_mode(workers: int, threads: int, logins: int, rounds: int) -> dict:
+    app = make_app(HASH_POOL_WORKERS=workers, BCRYPT_LOG_ROUNDS=rounds)
+    users = [f'bench{i}' for i in range(threads)]
+    for username in users:
+        seed_user(app, username, 10)
+    vault_client = login(app, users[0])
+    hashing.verify_and_update(hashing.hash('warmup'), 'warmup')  # start pool workers
+
+    login_latencies, vault_latencies, statuses = [], [], {}
+    done = threading.Event()
+
+    def one_login(i):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/auth/login', data={'username': users[i % threads], 'password': BENCH_PASSWORD},
+                               headers={'Accept': 'application/json'})
+        login_latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    def poll_vault():
+        while not done.is_set():
+            start = time.perf_counter()
+            vault_client.get('/passwords/api')
+            vault_latencies.append(time.perf_counter() - start)
+
+    poller = threading.Thread(target=poll_vault)
+    poller.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one_login, range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    poller.join()
+    hashing.shutdown()
+
+    return {
+        'mode': f'pool ({workers} workers)' if workers else 'inline',
+        'logins_per_s': logins / elapsed,
+        'login_p50_ms': statistics.median(login_latencies) * 1000,
+        'login_p99_ms': percentile(login_latencies, 99) * 1000,
+        'vault_p50_ms': statistics.median(vault_latencies) * 1000 if vault_latencies else 0.0,
+        'vault_p99_ms': percentile(vault_latencies, 99) * 1000,
+        'statuses': statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput benchmark.")
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4, help="Hashing pool size for the pool run.")
+    parser.add_argument('--rounds', type=int, default=10, help="bcrypt cost for the benchmark.")
+    args = parser.parse_args()
+
+    rows = [run_mode(0, args.threads, args.logins, args.rounds),
+            run_mode(args.workers, args.threads, args.logins, args.rounds)]
+
+    print(f"{'mode':<18} {'logins/s':>9} {'login p50':>10} {'login p99':>10} {'vault p50':>10} {'vault p99':>10}  statuses")
+    for r in rows:
+        print(f"{r['mode']:<18} {r['logins_per_s']:>9.1f} {r['login_p50_ms']:>8.1f}ms {r['login_p99_ms']:>8.1f}ms "
+              f"{r['vault_p50_ms']:>8.1f}ms {r['vault_p99_ms']:>8.1f}ms  {r['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Benchmark: decrypt calls saved by the plaintext cache.
+# Run from the project root:  python -m benchmarks.bench_plaintext_cache [--entries 1000]
+#
+# Replays a list -> list -> search -> edit -> list flow against a seeded vault,
+# once with the cache disabled and once enabled, and counts how many records
+# were actually decrypted.
+
+import argparse
+import time
+from backend import model
+from backend.vault_cache import plaintext_cache
+from .common import make_app, seed_user, login
+
+decrypted = 0
+_decrypt_many = model.decrypt_many
+_open_record = model.open_record
+
+
+def _count_many(envelopes):
+    global decrypted
+    decrypted += len(envelopes)
+    return _decrypt_many(envelopes)
+
+
+def _count_one(envelope):
+    global decrypted
+    decrypted += 1
+    return _open_record(envelope)
+
+
+def list_all(client):
+    cursor = None
+    while True:
+        query = {'fields': 'website,username,password'}
+        if cursor is not None:
+            query['cursor'] = cursor
+        page = client.get('/passwords/api', query_string=query).get_json()
+        cursor = page['next_cursor']
+        if cursor is None:
+            return
+
+
+def run_flow(cache_size: int, entries: int) -> dict:
+    global decrypted
+    app = make_app(VAULT_PLAINTEXT_CACHE_SIZE=cache_size)
+    seed_user(app, 'bench', entries)
+    client = login(app, 'bench')
+
+    steps = [
+        ('list', lambda: list_all(client)),
+        ('list again', lambda: list_all(client)),
+        ('search', lambda: client.get('/passwords/api/search', query_string={'search': 'site1'})),
+        ('edit', lambda: client.put('/passwords/api/1', json={
+            'website': 'edited.example.com', 'username': 'bench0', 'password': 'Edited!Pw1'})),
+        ('list after edit', lambda: list_all(client)),
+        ('search again', lambda: client.get('/passwords/api/search', query_string={'search': 'site1'})),
+    ]
+    results = {}
+    for name, step in steps:
+        decrypted = 0
+        start = time.perf_counter()
+        step()
+        results[name] = {'decrypted': decrypted, 'ms': (time.perf_counter() - start) * 1000}
+    results['cache'] = plaintext_cache.stats()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plaintext cache decrypt-count benchmark.")
+    parser.add_argument('--entries', type=int, default=1000)
+    parser.add_argument('--cache-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    model.decrypt_many = _count_many
+    model.open_record = _count_one
+
+    off = run_flow(0, args.entries)
+    on = run_flow(args.cache_size, args.entries)
+
+    print(f"{'step':<18} {'decrypts off':>12} {'decrypts on':>12} {'ms off':>9} {'ms on':>9}")
+    for step in off:
+        if step == 'cache':
+            continue
+        print(f"{step:<18} {off[step]['decrypted']:>12} {on[step]['decrypted']:>12} "
+              f"{off[step]['ms']:>9.1f} {on[step]['ms']:>9.1f}")
+    stats = on['cache']
+    print(f"cache: hits={stats['hits']} misses={stats['misses']} size={stats['size']}")
+
+
+if __name__ == "__main__":
+    main()
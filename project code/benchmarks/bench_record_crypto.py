@@ -0,0 +1,64 @@
+# Benchmark: sealed records (batch AES-GCM) against the legacy per-column AES-CBC path.
+# Run from the project root:  python -m benchmarks.bench_record_crypto [--entries 1000] [--min-speedup 2]
+#
+# Encrypts and decrypts the same vault rows both ways and reports microseconds
+# per row. The legacy path is what PasswordEntry did before records: three
+# encrypt_master / decrypt_master calls per row. Exits with status 1 when the
+# batch path is not at least --min-speedup times faster in both directions.
+
+import argparse
+import sys
+import time
+from backend.crypto import encrypt_master, decrypt_master, encrypt_many, decrypt_many
+
+
+def sample_rows(n: int) -> list:
+    return [(f'site{i}.example.com', f'user{i % 50}@example.com', f'Pw{i}!sample-password')
+            for i in range(n)]
+
+
+def _per_row_us(fn, rows: int, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best / rows * 1e6
+
+
+def measure(entries: int, repeat: int = 5) -> dict:
+    rows = sample_rows(entries)
+    columns = [tuple(encrypt_master(value) for value in row) for row in rows]
+    envelopes = encrypt_many(rows)
+    return {
+        'legacy_encrypt_us': _per_row_us(
+            lambda: [[encrypt_master(value) for value in row] for row in rows], entries, repeat),
+        'legacy_decrypt_us': _per_row_us(
+            lambda: [[decrypt_master(blob) for blob in row] for row in columns], entries, repeat),
+        'batch_encrypt_us': _per_row_us(lambda: encrypt_many(rows), entries, repeat),
+        'batch_decrypt_us': _per_row_us(lambda: decrypt_many(envelopes), entries, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record crypto: batch AES-GCM vs per-column AES-CBC.")
+    parser.add_argument('--entries', type=int, default=1000)
+    parser.add_argument('--min-speedup', type=float, default=2.0)
+    args = parser.parse_args()
+
+    result = measure(args.entries)
+    failures = []
+    for op in ('encrypt', 'decrypt'):
+        legacy, batch = result[f'legacy_{op}_us'], result[f'batch_{op}_us']
+        speedup = legacy / batch
+        print(f"{op:<8} legacy {legacy:>7.1f} us/row  batch {batch:>7.1f} us/row  speedup {speedup:.1f}x")
+        if speedup < args.min_speedup:
+            failures.append(op)
+
+    if failures:
+        print(f"BELOW {args.min_speedup}x: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
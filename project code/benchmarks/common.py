@@ -0,0 +1,75 @@
+# Shared helpers for the benchmarks: a SQLite-backed app and seeded vaults.
+
+import os
+import tempfile
+from backend import create_app, db, login_manager
+from backend.model import User, PasswordEntry
+from backend import search_index
+from backend.user_cache import user_cache
+
+BENCH_PASSWORD = 'Bench!Passw0rd'
+
+
+def make_app(database_uri=None, **config):
+    """Build the real app via create_app against SQLite (a temp file by default)."""
+    if database_uri is None:
+        fd, path = tempfile.mkstemp(prefix='dunkey_bench_', suffix='.db')
+        os.close(fd)
+        database_uri = f"sqlite:///{path}"
+
+    overrides = {'SQLALCHEMY_DATABASE_URI': database_uri, 'TESTING': True,
+                 # Benchmarks measure the endpoints, not the limiter
+                 'RATELIMIT_ENABLED': False, 'RATELIMIT_STORAGE_URI': 'memory://'}
+    overrides.update(config)
+    app = create_app(overrides)
+
+    # main.py registers the user loader; benchmarks do not import it.
+    if login_manager._user_callback is None:
+        login_manager.user_loader(lambda user_id: user_cache.load(int(user_id)))
+
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed_user(app, username: str, n_entries: int) -> int:
+    """Create a user (registered through the app) with ``n_entries`` vault entries."""
+    client = app.test_client()
+    client.post('/auth/register', data={
+        'username': username, 'email': f'{username}@bench.local',
+        'password': BENCH_PASSWORD, 'confirm_password': BENCH_PASSWORD,
+    }, headers={'Accept': 'application/json'})
+
+    with app.app_context():
+        user = User.query.filter_by(username=username).one()
+        for start in range(0, n_entries, 1000):
+            rows = [
+                {
+                    'website': f'site{i}.example.com',
+                    'username': f'{username}{i % 50}',
+                    'password': f'Pw{i}!seeded' if i % 3 else 'weakpass',
+                }
+                for i in range(start, min(start + 1000, n_entries))
+            ]
+            entries = PasswordEntry.build_many(user.user_id, rows)
+            db.session.add_all(entries)
+            db.session.flush()
+            search_index.index_new_entries(entries)
+            db.session.commit()
+        return user.user_id
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def login(app, username: str):
+    """Return a test client with an authenticated session."""
+    client = app.test_client()
+    response = client.post('/auth/login', data={'username': username, 'password': BENCH_PASSWORD},
+                           headers={'Accept': 'application/json'})
+    assert response.status_code == 200, response.data
+    return client
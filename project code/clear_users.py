@@ -1,26 +1,19 @@
-
 # This will irrevocably delete ALL users and vault entries from your database.
+# Kept for compatibility; equivalent to `python maintenance.py purge --all`,
+# which deletes in committed batches instead of one long transaction.
 
-import os
 from dotenv import load_dotenv
-from backend import create_app, db
-from backend.model import User, PasswordEntry
+from backend import create_app
+from maintenance import purge
 
 def main():
     # Load environment variables (e.g. DATABASE_URL)
     load_dotenv()
 
     # Create the Flask app and push context
-    app = create_app()
+    app = create_app(web=False)
     with app.app_context():
-        # Delete all vault entries first (FK constraint)
-        entries_deleted = db.session.query(PasswordEntry).delete()
-        # Delete all users
-        users_deleted = db.session.query(User).delete()
-        db.session.commit()
-
-        print(f"Deleted {entries_deleted} vault entries.")
-        print(f"Deleted {users_deleted} users.")
+        purge(None, batch_size=1000, sleep=0.0, dry_run=False, keep_accounts=False)
 
 if __name__ == "__main__":
     main()
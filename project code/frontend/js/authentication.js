@@ -10,7 +10,7 @@ document.addEventListener('DOMContentLoaded', () => {
       if (!resp.ok) throw new Error('Failed to fetch user info.');
 
       const data = await resp.json();
-      const avatarPath = data.avatar_path || 'avatars/default.png';
+      const avatarPath = data.avatar_url || data.avatar_path || 'avatars/default.png';
 
       if (profileLink) {
         const avatarImg = document.createElement('img');
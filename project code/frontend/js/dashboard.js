@@ -1,8 +1,7 @@
 document.addEventListener('DOMContentLoaded', function () {
     const tableBody = document.getElementById('dashboard-table-body');
-    const apiEndpoint = '/passwords/api';
-
-    function renderTable(data) {
+    // fetchAllEntries, fetchFlaggedIds and createPasswordCell come from vault-api.js
+    function renderTable(data, flagged) {
         if (!data.length) {
             tableBody.innerHTML = '<tr><td colspan="4" style="text-align:center;">No entries found.</td></tr>';
             return;
@@ -10,46 +9,20 @@ document.addEventListener('DOMContentLoaded', function () {
 
         tableBody.innerHTML = '';
 
-        const usernames = data.map(entry => entry.username.trim());
-        const passwords = data.map(entry => entry.password.trim());
-
         data.forEach(entry => {
-            const isWeak = checkWeakEntry(entry, usernames, passwords);
             const row = document.createElement('tr');
             row.innerHTML = `
                 <td>${sanitize(entry.website)}</td>
                 <td>${sanitize(entry.username)}</td>
-                <td>${sanitize(entry.password)}</td>
-                <td>${formatStrength(isWeak)}</td>
             `;
+            row.appendChild(createPasswordCell(entry.entry_id));
+            const strengthCell = document.createElement('td');
+            strengthCell.innerHTML = formatStrength(flagged.has(entry.entry_id));
+            row.appendChild(strengthCell);
             tableBody.appendChild(row);
         });
     }
 
-    function checkWeakEntry(entry, allUsernames, allPasswords) {
-        const username = entry.username.trim();
-        const password = entry.password.trim();
-
-        const duplicateUsername = allUsernames.filter(u => u === username).length > 1;
-        const duplicatePassword = allPasswords.filter(p => p === password).length > 1;
-        const usernameEqualsPassword = username === password;
-
-        return (
-            !isStrongPassword(password) ||
-            usernameEqualsPassword ||
-            duplicateUsername ||
-            duplicatePassword
-        );
-    }
-
-    function isStrongPassword(password) {
-        if (password.length < 8) return false;
-        if (!/[A-Z]/.test(password)) return false;
-        if (!/\d/.test(password)) return false;
-        if (!/[!@#$%^&*(),.?":{}|<>]/.test(password)) return false;
-        return true;
-    }
-
     function sanitize(str) {
         const temp = document.createElement('div');
         temp.textContent = str;
@@ -63,13 +36,9 @@ document.addEventListener('DOMContentLoaded', function () {
     }
 
     // Fetch and render table data + handle security section
-    fetch(apiEndpoint, {
-        method: 'GET',
-        headers: { 'Accept': 'application/json' }
-    })
-    .then(response => response.json())
-    .then(data => {
-        renderTable(data);
+    Promise.all([fetchAllEntries(), fetchFlaggedIds()])
+    .then(([data, flagged]) => {
+        renderTable(data, flagged);
 
         const securitySection = document.getElementById('security-section');
         const securityMessage = document.getElementById('security-message');
@@ -84,10 +53,7 @@ document.addEventListener('DOMContentLoaded', function () {
             return;
         }
 
-        const hasWeak = data.some(entry => checkWeakEntry(entry, 
-            data.map(e => e.username.trim()), 
-            data.map(e => e.password.trim())
-        ));
+        const hasWeak = flagged.size > 0;
 
         securitySection.style.display = 'block';
         if (hasWeak) {
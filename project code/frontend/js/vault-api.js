@@ -0,0 +1,91 @@
+// vault-api.js - Shared client for the vault list, health and reveal endpoints.
+// Loaded before vault.js and dashboard.js.
+
+// Listings never include passwords: they are decrypted one at a time, on demand,
+// through revealPassword.
+const VAULT_LIST_FIELDS = 'website,username';
+// The server's MAX_PAGE_SIZE: the fewer pages, the fewer requests against the rate limit
+const VAULT_PAGE_SIZE = 500;
+const MAX_RATE_LIMIT_RETRIES = 3;
+
+const waitMs = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// GET a JSON endpoint; on 429, wait for Retry-After and try again.
+async function vaultGet(url) {
+    for (let attempt = 0; ; attempt++) {
+        const response = await fetch(url, {
+            method: 'GET',
+            credentials: 'include',
+            headers: { 'Accept': 'application/json' }
+        });
+        if (response.status === 429 && attempt < MAX_RATE_LIMIT_RETRIES) {
+            const seconds = parseInt(response.headers.get('Retry-After'), 10);
+            await waitMs((Number.isFinite(seconds) ? seconds : 5) * 1000);
+            continue;
+        }
+        if (!response.ok) throw new Error(`Error: ${response.status}`);
+        return response.json();
+    }
+}
+
+// The list API is cursor-paginated; follow next_cursor until the vault is loaded.
+async function fetchAllEntries(fields = VAULT_LIST_FIELDS) {
+    const entries = [];
+    let cursor = null;
+    do {
+        const params = new URLSearchParams({ fields, limit: VAULT_PAGE_SIZE });
+        if (cursor !== null) params.set('cursor', cursor);
+        const page = await vaultGet(`/passwords/api?${params}`);
+        entries.push(...page.entries);
+        cursor = page.next_cursor;
+    } while (cursor !== null);
+    return entries;
+}
+
+// Ids of entries the health report flags (weak, reused, username equal to the
+// password, or a username used more than once). Computed server-side, so the
+// listing does not need the passwords.
+async function fetchFlaggedIds() {
+    const report = await vaultGet('/passwords/api/health');
+    // reused and duplicate_username are groups of ids
+    return new Set([
+        ...report.weak,
+        ...report.reused.flat(),
+        ...report.username_equals_password,
+        ...report.duplicate_username.flat()
+    ]);
+}
+
+async function revealPassword(entryId) {
+    const data = await vaultGet(`/passwords/api/${entryId}/password`);
+    return data.password;
+}
+
+// A password cell: masked until the user asks to see it.
+function createPasswordCell(entryId) {
+    const cell = document.createElement('td');
+    const value = document.createElement('span');
+    value.textContent = '••••••••';
+    const toggle = document.createElement('button');
+    toggle.type = 'button';
+    toggle.className = 'reveal-btn';
+    toggle.textContent = 'Show';
+
+    let password = null;
+    toggle.addEventListener('click', async () => {
+        if (password === null) {
+            try {
+                password = await revealPassword(entryId);
+            } catch (error) {
+                console.error('Failed to reveal password:', error);
+                return;
+            }
+        }
+        const hidden = toggle.textContent === 'Show';
+        value.textContent = hidden ? password : '••••••••';
+        toggle.textContent = hidden ? 'Hide' : 'Show';
+    });
+
+    cell.append(value, ' ', toggle);
+    return cell;
+}
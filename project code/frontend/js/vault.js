@@ -30,15 +30,11 @@ window.addEventListener('click', (e) => {
 
 // Load Vault Entries
 
+// fetchAllEntries, fetchFlaggedIds and createPasswordCell come from vault-api.js
 async function loadVaultEntries() {
     try {
-        const response = await fetch('/passwords/api', {
-            method: 'GET',
-            credentials: 'include'
-        });
-        if (!response.ok) throw new Error(`Error: ${response.status}`);
-        const entries = await response.json();
-        renderTable(entries);
+        const [entries, flagged] = await Promise.all([fetchAllEntries(), fetchFlaggedIds()]);
+        renderTable(entries, flagged);
     } catch (error) {
         console.error('Failed to load vault entries:', error);
         tableBody.innerHTML = `<tr><td colspan="6" style="text-align:center;">Unable to load entries.</td></tr>`;
@@ -47,7 +43,7 @@ async function loadVaultEntries() {
 
 
 // Render Table Rows
-function renderTable(entries) {
+function renderTable(entries, flagged) {
     tableBody.innerHTML = '';
 
     if (entries.length === 0) {
@@ -55,8 +51,6 @@ function renderTable(entries) {
         return;
     }
 
-    const strengthMap = analyzeStrength(entries);
-
     entries.forEach(entry => {
         const row = document.createElement('tr');
 
@@ -64,10 +58,11 @@ function renderTable(entries) {
 
         row.appendChild(createCell(entry.website));
         row.appendChild(createCell(entry.username));
-        row.appendChild(createCell(entry.password));
+        row.appendChild(createPasswordCell(entry.entry_id));
 
-        const strengthCell = createCell(strengthMap[entry.entry_id]);
-        strengthCell.className = (strengthMap[entry.entry_id] === 'Strong') ? 'strong' : 'weak';
+        const weak = flagged.has(entry.entry_id);
+        const strengthCell = createCell(weak ? 'Weak' : 'Strong');
+        strengthCell.className = weak ? 'weak' : 'strong';
         row.appendChild(strengthCell);
 
         row.appendChild(createCell(entry.last_updated || new Date().toLocaleDateString()));
@@ -99,26 +94,6 @@ function createButton(text, className, onClick) {
     return btn;
 }
 
-// Analyze Entry Strength
-function analyzeStrength(entries) {
-    const usernames = {}, passwords = {}, combos = {}, strengthMap = {};
-
-    entries.forEach(entry => {
-        usernames[entry.username] = (usernames[entry.username] || 0) + 1;
-        passwords[entry.password] = (passwords[entry.password] || 0) + 1;
-        const combo = `${entry.username}:${entry.password}`;
-        combos[combo] = (combos[combo] || 0) + 1;
-    });
-
-    entries.forEach(entry => {
-        const weak = usernames[entry.username] > 1 || passwords[entry.password] > 1 || combos[`${entry.username}:${entry.password}`] > 1;
-        strengthMap[entry.entry_id] = weak ? 'Weak' : 'Strong';
-    });
-
-    return strengthMap;
-}
-
-
 // Add Entry
 addForm.addEventListener('submit', async (e) => {
     e.preventDefault();
@@ -149,11 +124,19 @@ addForm.addEventListener('submit', async (e) => {
 
 // Edit Modal Logic
 
-function openEditModal(entry) {
+async function openEditModal(entry) {
+    // The listing has no passwords; decrypt this one only when it is edited
+    let password;
+    try {
+        password = await revealPassword(entry.entry_id);
+    } catch (error) {
+        console.error('Failed to load entry password:', error);
+        return;
+    }
     document.getElementById('edit-entry-id').value = entry.entry_id;
     document.getElementById('edit-website').value = entry.website;
     document.getElementById('edit-username').value = entry.username;
-    document.getElementById('edit-password').value = entry.password;
+    document.getElementById('edit-password').value = password;
 
     confirmCheckbox.checked = false;
     saveChangesBtn.disabled = true;
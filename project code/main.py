@@ -7,8 +7,10 @@ from flask import Flask, send_from_directory, redirect
 from flask_login import current_user
 from flask_jwt_extended import JWTManager
 
-from backend import create_app, db, login_manager
-from backend.model import User
+from backend import create_app, login_manager
+from backend.user_cache import user_cache
+from backend import outbox
+from backend.assets import assets
 
 
 # Load environment variables
@@ -18,12 +20,17 @@ load_dotenv()
 app = create_app()
 jwt = JWTManager(app)
 
+# Deliver queued contact mail in the background (run outbox_worker.py instead when disabled)
+if app.config['MAIL_OUTBOX_WORKER']:
+    outbox.start_worker(app)
+
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
 # Register user_loader on the shared login_manager
 @login_manager.user_loader
 def load_user(user_id):
-    return db.session.get(User, int(user_id))
+    # Served from the per-process user cache; profile writes bump it
+    return user_cache.load(int(user_id))
 
 
 # Static and protected routes
@@ -32,47 +39,46 @@ FE = os.path.join(BASE, 'frontend')
 
 @app.route('/')
 def index():
-    return send_from_directory(FE, 'index.html')
+    return assets.send('index.html')
 
 @app.route('/login.html')
 def login_page():
     if current_user.is_authenticated:
         return redirect('/dashboard.html')
-    return send_from_directory(FE, 'login.html')
+    return assets.send('login.html')
 
 @app.route('/register.html')
 def register_page():
     if current_user.is_authenticated:
         return redirect('/dashboard.html')
-    return send_from_directory(FE, 'register.html')
+    return assets.send('register.html')
 
 @app.route('/dashboard.html')
 #@login_required
 def dashboard_page():
-    frontend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend')
-    return send_from_directory(frontend_dir, 'dashboard.html')
+    return assets.send('dashboard.html')
 
 @app.route('/manage-passwords.html')
 def manage_passwords_page():
     if not current_user.is_authenticated:
         return redirect('/login.html')
-    return send_from_directory(FE, 'manage-passwords.html')
+    return assets.send('manage-passwords.html')
 
 @app.route('/profile.html')
 def profile_page():
     if not current_user.is_authenticated:
         return redirect('/login.html')
-    return send_from_directory(FE, 'profile.html')
+    return assets.send('profile.html')
 
 @app.route('/logout.html')
 def logout_page():
     if not current_user.is_authenticated:
         return redirect('/login.html')
-    return send_from_directory(FE, 'logout.html')
+    return assets.send('logout.html')
 
 @app.route('/<path:filename>')
 def serve_static(filename):
-    return send_from_directory(FE, filename)
+    return assets.send(filename)
 
 @app.route('/test-dashboard')
 def test_dashboard():
@@ -0,0 +1,338 @@
+# Bulk maintenance for the vault database: purge, seed and report.
+#
+#   python maintenance.py purge --all                      # every user and vault entry
+#   python maintenance.py purge --username alice --keep-accounts
+#   python maintenance.py seed --users 100 --entries 1000
+#   python maintenance.py report
+#   python maintenance.py upgrade [--dry-run]               # add new columns to an older database
+#   python maintenance.py sweep-avatars [--min-age 86400]   # delete unreferenced avatar files
+#
+# Work is done in bounded batches, each committed on its own, so locks are held
+# briefly and an interrupted run can simply be started again: purge picks up the
+# rows that are left and seed tops up users and vaults that are incomplete.
+# --dry-run only counts what would change; --sleep pauses between batches to
+# leave room for live traffic.
+
+import argparse
+import hashlib
+import time
+from dotenv import load_dotenv
+from sqlalchemy import delete, func, insert, select, update
+from backend import create_app, db
+from backend.model import User, PasswordEntry, EntrySearchToken, OutboxMessage
+from backend.search_index import entry_tokens
+from backend.schema import upgrade_schema
+from backend.avatars import avatar_store, SWEEP_MIN_AGE
+
+SEED_PASSWORD = 'Seed!Passw0rd'
+
+
+def _timed(label: str, rows: int, started: float):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed else 0.0
+    print(f"{label}: {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s)")
+
+
+def _delete_in_batches(model, key, where, batch_size: int, sleep: float) -> int:
+    """Delete rows matching ``where`` in primary-key order, one committed batch at a time."""
+    total = 0
+    while True:
+        ids = db.session.scalars(select(key).where(*where).order_by(key).limit(batch_size)).all()
+        if not ids:
+            return total
+        db.session.execute(delete(model).where(key.in_(ids)))
+        db.session.commit()
+        total += len(ids)
+        print(f"  {model.__tablename__}: deleted {total} (last id={ids[-1]})")
+        if sleep:
+            time.sleep(sleep)
+
+
+# Purge
+
+def purge(user_ids, batch_size: int, sleep: float, dry_run: bool, keep_accounts: bool):
+    """Delete the vault data (and, unless keep_accounts, the accounts) of ``user_ids`` (None = everyone)."""
+    from backend.profile import discard_avatar
+
+    def scope(column):
+        return [] if user_ids is None else [column.in_(user_ids)]
+
+    phases = [
+        (EntrySearchToken, EntrySearchToken.token_id, scope(EntrySearchToken.user_id)),
+        (PasswordEntry, PasswordEntry.entry_id, scope(PasswordEntry.user_id)),
+    ]
+    if not keep_accounts:
+        phases.append((User, User.user_id, scope(User.user_id)))
+
+    if dry_run:
+        for model, key, where in phases:
+            count = db.session.scalar(select(func.count(key)).where(*where))
+            batches = -(-count // batch_size)
+            print(f"Would delete {count} rows from {model.__tablename__} in {batches} batches.")
+        return
+
+    for model, key, where in phases:
+        started = time.perf_counter()
+        if model is User:
+            avatars = db.session.scalars(
+                select(User.avatar_path).where(*where, User.avatar_path.is_not(None))
+            ).all()
+            total = _delete_in_batches(model, key, where, batch_size, sleep)
+            for avatar_path in set(avatars):
+                discard_avatar(avatar_path)
+        else:
+            total = _delete_in_batches(model, key, where, batch_size, sleep)
+        _timed(f"Deleted from {model.__tablename__}", total, started)
+
+    if keep_accounts:
+        # The kept accounts' vaults changed: invalidate their clients' ETags
+        db.session.execute(update(User).where(*scope(User.user_id))
+                           .values(vault_revision=User.vault_revision + 1))
+        db.session.commit()
+
+
+# Seed
+
+def synthetic_rows(user_index: int, start: int, stop: int) -> list:
+    """Deterministic vault rows, so a resumed seed produces the same data."""
+    rows = []
+    for i in range(start, stop):
+        if i % 10 == 0:
+            password = 'password123'  # weak and reused across the vault
+        else:
+            digest = hashlib.sha256(f'{user_index}:{i}'.encode()).hexdigest()
+            password = f'Sd!{digest[:12]}{i}'
+        rows.append({
+            'website': f'site{i}.example.com',
+            'username': f'seed{user_index}.{i % 20}',
+            'password': password,
+        })
+    return rows
+
+
+def _seed_users(prefix: str, count: int, password: str, batch_size: int) -> list:
+    """Create the missing seed accounts; returns (index, user_id) for every seed user."""
+    from backend.hashing import hashing
+
+    names = [f'{prefix}{i:06d}' for i in range(count)]
+    existing = {}
+    for start in range(0, count, batch_size):
+        chunk = names[start:start + batch_size]
+        existing.update(db.session.execute(
+            select(User.username, User.user_id).where(User.username.in_(chunk))
+        ).all())
+
+    missing = [name for name in names if name not in existing]
+    if missing:
+        # One hash for every seed account: they share the same login password
+        password_hash = hashing.hash(password)
+        for start in range(0, len(missing), batch_size):
+            db.session.execute(insert(User), [
+                {'username': name, 'email': f'{name}@seed.local', 'password_hash': password_hash}
+                for name in missing[start:start + batch_size]
+            ])
+            db.session.commit()
+        existing.update(db.session.execute(
+            select(User.username, User.user_id).where(User.username.in_(missing))
+        ).all())
+    print(f"Seed users: {len(names) - len(missing)} existing, {len(missing)} created.")
+    return [(i, existing[name]) for i, name in enumerate(names)]
+
+
+def _seed_entries(user_index: int, user_id: int, start: int, stop: int) -> int:
+    """Bulk-insert one batch of entries and their search tokens."""
+    rows = synthetic_rows(user_index, start, stop)
+    last_id = db.session.scalar(
+        select(func.max(PasswordEntry.entry_id)).where(PasswordEntry.user_id == user_id)
+    ) or 0
+    revision = User.next_revision(user_id)
+    db.session.execute(insert(PasswordEntry), PasswordEntry.column_values(user_id, rows, revision))
+
+    # The new ids come back in insertion order: nothing else writes to a seed user's vault
+    entry_ids = db.session.scalars(
+        select(PasswordEntry.entry_id)
+        .where(PasswordEntry.user_id == user_id, PasswordEntry.entry_id > last_id)
+        .order_by(PasswordEntry.entry_id)
+    ).all()
+    tokens = [
+        {'entry_id': entry_id, 'user_id': user_id, 'token': token}
+        for entry_id, row in zip(entry_ids, rows)
+        for token in entry_tokens(user_id, row['website'], row['username'])
+    ]
+    if tokens:
+        db.session.execute(insert(EntrySearchToken), tokens)
+    db.session.commit()
+    return len(rows)
+
+
+def seed(users: int, entries: int, prefix: str, password: str,
+         batch_size: int, sleep: float, dry_run: bool):
+    if dry_run:
+        print(f"Would seed {users} users named {prefix}000000.. with {entries} entries each "
+              f"({users * entries} entries, in batches of {batch_size}).")
+        return
+
+    upgrade_schema()  # creates missing tables and columns
+    started = time.perf_counter()
+    seeded = _seed_users(prefix, users, password, batch_size)
+
+    total = 0
+    counts = dict(db.session.execute(
+        select(PasswordEntry.user_id, func.count())
+        .where(PasswordEntry.user_id.in_([user_id for _, user_id in seeded]))
+        .group_by(PasswordEntry.user_id)
+    ).all()) if seeded else {}
+    for user_index, user_id in seeded:
+        for start in range(counts.get(user_id, 0), entries, batch_size):
+            total += _seed_entries(user_index, user_id, start, min(start + batch_size, entries))
+            if sleep:
+                time.sleep(sleep)
+        if total:
+            print(f"  user {user_index + 1}/{len(seeded)} (user_id={user_id}) complete, "
+                  f"{total} entries inserted so far")
+    _timed("Seeded password_entries", total, started)
+
+
+# Report
+
+def report():
+    timings = []
+
+    def timed_query(label, statement, scalar=True):
+        started = time.perf_counter()
+        result = db.session.scalar(statement) if scalar else db.session.execute(statement).all()
+        timings.append((label, time.perf_counter() - started))
+        return result
+
+    print("Rows:")
+    for model in (User, PasswordEntry, EntrySearchToken, OutboxMessage):
+        count = timed_query(f'count {model.__tablename__}', select(func.count()).select_from(model))
+        print(f"  {model.__tablename__:<32} {count:>12}")
+
+    legacy = timed_query('count legacy entries',
+                         select(func.count()).where(PasswordEntry.record.is_(None),
+                                                   PasswordEntry.deleted_at.is_(None)))
+    print(f"  {'legacy (unsealed) entries':<32} {legacy:>12}")
+    tombstones = timed_query('count tombstones',
+                             select(func.count()).where(PasswordEntry.deleted_at.is_not(None)))
+    print(f"  {'deleted entries (tombstones)':<32} {tombstones:>12}")
+
+    for status, count in timed_query('outbox by status', select(
+            OutboxMessage.status, func.count()).group_by(OutboxMessage.status), scalar=False):
+        print(f"  {'mail_outbox ' + status:<32} {count:>12}")
+
+    per_user = (select(PasswordEntry.user_id, func.count().label('n'))
+                .where(PasswordEntry.deleted_at.is_(None)).group_by(PasswordEntry.user_id).subquery())
+    low, high, avg = timed_query('entries per user', select(
+        func.min(per_user.c.n), func.max(per_user.c.n), func.avg(per_user.c.n)), scalar=False)[0]
+    if high is not None:
+        print(f"Entries per user (users with a vault): min {low}, avg {float(avg):.1f}, max {high}")
+
+    top = timed_query('largest vaults', select(User.username, per_user.c.n)
+                      .join(per_user, per_user.c.user_id == User.user_id)
+                      .order_by(per_user.c.n.desc()).limit(5), scalar=False)
+    if top:
+        print("Largest vaults:")
+        for username, n in top:
+            print(f"  {username:<32} {n:>12}")
+
+    if db.engine.dialect.name == 'mysql':
+        sizes = timed_query('table sizes', db.text(
+            "SELECT table_name, data_length, index_length FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() ORDER BY data_length + index_length DESC"), scalar=False)
+        print("Table sizes (MB, data + index):")
+        for table, data_length, index_length in sizes:
+            print(f"  {table:<32} {data_length / 2**20:>8.1f} + {index_length / 2**20:.1f}")
+
+    print("Query timings:")
+    for label, elapsed in timings:
+        print(f"  {label:<36} {elapsed * 1000:>9.1f} ms")
+
+
+# Avatars
+
+def sweep_avatars(min_age: float, dry_run: bool):
+    """Delete content-addressed avatar files that no user references (see AvatarStore.sweep)."""
+    referenced = set(db.session.scalars(
+        select(User.avatar_path).where(User.avatar_path.is_not(None)).distinct()).all())
+    swept = avatar_store.sweep(referenced, min_age, dry_run)
+    print(f"{'Would sweep' if dry_run else 'Swept'} {len(swept)} unreferenced avatars "
+          f"({len(referenced)} in use).")
+
+
+# Upgrade
+
+def upgrade(dry_run: bool):
+    statements = upgrade_schema(dry_run=dry_run)
+    for statement in statements:
+        print(f"{statement};")
+    if not statements:
+        print("Schema is up to date.")
+    elif not dry_run:
+        print(f"Applied {len(statements)} statements.")
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Chunked bulk maintenance for the vault database.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def batching(sub, default_batch):
+        sub.add_argument('--batch-size', type=int, default=default_batch)
+        sub.add_argument('--sleep', type=float, default=0.0,
+                         help="Seconds to pause between batches (throttling for live databases).")
+        sub.add_argument('--dry-run', action='store_true', help="Only report what would change.")
+
+    purge_cmd = commands.add_parser('purge', help="Delete vault entries and users in batches.")
+    target = purge_cmd.add_mutually_exclusive_group(required=True)
+    target.add_argument('--all', action='store_true', help="Every user and vault entry.")
+    target.add_argument('--user-id', type=int, action='append', help="Repeatable.")
+    target.add_argument('--username', action='append', help="Repeatable.")
+    purge_cmd.add_argument('--keep-accounts', action='store_true',
+                           help="Only delete vault data; keep the user rows.")
+    batching(purge_cmd, 1000)
+
+    seed_cmd = commands.add_parser('seed', help="Create synthetic users with encrypted vaults.")
+    seed_cmd.add_argument('--users', type=int, required=True)
+    seed_cmd.add_argument('--entries', type=int, required=True, help="Vault entries per user.")
+    seed_cmd.add_argument('--prefix', default='seed', help="Username prefix of the seed accounts.")
+    seed_cmd.add_argument('--password', default=SEED_PASSWORD, help="Login password of the seed accounts.")
+    batching(seed_cmd, 1000)
+
+    commands.add_parser('report', help="Row counts, vault sizes and query timings.")
+
+    sweep_cmd = commands.add_parser('sweep-avatars', help="Delete avatar files no user references.")
+    sweep_cmd.add_argument('--min-age', type=float, default=SWEEP_MIN_AGE,
+                           help="Only sweep avatars last stored at least this many seconds ago.")
+    sweep_cmd.add_argument('--dry-run', action='store_true', help="Only count what would be deleted.")
+
+    upgrade_cmd = commands.add_parser('upgrade', help="Add missing tables, columns and indexes.")
+    upgrade_cmd.add_argument('--dry-run', action='store_true', help="Only print the statements.")
+    args = parser.parse_args()
+
+    app = create_app(web=False)
+    with app.app_context():
+        if args.command == 'purge':
+            user_ids = None
+            if args.user_id:
+                user_ids = args.user_id
+            elif args.username:
+                user_ids = db.session.scalars(
+                    select(User.user_id).where(User.username.in_(args.username))).all()
+                if not user_ids:
+                    parser.error("no such user")
+            purge(user_ids, args.batch_size, args.sleep, args.dry_run, args.keep_accounts)
+        elif args.command == 'seed':
+            seed(args.users, args.entries, args.prefix, args.password,
+                 args.batch_size, args.sleep, args.dry_run)
+        elif args.command == 'sweep-avatars':
+            sweep_avatars(args.min_age, args.dry_run)
+        elif args.command == 'upgrade':
+            upgrade(args.dry_run)
+        else:
+            report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Runs the mail outbox worker in the foreground.
+# Use this when the web processes are started with MAIL_OUTBOX_WORKER=false,
+# e.g. to keep SMTP traffic in a single dedicated process.
+
+import argparse
+import time
+from dotenv import load_dotenv
+from backend import create_app, db
+from backend import outbox
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Deliver queued contact e-mails.")
+    parser.add_argument('--once', action='store_true',
+                        help="Drain the currently due messages and exit instead of polling.")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()  # creates the outbox table if it is missing
+        if args.once:
+            total = 0
+            while True:
+                sent = outbox.send_due(app)
+                if not sent:
+                    break
+                total += sent
+            print(f"Done. {total} messages attempted.")
+            return
+
+    worker = outbox.start_worker(app)
+    try:
+        while worker.is_alive():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# Re-encrypts vault records and master passwords under the active key
+# (DUNKEY_AES_ACTIVE_KEY_ID), so retired keys can be dropped from the keyring.
+# See the keyring notes in backend/crypto.py for the deploy steps around it.
+#
+#   python rotate_keys.py [--batch-size 500] [--workers 4] [--sleep 0.1]
+#   python rotate_keys.py --check        # count rows per key id, change nothing
+#
+# Rows are streamed in primary-key order. Each batch is re-encrypted on a process
+# pool and written back together with its checkpoint in one transaction, so an
+# interrupted run resumes after the last committed batch. Updates only apply if
+# the stored ciphertext is unchanged: rows the app rewrote in the meantime are
+# already under the active key. The app keeps reading every key in the ring
+# throughout. Legacy per-column (AES-CBC) vault rows are sealed into records.
+
+import argparse
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, select, update
+from backend import create_app, db
+from backend.crypto import (ACTIVE_KEY_ID, decrypt_many, decrypt_master, encrypt_many, encrypt_master,
+                            master_key_id, record_key_id)
+from backend.model import User, PasswordEntry, KeyRotationCheckpoint
+from backend.schema import upgrade_schema
+
+
+# --- Work functions (module level so the process pool can pickle them) ---
+
+def rekey_entries(rows: list) -> list:
+    """(entry_id, record, website, username, password) -> (entry_id, new record)"""
+    fields = []
+    sealed = [row for row in rows if row[1]]
+    if sealed:
+        fields.extend(zip((row[0] for row in sealed), decrypt_many([row[1] for row in sealed])))
+    for entry_id, _, website, username, password in (row for row in rows if not row[1]):
+        fields.append((entry_id, (decrypt_master(website), decrypt_master(username), decrypt_master(password))))
+    return list(zip((entry_id for entry_id, _ in fields), encrypt_many([f for _, f in fields])))
+
+
+def rekey_masters(rows: list) -> list:
+    """(user_id, encrypted_master_password) -> (user_id, new ciphertext)"""
+    return [(user_id, encrypt_master(decrypt_master(blob))) for user_id, blob in rows]
+
+
+# --- Tables ---
+
+def _entry_key(row) -> object:
+    return record_key_id(row[1]) if row[1] else 'cbc'
+
+
+def _master_key(row) -> object:
+    return master_key_id(row[1]) if row[1] else None
+
+
+def _write_entries(rows: list, results: list):
+    old = {row[0]: row for row in rows}
+    table = PasswordEntry.__table__
+    sealed = [{'b_id': i, 'b_old': old[i][1], 'b_new': r} for i, r in results if old[i][1]]
+    legacy = [{'b_id': i, 'b_old': old[i][4], 'b_new': r} for i, r in results if not old[i][1]]
+    if sealed:
+        db.session.execute(
+            update(table)
+            .where(table.c.entry_id == bindparam('b_id'), table.c.record == bindparam('b_old'))
+            .values(record=bindparam('b_new')),
+            sealed, execution_options={'synchronize_session': False})
+    if legacy:
+        db.session.execute(
+            update(table)
+            .where(table.c.entry_id == bindparam('b_id'), table.c.record.is_(None),
+                   table.c.password == bindparam('b_old'))
+            .values(record=bindparam('b_new'), website=b'', username=b'', password=b''),
+            legacy, execution_options={'synchronize_session': False})
+
+
+def _write_masters(rows: list, results: list):
+    old = dict(rows)
+    table = User.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.user_id == bindparam('b_id'),
+               table.c.encrypted_master_password == bindparam('b_old'))
+        .values(encrypted_master_password=bindparam('b_new')),
+        [{'b_id': i, 'b_old': old[i], 'b_new': r} for i, r in results],
+        execution_options={'synchronize_session': False})
+
+
+TABLES = {
+    'password_entries': {
+        'key': PasswordEntry.entry_id,
+        'columns': (PasswordEntry.entry_id, PasswordEntry.record, PasswordEntry.website,
+                    PasswordEntry.username, PasswordEntry.password),
+        'where': (PasswordEntry.deleted_at.is_(None),),  # tombstones hold no ciphertext
+        'key_id': _entry_key,
+        'rekey': rekey_entries,
+        'write': _write_entries,
+    },
+    'users': {
+        'key': User.user_id,
+        'columns': (User.user_id, User.encrypted_master_password),
+        'key_id': _master_key,
+        'rekey': rekey_masters,
+        'write': _write_masters,
+    },
+}
+
+
+def _batches(spec: dict, after: int, batch_size: int):
+    """Yield (last id, rows) in primary-key order, starting after ``after``."""
+    key = spec['key']
+    while True:
+        rows = db.session.execute(
+            select(*spec['columns']).where(key > after, *spec.get('where', ()))
+            .order_by(key).limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        after = rows[-1][0]
+        yield after, [tuple(row) for row in rows]
+
+
+def check(batch_size: int):
+    """Print how many rows each key id still covers."""
+    for name, spec in TABLES.items():
+        counts = Counter()
+        for _, rows in _batches(spec, 0, batch_size):
+            counts.update(spec['key_id'](row) for row in rows)
+        counts.pop(None, None)
+        summary = ', '.join(f"key {k}: {n}" for k, n in sorted(counts.items(), key=str)) or 'no ciphertexts'
+        print(f"{name}: {summary} (active key {ACTIVE_KEY_ID})")
+
+
+def rotate(name: str, pool, workers: int, batch_size: int, sleep: float, restart: bool):
+    spec = TABLES[name]
+    job = f"{name}:{ACTIVE_KEY_ID}"
+    checkpoint = db.session.get(KeyRotationCheckpoint, job)
+    if checkpoint is None:
+        checkpoint = KeyRotationCheckpoint(job=job, last_id=0, rows_rekeyed=0)
+        db.session.add(checkpoint)
+    elif restart:
+        checkpoint.last_id = checkpoint.rows_rekeyed = 0
+    elif checkpoint.last_id:
+        print(f"{name}: resuming after id {checkpoint.last_id} ({checkpoint.rows_rekeyed} rows done)")
+    db.session.commit()
+
+    started = time.perf_counter()
+    rekeyed = 0
+    in_flight = deque()
+    batches = _batches(spec, checkpoint.last_id, batch_size)
+    depth = workers * 2 if pool else 1
+
+    while True:
+        # Keep the pool busy: read ahead while earlier batches are being re-encrypted
+        while len(in_flight) < depth:
+            batch = next(batches, None)
+            if batch is None:
+                break
+            last_id, rows = batch
+            stale = [row for row in rows if spec['key_id'](row) not in (None, ACTIVE_KEY_ID)]
+            if not stale:
+                result = None
+            elif pool:
+                result = pool.submit(spec['rekey'], stale)
+            else:
+                result = spec['rekey'](stale)
+            in_flight.append((last_id, stale, result))
+        if not in_flight:
+            break
+
+        last_id, stale, result = in_flight.popleft()
+        if stale:
+            spec['write'](stale, result.result() if pool else result)
+        checkpoint.last_id = last_id
+        checkpoint.rows_rekeyed += len(stale)
+        checkpoint.updated_at = datetime.utcnow()
+        db.session.commit()
+        rekeyed += len(stale)
+        print(f"  {name}: re-encrypted {checkpoint.rows_rekeyed} rows (last id={last_id})")
+        if sleep:
+            time.sleep(sleep)
+
+    elapsed = time.perf_counter() - started
+    print(f"{name}: {rekeyed} rows re-encrypted under key {ACTIVE_KEY_ID} in {elapsed:.1f}s")
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Re-encrypt stored ciphertexts under the active AES key.")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help="Re-encryption processes (0 = in this process).")
+    parser.add_argument('--sleep', type=float, default=0.0,
+                        help="Seconds to pause between batches (throttling for live databases).")
+    parser.add_argument('--table', choices=list(TABLES), action='append',
+                        help="Only rotate this table (repeatable). Default: all.")
+    parser.add_argument('--restart', action='store_true', help="Ignore saved checkpoints.")
+    parser.add_argument('--check', action='store_true', help="Only count rows per key id.")
+    args = parser.parse_args()
+
+    app = create_app(web=False)
+    with app.app_context():
+        upgrade_schema()  # adds the record column and checkpoint table to an older database
+        if args.check:
+            check(args.batch_size)
+            return
+
+        pool = None
+        if args.workers:
+            pool = ProcessPoolExecutor(max_workers=args.workers,
+                                       mp_context=multiprocessing.get_context('spawn'))
+        try:
+            for name in args.table or TABLES:
+                rotate(name, pool, args.workers, args.batch_size, args.sleep, args.restart)
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
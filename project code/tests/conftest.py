@@ -0,0 +1,83 @@
+# Shared fixtures: the real app (create_app) against a temporary SQLite database.
+# Run from the project root:  python -m pytest tests
+
+import os
+import sys
+import tempfile
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.environ.setdefault('MAIL_OUTBOX_WORKER', 'false')
+# logging_utils writes to ./logs on import; keep test runs out of the tracked directory
+os.chdir(tempfile.mkdtemp(prefix='dunkey_tests_'))
+
+from backend import create_app, db, login_manager  # noqa: E402
+from backend.user_cache import user_cache  # noqa: E402
+
+PASSWORD = 'Test!Passw0rd'
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build apps with config overrides; databases and engines are cleaned up after the test."""
+    apps = []
+
+    def build(**overrides):
+        config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / f'test{len(apps)}.db'}",
+            'TESTING': True,
+            'RATELIMIT_ENABLED': False,
+            'RATELIMIT_STORAGE_URI': 'memory://',
+            'BCRYPT_LOG_ROUNDS': 4,
+        }
+        config.update(overrides)
+        app = create_app(config)
+        # main.py registers the user loader; the tests do not import it
+        if login_manager._user_callback is None:
+            login_manager.user_loader(lambda user_id: user_cache.load(int(user_id)))
+        with app.app_context():
+            db.create_all()
+        apps.append(app)
+        return app
+
+    yield build
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+def _register(app, username='alice'):
+    """A test client logged in as a freshly registered user."""
+    client = app.test_client()
+    response = client.post('/auth/register', data={
+        'username': username, 'email': f'{username}@test.local',
+        'password': PASSWORD, 'confirm_password': PASSWORD,
+    }, headers={'Accept': 'application/json'})
+    assert response.status_code == 200, response.data
+    return client
+
+
+@pytest.fixture
+def register():
+    return _register
+
+
+@pytest.fixture
+def client(app):
+    return _register(app)
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "slow: starts subprocesses (deselect with -m 'not slow')")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    from backend.hashing import hashing
+    hashing.shutdown()
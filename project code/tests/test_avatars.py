@@ -0,0 +1,59 @@
+import os
+import time
+from io import BytesIO
+import pytest
+from PIL import Image
+from backend.avatars import AvatarStore
+from backend.profile import discard_avatar
+
+DAY = 24 * 3600
+
+
+def _png(color) -> bytes:
+    out = BytesIO()
+    Image.new('RGB', (40, 40), color).save(out, 'PNG')
+    return out.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AvatarStore(root=str(tmp_path))
+    yield store
+    store.shutdown()
+
+
+def _stored(store, data: bytes, age: float = 0) -> str:
+    digest = store.store(data)
+    store.wait(digest)
+    if age:
+        stamp = time.time() - age
+        os.utime(store.directory(digest), (stamp, stamp))
+    return digest
+
+
+def test_replacing_an_avatar_leaves_shared_files(monkeypatch, store):
+    # Another user's upload of the same image has stored the files but not committed yet
+    monkeypatch.setattr('backend.profile.avatar_store', store)
+    digest = _stored(store, _png('red'))
+    discard_avatar(digest)
+    assert os.path.exists(os.path.join(store.directory(digest), 'source'))
+
+
+def test_sweep_deletes_only_old_unreferenced_digests(store):
+    in_use = _stored(store, _png('red'), age=2 * DAY)
+    orphan = _stored(store, _png('green'), age=2 * DAY)
+    fresh = _stored(store, _png('blue'))
+
+    assert store.sweep({in_use}, min_age=DAY, dry_run=True) == [orphan]
+    assert os.path.isdir(store.directory(orphan))
+
+    assert store.sweep({in_use}, min_age=DAY) == [orphan]
+    assert not os.path.exists(store.directory(orphan))
+    assert os.path.isdir(store.directory(in_use)) and os.path.isdir(store.directory(fresh))
+
+
+def test_storing_known_bytes_restarts_the_grace_period(store):
+    digest = _stored(store, _png('red'), age=2 * DAY)
+    # An upload in flight: the files exist already, the reference is not committed yet
+    assert store.store(_png('red')) == digest
+    assert store.sweep(set(), min_age=DAY) == []
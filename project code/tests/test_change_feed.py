@@ -0,0 +1,73 @@
+ENTRY = {'website': 'example.com', 'username': 'bob', 'password': 'Xx1!aaaaaa'}
+
+
+def _sync(client, since=0, limit=2):
+    """Follow ``next`` to the end of the feed; returns (changes, revision to store)."""
+    changes, query = [], {'since': since, 'limit': limit, 'fields': 'website'}
+    while True:
+        response = client.get('/passwords/api/changes', query_string=query)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page['changes']) <= limit
+        changes += page['changes']
+        if page['next'] is None:
+            return changes, page['revision']
+        query.update(page['next'])
+
+
+def _create_batch(client, *websites) -> list:
+    """Create entries in one batch, so they share one revision."""
+    response = client.post('/passwords/api/batch', json={'operations': [
+        dict(ENTRY, op='create', website=website) for website in websites]})
+    assert response.status_code == 200
+    return [result['entry']['entry_id'] for result in response.get_json()['results']]
+
+
+def test_paging_across_creates_updates_and_deletes(client):
+    a, b, c = _create_batch(client, 'a.com', 'b.com', 'c.com')  # one revision, paged by entry id
+    d = client.post('/passwords/api', json=dict(ENTRY, website='d.com')).get_json()['entry_id']
+
+    changes, revision = _sync(client)
+    assert [(ch['entry_id'], ch['website']) for ch in changes] == [(a, 'a.com'), (b, 'b.com'), (c, 'c.com'),
+                                                                    (d, 'd.com')]
+    assert changes[0]['revision'] == changes[2]['revision'] < changes[3]['revision'] == revision
+
+    assert client.put(f'/passwords/api/{b}', json=dict(ENTRY, website='b2.com')).status_code == 200
+    assert client.delete(f'/passwords/api/{c}').status_code == 204
+    [e] = _create_batch(client, 'e.com')
+
+    changes, latest = _sync(client, since=revision)
+    assert [(ch['entry_id'], ch.get('website'), ch.get('deleted', False)) for ch in changes] == [
+        (b, 'b2.com', False), (c, None, True), (e, 'e.com', False)]
+    assert [ch['revision'] for ch in changes] == sorted(ch['revision'] for ch in changes)
+    assert latest == changes[-1]['revision']
+
+    # Caught up: nothing new, same revision
+    assert _sync(client, since=latest) == ([], latest)
+
+
+def test_deletes_leave_tombstones_only_for_delta_syncs(client):
+    [a, b] = _create_batch(client, 'a.com', 'b.com')
+    _, revision = _sync(client)
+    assert client.delete(f'/passwords/api/{a}').status_code == 204
+
+    changes, _ = _sync(client, since=revision)
+    assert changes == [{'entry_id': a, 'revision': revision + 1, 'deleted': True}]
+    # A full sync has nothing to delete, so it skips tombstones
+    assert [ch['entry_id'] for ch in _sync(client)[0]] == [b]
+    # The deleted entry is gone from the other endpoints
+    assert client.get(f'/passwords/api/{a}/password').status_code == 404
+
+
+def test_the_feed_only_shows_the_callers_entries(app, register):
+    alice, bob = register(app, 'alice'), register(app, 'bob')
+    [a1, a2] = _create_batch(alice, 'alice1.com', 'alice2.com')
+    [b1] = _create_batch(bob, 'bob1.com')
+    _, bob_revision = _sync(bob)
+    assert alice.delete(f'/passwords/api/{a2}').status_code == 204
+
+    assert [ch['entry_id'] for ch in _sync(alice, since=0)[0]] == [a1]
+    assert [ch['entry_id'] for ch in _sync(bob)[0]] == [b1]
+    # Alice's delete is not in Bob's feed, and Bob cannot touch her entries
+    assert _sync(bob, since=bob_revision)[0] == []
+    assert bob.delete(f'/passwords/api/{a1}').status_code == 404
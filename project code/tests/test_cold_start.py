@@ -0,0 +1,13 @@
+import pytest
+from benchmarks.bench_cold_start import APP_BUDGET_MS, SCRIPT_APP_BUDGET_MS, measure
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('target, budget_ms', [('app', APP_BUDGET_MS), ('script-app', SCRIPT_APP_BUDGET_MS)])
+def test_cold_start_stays_within_budget(target, budget_ms):
+    # Fresh interpreters, as in benchmarks/bench_cold_start.py. The best run is
+    # compared: an eager import slows every run, a busy test machine only some.
+    result = measure(target, runs=3, database_uri='sqlite://')
+    assert result['best_ms'] <= budget_ms, (
+        f"{target} starts in {result['best_ms']:.0f} ms (budget {budget_ms:.0f} ms): {result['phases_ms']}; "
+        f"see tools/profile_startup.py")
@@ -0,0 +1,35 @@
+import pytest
+from Crypto.Cipher import AES
+from backend import crypto
+from benchmarks.bench_record_crypto import measure
+
+RECORD = ('example.com', 'bob', 'Xx1!aaaaaa')
+
+
+def test_records_round_trip():
+    records = [RECORD, ('a', '', 'ünïcode')]
+    assert crypto.decrypt_many(crypto.encrypt_many(records)) == records
+
+
+def test_envelope_is_plain_aes_gcm():
+    envelope = crypto.seal_record(RECORD)
+    assert envelope[0] == crypto.RECORD_VERSION_GCM
+    key = crypto._record_key(envelope[1])
+    cipher = AES.new(key, AES.MODE_GCM, nonce=envelope[2:14])
+    cipher.update(envelope[:2])
+    plaintext = cipher.decrypt_and_verify(envelope[30:], envelope[14:30])
+    assert plaintext == b'["example.com","bob","Xx1!aaaaaa"]'
+
+
+@pytest.mark.parametrize('position', [0, 1, 5, 20, -1])
+def test_tampered_envelope_is_rejected(position):
+    envelope = bytearray(crypto.seal_record(RECORD))
+    envelope[position] ^= 1
+    with pytest.raises(ValueError):
+        crypto.open_record(bytes(envelope))
+
+
+def test_batch_records_beat_the_legacy_columns():
+    result = measure(200, repeat=3)
+    assert result['batch_encrypt_us'] * 2 < result['legacy_encrypt_us']
+    assert result['batch_decrypt_us'] * 2 < result['legacy_decrypt_us']
@@ -0,0 +1,20 @@
+import time
+import pytest
+from backend.hashing import HashingBusy, HashingService
+
+
+def _slow(seconds):
+    time.sleep(seconds)
+    return True
+
+
+def test_saturated_pool_times_out_as_busy(app):
+    service = HashingService()
+    app.config.update(HASH_POOL_WORKERS=1, HASH_POOL_MAX_PENDING=4, HASH_POOL_TIMEOUT=0.2)
+    service.init_app(app)
+    try:
+        with pytest.raises(HashingBusy):
+            service._run(_slow, 5)
+        assert service.timed_out == 1
+    finally:
+        service.shutdown()
@@ -0,0 +1,76 @@
+import logging
+import time
+import pytest
+from backend.logging_utils import JsonLinesFormatter
+from tools import log_analytics
+
+
+def _json_line(event: str, created: float, sample_rate=None, **fields) -> str:
+    record = logging.LogRecord('vault_app', logging.WARNING, __file__, 0, 'Login failed, "quoted"', None, None)
+    record.created = created
+    record.event = event
+    record.sample_rate = sample_rate
+    record.details = {'reason': 'bad password'}
+    for name, value in fields.items():
+        setattr(record, name, value)
+    return JsonLinesFormatter().format(record)
+
+
+@pytest.fixture
+def local_time(monkeypatch):
+    """Run with a fixed local timezone (UTC+2, no DST) for the legacy lines."""
+    monkeypatch.setenv('TZ', 'Etc/GMT-2')
+    time.tzset()
+    log_analytics._legacy_utc.cache_clear()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+    log_analytics._legacy_utc.cache_clear()
+
+
+def _report(tmp_path, lines, **window) -> dict:
+    path = tmp_path / 'vault_app.log'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    report = log_analytics.Report(window.get('since'), window.get('until'), 'hour')
+    report.run([str(path)], jobs=1)
+    return report.to_dict(top=10)
+
+
+def test_sampled_events_are_scaled_up(tmp_path, local_time):
+    noon = 1767268800.0  # 2026-01-01 12:00 UTC
+    lines = [_json_line('login_failed', noon + i, sample_rate=0.25, user='alice', ip='10.0.0.1')
+             for i in range(3)]
+    lines.append(_json_line('vault_entry_create', noon, user='alice'))
+    lines.append(_json_line('vault_entry_edit', noon, sample_rate=1.0, user='alice'))
+    data = _report(tmp_path, lines)
+
+    assert data['failed_logins_by_ip'] == {'10.0.0.1': 12}
+    assert data['failed_logins_by_identifier'] == {'alice': 12}
+    assert data['vault_changes_by_user'] == {'alice': {'create': 1, 'edit': 1}}
+    assert data['sampled_events'] == {'login_failed': 3}
+    assert data['windows']['2026-01-01 12']['failed_logins'] == 12
+
+
+def test_legacy_local_times_are_reported_in_utc(tmp_path, local_time):
+    lines = [
+        # 14:30 local is 12:30 UTC
+        "2026-01-01 14:30:00,123 WARNING vault_app: LOGIN FAILED for identifier='bob' from IP=10.0.0.2",
+        "2026-01-01 14:31:00,000 INFO vault_app: User 'bob' created a vault entry",
+        _json_line('login_failed', 1767270600.0, user='bob', ip='10.0.0.2'),  # 12:30 UTC
+    ]
+    data = _report(tmp_path, lines, since='2026-01-01 12:00', until='2026-01-01 12:59')
+    assert data['failed_logins_by_ip'] == {'10.0.0.2': 2}
+    assert data['vault_changes_by_user'] == {'bob': {'create': 1, 'edit': 0}}
+    assert list(data['windows']) == ['2026-01-01 12']
+    assert data['sampled_events'] == {}
+
+    # The same lines read as UTC would fall outside the window
+    assert _report(tmp_path, lines, since='2026-01-01 14:00')['failed_logins_by_ip'] == {}
+
+
+def test_rotations_are_kept_a_day_either_side_of_the_window(tmp_path):
+    for day in ('2026-01-01', '2026-01-02', '2026-01-03', '2026-01-05'):
+        (tmp_path / f'vault_app.log.{day}').write_text('')
+    names = [p.rsplit('.', 1)[-1] for p in log_analytics.log_files(str(tmp_path), '2026-01-03 00:30',
+                                                                      '2026-01-04 00:00')]
+    assert names == ['2026-01-02', '2026-01-03', '2026-01-05']
@@ -0,0 +1,175 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+from backend import db, outbox
+from backend.model import OutboxMessage
+from tools.smtp_sink import SMTPSink
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+LEASE = 120
+BACKOFF = 30
+
+
+class Clock(datetime):
+    """Stands in for outbox.datetime so leases and backoff can be stepped through."""
+    current = T0
+
+    @classmethod
+    def utcnow(cls):
+        return cls.current
+
+
+@pytest.fixture
+def sink():
+    with SMTPSink() as sink:
+        yield sink
+
+
+@pytest.fixture
+def mail_app(make_app, sink):
+    def build(**overrides):
+        config = {
+            'MAIL_SERVER': 'localhost', 'MAIL_PORT': sink.port, 'MAIL_USE_TLS': False,
+            'MAIL_USERNAME': None, 'MAIL_SUPPRESS_SEND': False,
+            'MAIL_OUTBOX_LEASE': LEASE, 'MAIL_OUTBOX_BACKOFF_BASE': BACKOFF, 'MAIL_OUTBOX_MAX_ATTEMPTS': 3,
+        }
+        config.update(overrides)
+        return make_app(**config)
+    return build
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(outbox, 'datetime', Clock)
+    Clock.current = T0
+    return Clock
+
+
+def _enqueue(app, *recipients) -> list:
+    """One message per recipient, due in the given order; returns their ids."""
+    with app.app_context():
+        messages = [outbox.enqueue(f'Message {i}', 'support@test.local', [to], 'Hello')
+                    for i, to in enumerate(recipients)]
+        for i, message in enumerate(messages):
+            message.next_attempt_at = T0 - timedelta(seconds=len(messages) - i)
+        db.session.commit()
+        return [message.message_id for message in messages]
+
+
+def _send_at(app, seconds: float) -> int:
+    Clock.current = T0 + timedelta(seconds=seconds)
+    with app.app_context():
+        return outbox.send_due(app)
+
+
+def _message(app, message_id) -> OutboxMessage:
+    with app.app_context():
+        message = db.session.get(OutboxMessage, message_id)
+        db.session.expunge(message)
+        return message
+
+
+def test_enqueued_messages_are_sent_over_one_connection(mail_app, sink, clock):
+    app = mail_app()
+    ids = _enqueue(app, 'a@test.local', 'b@test.local')
+    assert _send_at(app, 0) == 2
+    assert [m['recipients'] for m in sink.messages] == [['<a@test.local>'], ['<b@test.local>']]
+    assert sink.connections == 1
+    for message_id in ids:
+        message = _message(app, message_id)
+        assert (message.status, message.attempts) == ('sent', 1)
+    assert _send_at(app, 1) == 0
+
+
+def test_an_expired_lease_is_reclaimed(mail_app, sink, clock):
+    app = mail_app()
+    [message_id] = _enqueue(app, 'a@test.local')
+    # A worker claims the message and dies before sending it
+    with app.app_context():
+        assert [m.message_id for m in outbox._claim_due(app, T0)] == [message_id]
+    assert _send_at(app, LEASE - 1) == 0
+    assert _send_at(app, LEASE + 1) == 1
+    assert len(sink.messages) == 1
+    assert _message(app, message_id).status == 'sent'
+
+
+def test_failed_sends_back_off_then_dead_letter(mail_app, sink, clock):
+    app = mail_app()
+    sink.reject.add('bad@test.local')
+    [message_id] = _enqueue(app, 'bad@test.local')
+
+    assert _send_at(app, 0) == 1
+    message = _message(app, message_id)
+    assert (message.status, message.attempts) == ('pending', 1)
+    assert message.next_attempt_at == T0 + timedelta(seconds=BACKOFF)
+    assert message.last_error
+
+    assert _send_at(app, BACKOFF - 1) == 0
+    assert _send_at(app, BACKOFF) == 1
+    message = _message(app, message_id)
+    assert message.attempts == 2
+    assert message.next_attempt_at == T0 + timedelta(seconds=BACKOFF + 2 * BACKOFF)
+
+    assert _send_at(app, 3 * BACKOFF) == 1
+    message = _message(app, message_id)
+    assert (message.status, message.attempts) == ('failed', 3)
+    assert _send_at(app, 10 * BACKOFF) == 0
+    assert sink.messages == []
+
+
+def test_a_retry_after_a_failure_is_delivered(mail_app, sink, clock):
+    app = mail_app()
+    sink.reject.add('flaky@test.local')
+    [message_id] = _enqueue(app, 'flaky@test.local')
+    _send_at(app, 0)
+    sink.reject.clear()
+    assert _send_at(app, BACKOFF) == 1
+    message = _message(app, message_id)
+    assert (message.status, message.attempts) == ('sent', 2)
+    assert len(sink.messages) == 1
+
+
+def test_a_dropped_connection_counts_each_attempt_once(mail_app, sink, clock):
+    app = mail_app()
+    sink.reject.add('bad@test.local')
+    sink.drop.add('gone@test.local')
+    ids = _enqueue(app, 'bad@test.local', 'gone@test.local', 'later@test.local')
+    assert _send_at(app, 0) == 3
+    attempts = [_message(app, message_id).attempts for message_id in ids]
+    # bad: refused, gone: connection dropped, later: never reached the relay
+    assert attempts == [1, 1, 1]
+
+
+def test_two_workers_never_send_a_message_twice(mail_app, sink, tmp_path):
+    uri = f"sqlite:///{tmp_path / 'shared.db'}"
+    workers = [mail_app(SQLALCHEMY_DATABASE_URI=uri, MAIL_OUTBOX_BATCH_SIZE=5) for _ in range(2)]
+    sink.delay = 0.01
+    recipients = [f'user{i}@test.local' for i in range(30)]
+    with workers[0].app_context():
+        for to in recipients:
+            outbox.enqueue('Hello', 'support@test.local', [to], 'Hello')
+        db.session.commit()
+
+    start = threading.Barrier(len(workers))
+    errors = []
+
+    def drain(app):
+        start.wait()
+        try:
+            with app.app_context():
+                while outbox.send_due(app):
+                    pass
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=drain, args=(app,)) for app in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert errors == []
+    delivered = sorted(to for m in sink.messages for to in m['recipients'])
+    assert delivered == sorted(f'<{to}>' for to in recipients)
+    with workers[0].app_context():
+        assert {m.status for m in OutboxMessage.query} == {'sent'}
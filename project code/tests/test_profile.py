@@ -0,0 +1,28 @@
+from backend import db
+from backend.model import User
+
+
+def _profile(client, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    return client.get('/profile/api', headers=headers)
+
+
+def test_credential_changes_invalidate_the_profile_etag(app, client):
+    first = _profile(client)
+    etag = first.headers['ETag']
+    assert _profile(client, etag).status_code == 304
+    with app.app_context():
+        revision = User.revision_of(1)
+
+    response = client.post('/profile/update-credentials', data={
+        'new_username': 'renamed', 'confirm_profile_change': 'on'})
+    assert response.status_code == 302
+
+    with app.app_context():
+        # The bump commits in the same transaction as the rename
+        assert User.revision_of(1) == revision + 1
+        assert db.session.get(User, 1).username == 'renamed'
+    second = _profile(client, etag)
+    assert second.status_code == 200
+    # Leaving the email field empty keeps the current address
+    assert second.get_json() == dict(first.get_json(), username='renamed')
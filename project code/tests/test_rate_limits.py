@@ -0,0 +1,8 @@
+def test_rate_limited_requests_get_retry_after(make_app, register):
+    client = register(make_app(RATELIMIT_ENABLED=True))
+    statuses = [client.get('/passwords/api/health').status_code for _ in range(10)]
+    assert statuses == [200] * 10
+
+    response = client.get('/passwords/api/health')
+    assert response.status_code == 429
+    assert 1 <= int(response.headers['Retry-After']) <= 60
@@ -0,0 +1,98 @@
+import os
+import pytest
+import rotate_keys
+from backend import crypto, db
+from backend.model import User, PasswordEntry, KeyRotationCheckpoint
+
+OLD_KEY, NEW_KEY = os.urandom(32), os.urandom(32)
+
+
+@pytest.fixture
+def use_keyring(monkeypatch):
+    """Swap the process keyring; rotate_keys binds ACTIVE_KEY_ID at import, so patch it too."""
+    def use(keys: dict, active_id: int):
+        monkeypatch.setattr(crypto, '_keyring', (keys, active_id, min(keys)))
+        monkeypatch.setattr(crypto, '_record_keys', {})
+        monkeypatch.setattr(rotate_keys, 'ACTIVE_KEY_ID', active_id)
+    return use
+
+
+def _seed(users: int, entries: int) -> dict:
+    """Users with master passwords and sealed entries, plus one legacy CBC entry each."""
+    expected = {'masters': {}, 'entries': {}}
+    for u in range(users):
+        user = User(username=f'user{u}', email=f'user{u}@test.local', password_hash='x')
+        user.set_master_password(f'master-{u}')
+        db.session.add(user)
+        db.session.flush()
+        expected['masters'][user.user_id] = f'master-{u}'
+        rows = []
+        for e in range(entries):
+            entry = PasswordEntry(user_id=user.user_id)
+            entry.set_fields(website=f'site{e}.example.com', username=f'user{u}', password=f'Pw{e}!secret')
+            rows.append(entry)
+        rows.append(PasswordEntry(user_id=user.user_id, website=crypto.encrypt_master('legacy.example.com'),
+                                  username=crypto.encrypt_master(f'user{u}'),
+                                  password=crypto.encrypt_master('Legacy!Pw1')))
+        db.session.add_all(rows)
+        db.session.flush()
+        for entry, e in zip(rows, range(entries)):
+            expected['entries'][entry.entry_id] = (f'site{e}.example.com', f'user{u}', f'Pw{e}!secret')
+        expected['entries'][rows[-1].entry_id] = ('legacy.example.com', f'user{u}', 'Legacy!Pw1')
+    db.session.commit()
+    return expected
+
+
+def _rotate(name: str):
+    rotate_keys.rotate(name, pool=None, workers=0, batch_size=4, sleep=0, restart=False)
+
+
+def test_interrupted_rotation_resumes_and_rekeys_everything(app, use_keyring, monkeypatch):
+    use_keyring({1: OLD_KEY, 2: NEW_KEY}, active_id=1)
+    with app.app_context():
+        expected = _seed(users=3, entries=5)  # 18 entries, 3 of them legacy
+
+        use_keyring({1: OLD_KEY, 2: NEW_KEY}, active_id=2)
+        spec = rotate_keys.TABLES['password_entries']
+        write, calls = spec['write'], []
+
+        def crash_on_second_batch(rows, results):
+            calls.append(len(rows))
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            write(rows, results)
+
+        monkeypatch.setitem(spec, 'write', crash_on_second_batch)
+        with pytest.raises(KeyboardInterrupt):
+            _rotate('password_entries')
+        db.session.rollback()
+
+        checkpoint = db.session.get(KeyRotationCheckpoint, 'password_entries:2')
+        first_batch = sorted(expected['entries'])[:4]
+        assert (checkpoint.last_id, checkpoint.rows_rekeyed) == (first_batch[-1], 4)
+        keys = {e.entry_id: crypto.record_key_id(e.record) for e in PasswordEntry.query if e.record}
+        assert {keys[i] for i in first_batch} == {2}
+        assert 1 in keys.values()
+
+        monkeypatch.setitem(spec, 'write', write)
+        batches, starts = rotate_keys._batches, []
+
+        def recording_batches(spec, after, batch_size):
+            starts.append(after)
+            return batches(spec, after, batch_size)
+
+        monkeypatch.setattr(rotate_keys, '_batches', recording_batches)
+        _rotate('password_entries')
+        assert starts == [first_batch[-1]]  # resumed from the checkpoint
+        _rotate('users')
+        db.session.expire_all()
+        assert db.session.get(KeyRotationCheckpoint, 'password_entries:2').rows_rekeyed == len(expected['entries'])
+
+        # Everything opens with the old key gone from the ring
+        use_keyring({2: NEW_KEY}, active_id=2)
+        entries = PasswordEntry.query.all()
+        assert all(e.record and crypto.record_key_id(e.record) == 2 for e in entries)
+        assert {e.entry_id: crypto.open_record(e.record) for e in entries} == expected['entries']
+        for user in User.query:
+            assert crypto.master_key_id(user.encrypted_master_password) == 2
+            assert user.get_master_password() == expected['masters'][user.user_id]
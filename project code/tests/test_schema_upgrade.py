@@ -0,0 +1,75 @@
+import sqlite3
+import pytest
+from sqlalchemy import inspect
+from backend import db
+from backend.crypto import encrypt_master
+from backend.model import PasswordEntry
+from backfill_vault import backfill
+from backend.schema import upgrade_schema
+
+# The tables as they were before the vault features, as existing databases still have them
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(45) NOT NULL UNIQUE,
+    email VARCHAR(95) NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL,
+    first_name VARCHAR(100),
+    last_name VARCHAR(100),
+    date_of_birth DATE,
+    prefers_dark_mode BOOLEAN DEFAULT 0,
+    encrypted_master_password TEXT,
+    avatar_path VARCHAR(255)
+);
+CREATE TABLE password_entries (
+    entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    website BLOB NOT NULL,
+    username BLOB NOT NULL,
+    password BLOB NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE
+);
+"""
+
+NEW_COLUMNS = {
+    'users': {'vault_revision'},
+    'password_entries': {'record', 'strength', 'password_fingerprint', 'revision', 'updated_at', 'deleted_at'},
+}
+NEW_INDEXES = {
+    'password_entries': {'ix_password_entries_user_strength', 'ix_password_entries_user_fingerprint',
+                         'ix_password_entries_user_revision'},
+}
+
+
+@pytest.fixture
+def baseline_app(make_app, tmp_path):
+    path = tmp_path / 'baseline.db'
+    with sqlite3.connect(path) as connection:
+        connection.executescript(BASELINE_SCHEMA)
+        connection.execute("INSERT INTO users (username, email, password_hash) VALUES ('old', 'old@test.local', 'x')")
+        connection.execute("INSERT INTO password_entries (website, username, password, user_id) VALUES (?, ?, ?, 1)",
+                           [encrypt_master(value) for value in ('example.com', 'bob', 'Xx1!aaaaaa')])
+    return make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}")
+
+
+def test_upgrade_adds_the_new_columns_and_indexes(baseline_app):
+    with baseline_app.app_context():
+        assert upgrade_schema(dry_run=True)
+        upgrade_schema()
+        inspector = inspect(db.engine)
+        for table, columns in NEW_COLUMNS.items():
+            assert columns <= {column['name'] for column in inspector.get_columns(table)}
+        for table, indexes in NEW_INDEXES.items():
+            assert indexes <= {index['name'] for index in inspector.get_indexes(table)}
+        # Existing users start at revision 0
+        assert db.session.execute(db.text("SELECT vault_revision FROM users")).scalar() == 0
+        # Re-running is a no-op
+        assert upgrade_schema() == []
+
+
+def test_backfill_runs_on_an_upgraded_database(baseline_app):
+    with baseline_app.app_context():
+        upgrade_schema()
+        assert backfill(100, migrate_records=True) == 1
+        entry = PasswordEntry.live(1).one()
+        assert entry.record and entry.revision == 0 and entry.strength
+        assert (entry.get_website(), entry.get_username(), entry.get_password()) == ('example.com', 'bob', 'Xx1!aaaaaa')
@@ -0,0 +1,88 @@
+from backend import db, search_index
+from backend.model import EntrySearchToken
+
+PASSWORD = 'Xx1!aaaaaa'
+
+
+def _create(client, website, username) -> int:
+    response = client.post('/passwords/api', json={'website': website, 'username': username, 'password': PASSWORD})
+    assert response.status_code == 201
+    return response.get_json()['entry_id']
+
+
+def _search(client, text) -> list:
+    response = client.get('/passwords/api/search', query_string={'search': text})
+    assert response.status_code == 200
+    return sorted(entry['website'] for entry in response.get_json())
+
+
+def _token_count(app, entry_id) -> int:
+    with app.app_context():
+        return db.session.scalar(db.select(db.func.count()).where(EntrySearchToken.entry_id == entry_id))
+
+
+def test_ngram_matching(client):
+    _create(client, 'github.com', 'alice')
+    _create(client, 'gitlab.com', 'bob')
+    _create(client, 'example.org', 'carol')
+    assert _search(client, 'git') == ['github.com', 'gitlab.com']
+    assert _search(client, 'HUB.c') == ['github.com']
+    assert _search(client, 'carol') == ['example.org']
+    assert _search(client, 'gitz') == []
+
+
+def test_grams_spread_across_fields_are_not_a_match(client):
+    # "bcde" has the 3-grams bcd (website) and cde (username): an index hit, not a substring
+    _create(client, 'abcd.com', 'cdefg')
+    assert _search(client, 'bcde') == []
+    assert _search(client, 'bcd') == ['abcd.com']
+
+
+def test_short_queries(client):
+    _create(client, 'github.com', 'alice')
+    _create(client, 'example.org', 'bob')
+    _create(client, 'nas.local', 'root')
+    # One character is below MIN_QUERY_LENGTH: no index lookup, plain substring filtering
+    assert _search(client, 'g') == ['example.org', 'github.com']
+    # Two characters use the 2-grams
+    assert _search(client, 'gi') == ['github.com']
+    assert _search(client, 'ro') == ['nas.local']
+    assert len(_search(client, '')) == 3
+
+
+def test_tokens_follow_updates_and_deletes(app, client):
+    first = _create(client, 'github.com', 'alice')
+    second = _create(client, 'gitlab.com', 'bob')
+
+    assert client.put(f'/passwords/api/{first}', json={
+        'website': 'example.org', 'username': 'alice', 'password': PASSWORD}).status_code == 200
+    assert _search(client, 'hub') == []
+    assert _search(client, 'exam') == ['example.org']
+    with app.app_context():
+        user_id = db.session.scalar(db.select(EntrySearchToken.user_id).where(EntrySearchToken.entry_id == first))
+        assert _token_count(app, first) == len(search_index.entry_tokens(user_id, 'example.org', 'alice'))
+
+    response = client.patch(f'/passwords/api/{second}', json={'username': 'carol'}, headers={'If-Match': '*'})
+    assert response.status_code == 200
+    assert _search(client, 'bob') == []
+    assert _search(client, 'carol') == ['gitlab.com']
+
+    assert client.delete(f'/passwords/api/{first}').status_code == 204
+    assert _token_count(app, first) == 0
+    response = client.post('/passwords/api/batch', json={'operations': [{'op': 'delete', 'entry_id': second}]})
+    assert response.status_code == 200
+    assert _token_count(app, second) == 0
+    assert _search(client, 'com') == []
+
+
+def test_no_hits_across_users(app, register):
+    alice, bob = register(app, 'alice'), register(app, 'bob')
+    _create(alice, 'github.com', 'alice')
+    _create(bob, 'github.com', 'bob')
+    _create(bob, 'bitbucket.org', 'bob')
+
+    assert _search(alice, 'git') == ['github.com']
+    assert _search(alice, 'bucket') == []
+    assert _search(bob, 'git') == ['github.com']
+    # The same text gives different tokens for different users
+    assert not search_index.entry_tokens(1, 'github.com') & search_index.entry_tokens(2, 'github.com')
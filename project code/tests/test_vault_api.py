@@ -0,0 +1,76 @@
+import pytest
+from backend import model
+
+ENTRY = {'website': 'example.com', 'username': 'bob', 'password': 'Xx1!aaaaaa'}
+
+
+@pytest.fixture
+def decryptions(monkeypatch):
+    """Count the records opened through the model (single and batched)."""
+    calls = []
+    open_record, decrypt_many = model.open_record, model.decrypt_many
+
+    def counting_open(envelope):
+        calls.append(1)
+        return open_record(envelope)
+
+    def counting_many(envelopes):
+        calls.append(len(envelopes))
+        return decrypt_many(envelopes)
+
+    monkeypatch.setattr(model, 'open_record', counting_open)
+    monkeypatch.setattr(model, 'decrypt_many', counting_many)
+    return calls
+
+
+def _create(client, **fields):
+    response = client.post('/passwords/api', json=dict(ENTRY, **fields))
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def test_full_put_does_not_decrypt_the_stored_record(client, decryptions):
+    entry = _create(client)
+    response = client.put(f"/passwords/api/{entry['entry_id']}",
+                          json={'website': 'new.example.com', 'username': 'carol', 'password': 'Yy2@bbbbbb'})
+    assert response.status_code == 200
+    assert response.get_json()['website'] == 'new.example.com'
+    assert sum(decryptions) == 0
+
+
+def test_patch_with_a_weak_if_match_is_a_bad_request(client):
+    entry = _create(client)
+    url = f"/passwords/api/{entry['entry_id']}"
+    response = client.patch(url, json={'username': 'carol'}, headers={'If-Match': 'W/"1"'})
+    assert response.status_code == 400
+    assert 'weak' in response.get_json()['errors']['If-Match']
+
+    response = client.patch(url, json={'username': 'carol'}, headers={'If-Match': '"1"'})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('body', [[1, 2], 'text', 5])
+def test_batch_with_a_non_object_body_is_a_bad_request(client, body):
+    response = client.post('/passwords/api/batch', json=body)
+    assert response.status_code == 400
+    assert 'body' in response.get_json()['errors']
+
+
+def test_batch_reports_malformed_operations(client):
+    response = client.post('/passwords/api/batch', json={'operations': [
+        1, {'op': 'delete', 'entry_id': [1]}, dict(ENTRY, op='create')]})
+    assert response.status_code == 400
+    assert [(f['index'], f['status']) for f in response.get_json()['errors']] == [(0, 400), (1, 404)]
+
+
+def test_patch_with_a_non_object_body_is_a_bad_request(client):
+    entry = _create(client)
+    response = client.patch(f"/passwords/api/{entry['entry_id']}", json=['username'], headers={'If-Match': '*'})
+    assert response.status_code == 400
+    assert 'body' in response.get_json()['errors']
+
+
+def test_patch_of_a_missing_entry_is_a_json_404(client):
+    response = client.patch('/passwords/api/999', json={'username': 'carol'}, headers={'If-Match': '*'})
+    assert response.status_code == 404
+    assert response.get_json()['errors']['entry_id'] == 'Entry not found.'
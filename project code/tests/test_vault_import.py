@@ -0,0 +1,58 @@
+import pytest
+
+
+def _import_csv(client, body: bytes):
+    return client.post('/passwords/api/import?format=csv', data=body, content_type='text/csv')
+
+
+def test_csv_import(client):
+    response = _import_csv(client, b'website,username,password\nexample.com,bob,Xx1!aaaaaa\n')
+    assert response.status_code == 200
+    assert response.get_json()['imported'] == 1
+
+
+def test_non_utf8_csv_is_rejected(client):
+    response = _import_csv(client, b'\xff\xfe bad')
+    assert response.status_code == 400
+    assert 'UTF-8' in response.get_json()['errors']['file']
+
+
+def test_unterminated_quote_csv_is_rejected(client):
+    response = _import_csv(client, b'website,username,password\n"example.com,bob,Xx1!aaaaaa\n')
+    assert response.status_code == 400
+    assert 'Invalid CSV' in response.get_json()['errors']['file']
+    assert client.get('/passwords/api').get_json()['entries'] == []
+
+
+def test_non_utf8_ndjson_is_rejected(client):
+    response = client.post('/passwords/api/import?format=ndjson', data=b'{"website": "\xff"}\n',
+                           content_type='application/x-ndjson')
+    assert response.status_code == 400
+
+
+def _import_json(client, document):
+    return client.post('/passwords/api/import?format=json', json=document)
+
+
+def test_bitwarden_import(client):
+    response = _import_json(client, {'items': [
+        {'type': 1, 'name': 'Example', 'login': {'uris': [{'uri': 'example.com'}],
+                                                 'username': 'bob', 'password': 'Xx1!aaaaaa'}},
+        {'type': 2, 'name': 'A secure note'},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['imported'] == 1
+
+
+@pytest.mark.parametrize('document', [
+    {'items': [1]},
+    {'items': 5},
+    {'items': [{'type': 1, 'login': 'bob'}]},
+    {'items': [{'type': 1, 'login': {'uris': ['example.com'], 'username': 'bob', 'password': 'Xx1!aaaaaa'}}]},
+    {'items': [{'type': 1, 'name': 'x', 'login': {'username': 42, 'password': 'Xx1!aaaaaa'}}]},
+    {'items': [{'type': 1, 'name': 'x', 'login': {'username': 'bob', 'password': ['Xx1!aaaaaa']}}]},
+])
+def test_malformed_bitwarden_export_is_rejected(client, document):
+    response = _import_json(client, document)
+    assert response.status_code == 400
+    assert 'file' in response.get_json()['errors']
@@ -0,0 +1,126 @@
+# Builds the production copy of the frontend into frontend/dist:
+#   - css/, js/ and assets/ files are copied under content-hashed names
+#     (css/styles.css -> css/styles.3f9a1c2b7d.css) so they can be cached forever
+#   - HTML pages keep their names, with references rewritten to the hashed files
+#   - every text file also gets a precompressed .gz (and .br when the optional
+#     `brotli` package is installed) next to it
+#   - manifest.json maps each logical path to its built file, ETag and encodings
+#
+# Run after changing anything in frontend/:  python tools/build_assets.py
+# backend/assets.py serves from dist when the manifest exists.
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRONTEND = os.path.join(BASE, 'frontend')
+DIST = os.path.join(FRONTEND, 'dist')
+
+HASHED_DIRS = ('css', 'js', 'assets')
+COMPRESSIBLE = ('.html', '.css', '.js', '.svg', '.json', '.txt')
+MIN_COMPRESS_SIZE = 256  # smaller files are not worth a compressed variant
+
+# src="js/x.js", href="/css/y.css", src="assets/D.svg"
+REFERENCE_RE = re.compile(r'''(?P<attr>\b(?:src|href)=["'])/?(?P<path>(?:%s)/[^"'?#]+)''' % '|'.join(HASHED_DIRS))
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_variants(rel_path: str, data: bytes) -> dict:
+    """Write the file and its compressed variants; return {encoding: relative path}."""
+    target = os.path.join(DIST, rel_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+
+    variants = {'identity': rel_path}
+    if not rel_path.endswith(COMPRESSIBLE) or len(data) < MIN_COMPRESS_SIZE:
+        return variants
+
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        with open(target + '.gz', 'wb') as f:
+            f.write(gz)
+        variants['gzip'] = rel_path + '.gz'
+
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            with open(target + '.br', 'wb') as f:
+                f.write(br)
+            variants['br'] = rel_path + '.br'
+    return variants
+
+
+def _entry(rel_path: str, data: bytes, immutable: bool) -> dict:
+    return {
+        'path': rel_path,
+        'etag': _digest(data)[:32],
+        'size': len(data),
+        'immutable': immutable,
+        'encodings': _write_variants(rel_path, data),
+    }
+
+
+def build() -> dict:
+    if os.path.isdir(DIST):
+        shutil.rmtree(DIST)
+    manifest = {}
+
+    # Hashed static files first, so pages can be rewritten to point at them
+    for directory in HASHED_DIRS:
+        root_dir = os.path.join(FRONTEND, directory)
+        for root, _, files in os.walk(root_dir):
+            for name in sorted(files):
+                source = os.path.join(root, name)
+                logical = os.path.relpath(source, FRONTEND).replace(os.sep, '/')
+                with open(source, 'rb') as f:
+                    data = f.read()
+                stem, ext = os.path.splitext(logical)
+                hashed = f"{stem}.{_digest(data)[:10]}{ext}"
+                manifest[logical] = _entry(hashed, data, immutable=True)
+
+    def rewrite(match):
+        entry = manifest.get(match.group('path'))
+        if entry is None:
+            return match.group(0)
+        return f"{match.group('attr')}/{entry['path']}"
+
+    for name in sorted(os.listdir(FRONTEND)):
+        if not name.endswith('.html'):
+            continue
+        with open(os.path.join(FRONTEND, name), encoding='utf-8') as f:
+            html = f.read()
+        data = REFERENCE_RE.sub(rewrite, html).encode('utf-8')
+        manifest[name] = _entry(name, data, immutable=False)
+
+    with open(os.path.join(DIST, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fingerprinted, precompressed frontend assets.")
+    parser.parse_args()
+
+    manifest = build()
+    raw = sum(entry['size'] for entry in manifest.values())
+    print(f"Built {len(manifest)} files ({raw} bytes) into {DIST}")
+    if brotli is None:
+        print("brotli is not installed: only gzip variants were written.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+# Aggregates logs/vault_app.log and its midnight rotations for incident triage:
+#   - failed logins by IP and by identifier
+#   - vault entry creates/edits per user
+#   - rate-limit hits per endpoint
+# optionally restricted to a time window and broken down per hour or day.
+#
+#   python tools/log_analytics.py --since 24h --bucket hour
+#   python tools/log_analytics.py --since 2025-05-01 --until 2025-05-14 --json
+#
+# Reads both the JSON-lines format written by backend/logging_utils.py and the
+# older free-text lines. Plain files are memory-mapped and scanned with compiled
+# byte regexes whose matches are tallied straight into a Counter, so the scan
+# and the counting run in C and no per-line Python code runs for JSON records.
+# Large files are split at line boundaries and scanned by --jobs processes; .gz
+# rotations are streamed in fixed-size blocks. Memory use depends only on the
+# number of distinct (time, event, user, ip, endpoint) keys, not on log size.
+#
+# Time windows are applied at minute precision, in UTC. JSON records carry UTC
+# timestamps; legacy free-text lines were stamped in the server's local time and
+# are converted to UTC using this machine's timezone, so run the report on (or
+# with TZ set like) the host that wrote the logs.
+#
+# Events dropped by LOG_SAMPLE_RATES carry the rate on the records that were
+# kept. Each kept record counts as 1/sample_rate events, so sampled counts are
+# estimates; the report lists which events were scaled.
+
+import argparse
+import gzip
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+LOG_NAME = 'vault_app.log'
+GZIP_BLOCK = 16 * 1024 * 1024
+MIN_CHUNK = 64 * 1024 * 1024
+
+EVENTS = ('login_failed', 'vault_entry_create', 'vault_entry_edit', 'rate_limited')
+
+# JSON lines: field order is fixed by JsonLinesFormatter. The timestamp is captured
+# only as far as the report needs it (see _ts_len), which keeps the key count low.
+# sample_rate follows message/details near the end of the line, so it is found by
+# backtracking from the line end; a quote inside a string value is escaped and
+# cannot fake it.
+JSON_TEMPLATE = (
+    rb'\{"ts": "([^"]{%d})[^"]*", "level": "[A-Z]+", '
+    rb'"event": "(' + b'|'.join(e.encode() for e in EVENTS) + rb')", '
+    rb'"user": (?:"((?:[^"\\]|\\.)*)"|null), '
+    rb'"ip": (?:"([^"]*)"|null), '
+    rb'"endpoint": (?:"([^"]*)"|null)'
+    rb'(?:[^\n]*, "sample_rate": ([0-9.eE+-]+)[,}])?'
+)
+# Free-text lines written before the JSON format. Both patterns start with a
+# literal (fast to search for); the timestamp is read back from the line start.
+LEGACY_RE = re.compile(
+    rb" vault_app: (?:LOGIN FAILED for identifier='([^'\n]*)' from IP=(\S+)"
+    rb"|User '([^'\n]*)' (created|edited) a vault entry)"
+)
+LEGACY_RATE_LIMIT_RE = re.compile(rb": RATE LIMIT EXCEEDED at endpoint=(\S+) from IP=(\S+)")
+LEGACY_ACTIONS = {b'created': b'vault_entry_create', b'edited': b'vault_entry_edit'}
+
+ROTATION_RE = re.compile(re.escape(LOG_NAME) + r'\.(\d{4}-\d\d-\d\d)(?:\.gz)?$')
+
+
+def parse_time(value: str) -> str:
+    """'24h', '7d', '2025-05-13' or '2025-05-13T10:00' -> 'YYYY-MM-DD HH:MM'."""
+    relative = re.fullmatch(r'(\d+)([mhd])', value)
+    if relative:
+        amount, unit = int(relative.group(1)), relative.group(2)
+        delta = {'m': timedelta(minutes=amount), 'h': timedelta(hours=amount), 'd': timedelta(days=amount)}[unit]
+        moment = datetime.utcnow() - delta
+    else:
+        moment = datetime.fromisoformat(value)
+    return moment.strftime('%Y-%m-%d %H:%M')
+
+
+def _shift_day(day: str, days: int) -> str:
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def log_files(log_dir: str, since: str = None, until: str = None) -> list:
+    """Current log plus rotations, oldest first; rotations outside the window are skipped."""
+    files = []
+    for name in os.listdir(log_dir):
+        match = ROTATION_RE.match(name)
+        if match:
+            # Rotations are named by local date; allow a day either way for the UTC window
+            day = match.group(1)
+            if since and _shift_day(day, 1) < since[:10]:
+                continue
+            if until and _shift_day(day, -1) > until[:10]:
+                continue
+            files.append((day, os.path.join(log_dir, name)))
+    files.sort()
+    current = os.path.join(log_dir, LOG_NAME)
+    if os.path.exists(current):
+        files.append(('9999', current))
+    return [path for _, path in files]
+
+
+# --- Scanning (runs in worker processes) ---
+
+@lru_cache(maxsize=4096)
+def _legacy_utc(local: bytes) -> bytes:
+    """Local 'YYYY-MM-DD HH:MM' from a legacy line -> the same minute in UTC."""
+    try:
+        moment = datetime.strptime(local.decode('ascii'), '%Y-%m-%d %H:%M')
+    except (UnicodeDecodeError, ValueError):
+        return local
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M').encode()
+
+
+def _legacy_ts(buffer, match_start: int, ts_len: int) -> bytes:
+    if not ts_len:
+        return b''
+    line_start = buffer.rfind(b'\n', 0, match_start) + 1
+    return _legacy_utc(bytes(buffer[line_start:line_start + 16]))[:ts_len]
+
+
+def _scan(buffer, start: int, end: int, ts_len: int, counts: Counter):
+    """Tally (ts, event, user, ip, endpoint, sample_rate) byte tuples for records in buffer[start:end]."""
+    json_re = re.compile(JSON_TEMPLATE % ts_len)
+    counts.update(json_re.findall(buffer, start, end))
+
+    if buffer.find(b' vault_app: ', start, end) != -1:
+        for m in LEGACY_RE.finditer(buffer, start, end):
+            ts = _legacy_ts(buffer, m.start(), ts_len)
+            if m.group(1) is not None:
+                counts[(ts, b'login_failed', m.group(1), m.group(2), b'', b'')] += 1
+            else:
+                counts[(ts, LEGACY_ACTIONS[m.group(4)], m.group(3), b'', b'', b'')] += 1
+
+    if buffer.find(b'RATE LIMIT EXCEEDED', start, end) != -1:
+        for m in LEGACY_RATE_LIMIT_RE.finditer(buffer, start, end):
+            ts = _legacy_ts(buffer, m.start(), ts_len)
+            counts[(ts, b'rate_limited', b'', m.group(2), m.group(1), b'')] += 1
+
+
+def scan_range(path: str, start: int, end: int, ts_len: int):
+    counts = Counter()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        _scan(mapped, start, end, ts_len, counts)
+    return counts, end - start
+
+
+def scan_gzip(path: str, ts_len: int):
+    counts = Counter()
+    scanned = 0
+    with gzip.open(path, 'rb') as f:
+        tail = b''
+        while True:
+            block = f.read(GZIP_BLOCK)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b'\n') + 1
+            tail = block[cut:]
+            _scan(block, 0, cut, ts_len, counts)
+            scanned += cut
+        if tail:
+            _scan(tail, 0, len(tail), ts_len, counts)
+            scanned += len(tail)
+    return counts, scanned
+
+
+def plan(paths: list, jobs: int) -> list:
+    """Split plain files into newline-aligned ranges so several processes can share one file."""
+    tasks = []
+    for path in paths:
+        if path.endswith('.gz'):
+            tasks.append((scan_gzip, (path,)))
+            continue
+        size = os.path.getsize(path)
+        if size == 0:
+            continue
+        chunk = max(MIN_CHUNK, -(-size // jobs))
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            while start < size:
+                end = mapped.find(b'\n', min(start + chunk, size) - 1)
+                end = size if end == -1 else end + 1
+                tasks.append((scan_range, (path, start, end)))
+                start = end
+    return tasks
+
+
+# --- Aggregation ---
+
+def _text(value: bytes, escaped: bool = False):
+    if not value:
+        return None
+    if escaped and b'\\' in value:
+        return json.loads(b'"' + value + b'"')
+    return value.decode('utf-8', errors='replace')
+
+
+class Report:
+    def __init__(self, since=None, until=None, bucket=None):
+        self.since = since
+        self.until = until
+        self.bucket_len = {'hour': 13, 'day': 10}.get(bucket)
+        self.failed_by_ip = Counter()
+        self.failed_by_identifier = Counter()
+        self.vault_by_user = defaultdict(Counter)
+        self.rate_limited_by_endpoint = Counter()
+        self.windows = defaultdict(Counter)
+        self.sampled = Counter()
+        self.bytes_scanned = 0
+        self.files = 0
+
+    @property
+    def ts_len(self) -> int:
+        if self.since or self.until:
+            return 16
+        return self.bucket_len or 0
+
+    def add_counts(self, counts: Counter):
+        for (ts, event, user, ip, endpoint, sample_rate), n in counts.items():
+            ts = ts.decode().replace('T', ' ')
+            if self.since and ts < self.since:
+                continue
+            if self.until and ts > self.until:
+                continue
+            event = event.decode()
+            if sample_rate:
+                rate = float(sample_rate)
+                if 0 < rate < 1:
+                    self.sampled[event] += n
+                    n = n / rate
+            if event == 'login_failed':
+                self.failed_by_ip[_text(ip) or '-'] += n
+                self.failed_by_identifier[_text(user, escaped=True) or '-'] += n
+            elif event == 'rate_limited':
+                self.rate_limited_by_endpoint[_text(endpoint) or '-'] += n
+            else:
+                self.vault_by_user[_text(user, escaped=True) or '-'][event] += n
+            if self.bucket_len:
+                self.windows[ts[:self.bucket_len]][event] += n
+
+    def run(self, paths: list, jobs: int):
+        self.files = len(paths)
+        tasks = plan(paths, jobs)
+        if jobs <= 1 or len(tasks) <= 1:
+            results = (fn(*args, self.ts_len) for fn, args in tasks)
+            for counts, scanned in results:
+                self.add_counts(counts)
+                self.bytes_scanned += scanned
+            return
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(fn, *args, self.ts_len) for fn, args in tasks]
+            for future in futures:
+                counts, scanned = future.result()
+                self.add_counts(counts)
+                self.bytes_scanned += scanned
+
+    def to_dict(self, top: int) -> dict:
+        def top_counts(counter: Counter) -> dict:
+            return {key: round(n) for key, n in counter.most_common(top)}
+
+        return {
+            'window': {'since': self.since, 'until': self.until},
+            'files': self.files,
+            'bytes_scanned': self.bytes_scanned,
+            # Events whose counts were scaled up from sampled records: {event: records kept}
+            'sampled_events': dict(sorted(self.sampled.items())),
+            'failed_logins_by_ip': top_counts(self.failed_by_ip),
+            'failed_logins_by_identifier': top_counts(self.failed_by_identifier),
+            'vault_changes_by_user': {
+                user: {'create': round(counts['vault_entry_create']), 'edit': round(counts['vault_entry_edit'])}
+                for user, counts in sorted(self.vault_by_user.items(),
+                                           key=lambda item: -sum(item[1].values()))[:top]
+            },
+            'rate_limited_by_endpoint': top_counts(self.rate_limited_by_endpoint),
+            'windows': {
+                window: {
+                    'failed_logins': round(counts['login_failed']),
+                    'creates': round(counts['vault_entry_create']),
+                    'edits': round(counts['vault_entry_edit']),
+                    'rate_limited': round(counts['rate_limited']),
+                }
+                for window, counts in sorted(self.windows.items())
+            },
+        }
+
+
+# --- Output ---
+
+def _table(title: str, headers: tuple, rows) -> str:
+    rows = [tuple(str(v) for v in row) for row in rows]
+    widths = [max([len(h)] + [len(r[i]) for r in rows]) for i, h in enumerate(headers)]
+    lines = [title, '  '.join(h.ljust(w) for h, w in zip(headers, widths)),
+             '  '.join('-' * w for w in widths)]
+    lines += ['  '.join(v.ljust(w) for v, w in zip(row, widths)) for row in rows]
+    if not rows:
+        lines.append('(none)')
+    return '\n'.join(lines)
+
+
+def print_tables(data: dict, elapsed: float):
+    mb = data['bytes_scanned'] / 1e6
+    print(f"Scanned {data['files']} files, {mb:.1f} MB in {elapsed:.2f}s "
+          f"(window {data['window']['since'] or '-'} .. {data['window']['until'] or '-'} UTC)")
+    if data['sampled_events']:
+        print("Estimated from sampled records: " + ', '.join(data['sampled_events']))
+    print()
+    print(_table('Failed logins by IP', ('ip', 'count'), data['failed_logins_by_ip'].items()), '\n')
+    print(_table('Failed logins by identifier', ('identifier', 'count'),
+                 data['failed_logins_by_identifier'].items()), '\n')
+    print(_table('Vault changes by user', ('user', 'create', 'edit'),
+                 [(u, c['create'], c['edit']) for u, c in data['vault_changes_by_user'].items()]), '\n')
+    print(_table('Rate-limit hits by endpoint', ('endpoint', 'count'),
+                 data['rate_limited_by_endpoint'].items()))
+    if data['windows']:
+        print()
+        print(_table('Per window', ('window', 'failed logins', 'creates', 'edits', 'rate limited'),
+                     [(w, c['failed_logins'], c['creates'], c['edits'], c['rate_limited'])
+                      for w, c in data['windows'].items()]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate vault_app logs for incident triage.")
+    parser.add_argument('files', nargs='*', help="Log files to read (default: current + rotated logs).")
+    parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR)
+    parser.add_argument('--since', help="Start of the window: ISO date/time or relative (30m, 24h, 7d).")
+    parser.add_argument('--until', help="End of the window: ISO date/time or relative.")
+    parser.add_argument('--bucket', choices=('hour', 'day'), help="Also break counts down per window.")
+    parser.add_argument('--top', type=int, default=20, help="Rows per table.")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="Scanner processes.")
+    parser.add_argument('--json', action='store_true', help="Print JSON instead of tables.")
+    args = parser.parse_args()
+
+    since = parse_time(args.since) if args.since else None
+    until = parse_time(args.until) if args.until else None
+    paths = args.files or log_files(args.log_dir, since, until)
+
+    report = Report(since, until, args.bucket)
+    start = time.perf_counter()
+    report.run(paths, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    data = report.to_dict(args.top)
+    if args.json:
+        json.dump(data, sys.stdout, indent=2)
+        print()
+    else:
+        print_tables(data, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Start-up profiler: where does the time go before the app can serve a request?
+# Runs the target in a fresh interpreter with `python -X importtime` and reports
+# the import time per module (or per package) plus the wall time of each phase.
+#
+#   python tools/profile_startup.py                      # import backend + create_app()
+#   python tools/profile_startup.py --target script-app  # create_app(web=False), as the CLIs use
+#   python tools/profile_startup.py --target main --by package --top 15
+#   python tools/profile_startup.py --database-uri sqlite://
+#
+# Run from the project root. Times include the interpreter's own start-up work
+# only in the "total" line.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run in the child interpreter; prints its phase timings as JSON on the last line
+_SNIPPETS = {
+    'import': "import backend\n_mark('import backend')",
+    'app': "import backend\n_mark('import backend')\nbackend.create_app(_overrides)\n_mark('create_app')",
+    'script-app': "import backend\n_mark('import backend')\n"
+                  "backend.create_app(_overrides, web=False)\n_mark('create_app')",
+    'main': "import main\n_mark('import main')",
+}
+_PRELUDE = """
+import json, time, sys
+_start = time.perf_counter()
+_phases = []
+def _mark(name):
+    global _start
+    now = time.perf_counter()
+    _phases.append((name, now - _start))
+    _start = now
+_overrides = json.loads(sys.argv[1])
+"""
+_EPILOGUE = "\nprint(json.dumps(_phases))\n"
+
+
+def run_target(target: str, database_uri=None, importtime: bool = False):
+    """
+    Run ``target`` in a fresh interpreter. Returns (total seconds, [(phase, seconds)],
+    importtime lines or None).
+    """
+    overrides = {'SQLALCHEMY_DATABASE_URI': database_uri} if database_uri else {}
+    env = dict(os.environ, MAIL_OUTBOX_WORKER='false')
+    if database_uri:
+        # main.py builds its app without overrides
+        env['DUNKEY_DB_PROFILE'] = env.get('DUNKEY_DB_PROFILE', 'dev-sqlite')
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', _PRELUDE + _SNIPPETS[target] + _EPILOGUE, json.dumps(overrides)]
+
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{target} failed:\n{result.stderr[-2000:]}")
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    lines = [line for line in result.stderr.splitlines() if line.startswith('import time:')] if importtime else None
+    return total, phases, lines
+
+
+def parse_importtime(lines: list) -> list:
+    """[(module, self us, cumulative us, depth)] from `-X importtime` output."""
+    modules = []
+    for line in lines:
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile start-up import time.")
+    parser.add_argument('--target', choices=list(_SNIPPETS), default='app')
+    parser.add_argument('--database-uri', help="Override SQLALCHEMY_DATABASE_URI (e.g. sqlite://).")
+    parser.add_argument('--by', choices=['module', 'package', 'toplevel'], default='module',
+                        help="module: self time per module; package: self time summed per top-level "
+                             "package; toplevel: cumulative time of each module the target imports directly.")
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    total, phases, lines = run_target(args.target, args.database_uri, importtime=True)
+    modules = parse_importtime(lines)
+
+    if args.by == 'module':
+        rows = [(name, self_us) for name, self_us, _, _ in modules]
+    elif args.by == 'package':
+        per_package = defaultdict(int)
+        for name, self_us, _, _ in modules:
+            per_package[name.split('.')[0]] += self_us
+        rows = list(per_package.items())
+    else:
+        rows = [(name, cumulative) for name, _, cumulative, depth in modules if depth == 1]
+    rows.sort(key=lambda row: row[1], reverse=True)
+    imported_us = sum(self_us for _, self_us, _, _ in modules)
+
+    if args.json:
+        print(json.dumps({
+            'target': args.target, 'total_s': total, 'phases': dict(phases),
+            'imports_s': imported_us / 1e6, 'modules': len(modules),
+            'top': [{'name': name, 'ms': us / 1000} for name, us in rows[:args.top]],
+        }, indent=2))
+        return
+
+    print(f"target {args.target}: {total * 1000:.0f} ms total in a fresh interpreter "
+          f"(importtime adds overhead)")
+    for name, seconds in phases:
+        print(f"  {name:<20} {seconds * 1000:>8.1f} ms")
+    print(f"{len(modules)} modules imported, {imported_us / 1000:.0f} ms of import time")
+    print(f"Top {args.top} by {args.by}:")
+    for name, us in rows[:args.top]:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# Minimal local SMTP server that accepts and records every message.
+# Stand-in for the real mail relay when exercising the contact outbox:
+#
+#   python tools/smtp_sink.py --port 8025
+#   MAIL_SERVER=localhost MAIL_PORT=8025 MAIL_USE_TLS=false python main.py
+#
+# Can also be started in-process (see SMTPSink) by benchmarks and smoke scripts.
+
+import argparse
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        sink = self.server.sink
+        with sink.lock:
+            sink.connections += 1
+        if sink.delay:
+            time.sleep(sink.delay)
+
+        self._reply("220 localhost DunKey SMTP sink")
+        sender, recipients = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode(errors='replace').strip()
+            verb = command[:4].upper()
+
+            if verb in ('EHLO', 'HELO'):
+                self._reply("250 localhost")
+            elif verb == 'MAIL':
+                sender, recipients = command[10:].strip(), []
+                self._reply("250 OK")
+            elif verb == 'RCPT':
+                address = command[8:].strip()
+                if address.strip('<>') in sink.drop:
+                    return  # hang up mid-transaction, like a relay going away
+                if address.strip('<>') in sink.reject:
+                    self._reply("550 Mailbox unavailable")
+                    continue
+                recipients.append(address)
+                self._reply("250 OK")
+            elif verb == 'DATA':
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    if line.startswith(b".."):
+                        line = line[1:]
+                    lines.append(line)
+                with sink.lock:
+                    sink.messages.append({
+                        'sender': sender,
+                        'recipients': recipients,
+                        'data': b"".join(lines).decode(errors='replace'),
+                    })
+                self._reply("250 OK")
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self._reply("250 OK")
+            elif verb == 'NOOP':
+                self._reply("250 OK")
+            elif verb == 'QUIT':
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    """
+    Threaded SMTP sink. `messages` holds every accepted message,
+    `connections` counts SMTP sessions (useful to check connection reuse).
+    `delay` adds latency to each new connection to mimic a slow relay.
+    Recipients in `reject` are refused with 550; a recipient in `drop` makes the
+    sink close the connection without replying.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 0, delay: float = 0.0):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.messages = []
+        self.connections = 0
+        self.reject = set()
+        self.drop = set()
+        self.lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._server = _ThreadingServer((self.host, self.port), _SMTPHandler)
+        self._server.sink = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local SMTP sink.")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help="Seconds to wait before greeting each connection.")
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, args.delay).start()
+    print(f"SMTP sink listening on {args.host}:{sink.port}")
+    seen = 0
+    try:
+        while True:
+            time.sleep(0.5)
+            with sink.lock:
+                fresh = sink.messages[seen:]
+                seen = len(sink.messages)
+            for message in fresh:
+                print(f"From {message['sender']} to {', '.join(message['recipients'])} "
+                      f"({len(message['data'])} bytes)")
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()